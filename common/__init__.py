@@ -1,2 +1,3 @@
 from .objects import *
 from .enums import *
+from .fingerprint import fingerprint_arrays, fingerprint_text
@@ -0,0 +1,25 @@
+import hashlib
+import typing as t
+
+import numpy as np
+
+DIGEST_SIZE = 16
+
+
+def fingerprint_arrays(*arrays: t.Any) -> str:
+    """
+    An exact, canonical hash of numeric values.
+
+    Every value is normalized to a contiguous float64 array (with -0.0 folded into 0.0),
+    so equal values hash equally regardless of their original dtype or memory layout.
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for arr in arrays:
+        normalized = np.ascontiguousarray(arr, dtype=np.float64) + 0.0
+        digest.update(repr(normalized.shape).encode())
+        digest.update(normalized.tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_text(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).hexdigest()
@@ -1,7 +1,139 @@
-from dataclasses import dataclass
+import typing as t
+from dataclasses import dataclass, fields
+
+import numpy as np
 import pandas as pd
 
 @dataclass
 class DemandSeries:
     year: int
     series: pd.Series
+
+
+@dataclass(frozen=True)
+class SolarProfile:
+    """
+    A normalised solar production profile, validated once, to be scaled by any number of capacities.
+    """
+
+    # read-only (hours) production ratios (0<=n<=1)
+    ratio: np.ndarray
+
+    @classmethod
+    def from_ratio(cls, normalised_production: pd.Series | np.ndarray) -> "SolarProfile":
+        ratio = np.array(normalised_production, dtype=np.float64)
+        assert ratio.max() <= 1 and ratio.min() >= 0, "normalized production values not in range"
+        ratio.flags.writeable = False
+        return cls(ratio)
+
+    def __len__(self) -> int:
+        return len(self.ratio)
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return self.ratio if dtype is None else self.ratio.astype(dtype, copy=False)
+
+    def production(self, solar_panel_generation_kw: float | np.ndarray, step_hours: float = 1.0) -> np.ndarray:
+        """
+        :param solar_panel_generation_kw: max power of solar panels built, of any shape [KW]
+        :param step_hours: the length of a step of the profile, in hours
+        :return: np.ndarray: (... x steps) production of solar panels in every step, in KwH
+        """
+        generation = np.asarray(solar_panel_generation_kw, dtype=np.float64) * step_hours
+        return generation[..., np.newaxis] * self.ratio
+
+
+def as_solar_profile(normalised_production: pd.Series | np.ndarray | SolarProfile) -> SolarProfile:
+    """
+    Validate a normalised production profile, unless it's already a validated `SolarProfile`.
+    """
+    if isinstance(normalised_production, SolarProfile):
+        return normalised_production
+    return SolarProfile.from_ratio(normalised_production)
+
+
+def year_steps(year: int, step_minutes: int) -> int:
+    """
+    The number of steps of step_minutes in a year.
+    """
+    minutes = (np.datetime64(f"{year + 1}-01-01") - np.datetime64(f"{year}-01-01")) // np.timedelta64(1, "m")
+    assert (24 * 60) % step_minutes == 0, "step_minutes must divide a day"
+    return int(minutes // step_minutes)
+
+
+def check_profile_steps(demand: DemandSeries, solar_prod_ratio: t.Sized, step_minutes: int):
+    """
+    Assert that the profiles have one value for every step of step_minutes in the year of the demand profile.
+
+    A leap year has 8784 hours, so the demand of a leap year needs 8784 x (steps per hour) values,
+    like 35136 in 15 minute steps, not 8760 x (steps per hour). The solar profile needs as many.
+    """
+    steps = year_steps(demand.year, step_minutes)
+    assert len(demand.series) == steps and len(solar_prod_ratio) == steps, (
+        f"profiles of {demand.year} in {step_minutes} minute steps must have {steps} values, "
+        f"not {len(demand.series)} (demand) and {len(solar_prod_ratio)} (solar)"
+    )
+
+
+@dataclass
+class YearlySummary:
+    """
+    Annual totals of a simulated year, in KwH unless stated otherwise.
+    """
+    year: int
+    demand_kwh: float
+    solar_kwh: float
+    coal_kwh: float
+    gas_kwh: float
+    storage_charge_kwh: float
+    storage_discharge_kwh: float
+    curtailed_kwh: float
+    # the highest gas usage of a step, as power, and the hour of the year it happened in
+    peak_gas_kw: float
+    peak_gas_hour: int
+
+    @property
+    def renewable_share(self) -> float:
+        """
+        The share of the demand that was met without gas or coal.
+        """
+        if not self.demand_kwh:
+            return 1.0
+        return 1 - (self.gas_kwh + self.coal_kwh) / self.demand_kwh
+
+
+@dataclass
+class SummaryColumns:
+    """
+    The `YearlySummary` fields of many simulated years, as one array per field.
+    """
+    year: np.ndarray
+    demand_kwh: np.ndarray
+    solar_kwh: np.ndarray
+    coal_kwh: np.ndarray
+    gas_kwh: np.ndarray
+    storage_charge_kwh: np.ndarray
+    storage_discharge_kwh: np.ndarray
+    curtailed_kwh: np.ndarray
+    peak_gas_kw: np.ndarray
+    peak_gas_hour: np.ndarray
+
+    @property
+    def renewable_share(self) -> np.ndarray:
+        """
+        Like `YearlySummary.renewable_share`, for every year.
+        """
+        emitting = self.gas_kwh + self.coal_kwh
+        return 1 - np.divide(emitting, self.demand_kwh, out=np.zeros_like(emitting), where=self.demand_kwh != 0)
+
+    def __getitem__(self, item) -> "SummaryColumns":
+        return SummaryColumns(*(getattr(self, field.name)[item] for field in fields(self)))
+
+    @classmethod
+    def stack(cls, columns: t.Sequence["SummaryColumns"], axis: int = 0) -> "SummaryColumns":
+        return cls(*(np.stack([getattr(c, field.name) for c in columns], axis=axis) for field in fields(cls)))
+
+    def summaries(self) -> list[YearlySummary]:
+        """
+        One `YearlySummary` for every year of one-dimensional columns.
+        """
+        return [YearlySummary(*values) for values in zip(*(getattr(self, field.name).tolist() for field in fields(self)))]
@@ -85,6 +85,8 @@ class DashList(DashModel, GenericModel, t.Generic[TListable]):
         for idx, item in enumerate(data):
             self.__root__[idx].update(item)
 
+        self._edited()
+
     def dash_fields(self, app: "Dash", update_btn_id: str) -> "Component":
 
         # initial generation of the fields and other stuff.
@@ -152,6 +154,7 @@ class DashList(DashModel, GenericModel, t.Generic[TListable]):
             elif ctx.triggered_id == sub_id:
                 self.__disabled__.append(self.__root__.pop())
                 self.__disabled_fields__.append(self.__root_fields__.pop())
+            self._edited()
 
             return _accordion()
 
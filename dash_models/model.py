@@ -26,6 +26,8 @@ import typing_inspect as ti
 from dash import Input, Output, html
 from pydantic import BaseModel
 
+from common import fingerprint_text
+
 from .utils import comp_id
 
 if t.TYPE_CHECKING:
@@ -33,6 +35,9 @@ if t.TYPE_CHECKING:
     from dash.development.base_component import Component
     from pydantic.fields import ModelField
 
+# the number of edits made to all the models, see `DashModel.edits`
+_edits = 0
+
 
 class DashModel(BaseModel):
     """
@@ -44,6 +49,25 @@ class DashModel(BaseModel):
     before running your app.
     """
 
+    def __setattr__(self, name: str, value: t.Any):
+        super().__setattr__(name, value)
+        if name in self.__fields__:
+            self._edited()
+
+    @staticmethod
+    def edits() -> int:
+        """
+        The number of edits made so far to the fields of any model, or to the items of any ``DashList``.
+
+        Values derived from models can be kept along with this number, and are stale once it changes.
+        """
+        return _edits
+
+    @staticmethod
+    def _edited():
+        global _edits
+        _edits += 1
+
     @staticmethod
     def _label(title: str, desc: str | None = None) -> dbc.Label:
         """
@@ -177,6 +201,15 @@ class DashModel(BaseModel):
             else:
                 setattr(self, k, v)
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        A stable hash of the current state of the model, for use as a cache key.
+
+        :return: Hex digest of the canonically serialized model.
+        """
+        return fingerprint_text(self.json(sort_keys=True))
+
     def dash_fields(self, app: "Dash", update_btn_id: str) -> "Component":
         """
         Create the bare input fields for the model.
@@ -1 +1 @@
-from .reader import get_normalized_solar_prod_ratio, read_2018_demand
\ No newline at end of file
+from .reader import get_normalized_solar_prod_ratio, get_solar_profile, read_2018_demand
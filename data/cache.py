@@ -0,0 +1,109 @@
+"""
+A binary cache of parsed raw input files.
+
+Every raw file is parsed once into an ``.npy`` file, next to a ``.meta.json`` file recording the size,
+modification time and SHA-256 of the source it was built from. Later loads open the ``.npy`` file
+memory-mapped, without parsing anything. When the source changes, the cache is rebuilt automatically.
+
+Checking the size and modification time is enough on most loads. The checksum is only computed
+when they changed, so touching a file without changing it doesn't trigger a rebuild.
+"""
+import hashlib
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+__all__ = [
+    "cached_array",
+    "file_sha256",
+]
+
+FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1024 ** 2
+
+Parser = t.Callable[[Path], np.ndarray]
+
+
+def file_sha256(path: str | os.PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_meta(source: Path, sha256: str | None = None) -> dict[str, t.Any]:
+    stat = source.stat()
+    return {
+        "version": FORMAT_VERSION,
+        "source": source.name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(source),
+    }
+
+
+def _write_atomic(path: Path, write: t.Callable[[t.BinaryIO], None]):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(path: Path, meta: dict[str, t.Any]):
+    _write_atomic(path, lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+
+def _is_fresh(source: Path, meta_path: Path, array_path: Path) -> bool:
+    if not meta_path.exists() or not array_path.exists():
+        return False
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        return False
+
+    stat = source.stat()
+    if (meta["size"], meta["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return True
+
+    # the file was touched, so only its contents can tell whether it changed
+    sha256 = file_sha256(source)
+    if sha256 != meta["sha256"]:
+        return False
+    _write_meta(meta_path, _source_meta(source, sha256))
+    return True
+
+
+def cached_array(
+        source: str | os.PathLike,
+        parse: Parser,
+        cache_dir: str | os.PathLike,
+        name: str | None = None,
+) -> np.ndarray:
+    """
+    Load a parsed raw file from the binary cache, parsing it into the cache first if needed.
+
+    :param source: The raw file.
+    :param parse: Parses the raw file into an array, only called when the cache is missing or stale.
+    :param cache_dir: Directory of the cache files, created if missing.
+    :param name: Name of the cache files, defaults to the name of the source file.
+    :return: A read-only, memory-mapped array.
+    """
+    source = Path(source)
+    cache_dir = Path(cache_dir)
+    name = name or source.name
+    meta_path = cache_dir / f"{name}.meta.json"
+    array_path = cache_dir / f"{name}.npy"
+
+    if not _is_fresh(source, meta_path, array_path):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        meta = _source_meta(source)
+        values = np.ascontiguousarray(parse(source))
+        _write_atomic(array_path, lambda f: np.save(f, values, allow_pickle=False))
+        _write_meta(meta_path, meta)
+
+    return np.load(array_path, mmap_mode="r", allow_pickle=False)
@@ -0,0 +1,175 @@
+"""
+A catalog of hourly input profiles, for running scenarios against many weather and demand years.
+
+Profiles are keyed by (kind, year, region). Registering a profile only records where it is;
+it is parsed into the binary cache (see `data.cache`) and memory-mapped on first use, and only
+a bounded number of profiles are kept open, least recently used first out.
+
+Files in a directory can be registered at once with `ProfileCatalog.discover`, when they are named
+``<kind>_<year>.<ext>`` or ``<kind>_<year>_<region>.<ext>``, e.g. ``demand_2019.json`` or
+``solar_2019_north.csv``, in the formats of the shipped files.
+"""
+import os
+import re
+import typing as t
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import DemandSeries
+from .cache import Parser, cached_array
+from .reader import CACHE_DIR, DEMAND_JSON, SOLAR_CSV, _parse_demand_json, _parse_solar_csv, normalize
+
+__all__ = [
+    "ProfileKind",
+    "ProfileKey",
+    "ProfileCatalog",
+    "DEFAULT_REGION",
+]
+
+DEFAULT_REGION = "national"
+DEFAULT_MAX_RESIDENT = 8
+# the year of the shipped profiles
+SHIPPED_YEAR = 2018
+
+_PROFILE_FILE = re.compile(r"^(?P<kind>[a-z]+)_(?P<year>\d{4})(?:_(?P<region>\w+))?\.(?P<ext>json|csv)$")
+
+
+class ProfileKind(str, Enum):
+    DEMAND = "demand"
+    SOLAR = "solar"
+
+
+@dataclass(frozen=True, order=True)
+class ProfileKey:
+    kind: ProfileKind
+    year: int
+    region: str = DEFAULT_REGION
+
+
+_PARSERS: dict[tuple[ProfileKind, str], Parser] = {
+    (ProfileKind.DEMAND, "json"): _parse_demand_json,
+    (ProfileKind.SOLAR, "csv"): _parse_solar_csv,
+}
+
+
+class ProfileCatalog:
+    """
+    Lazily loaded hourly profiles, keyed by `ProfileKey`.
+    """
+
+    def __init__(self, cache_dir: str | os.PathLike = CACHE_DIR, max_resident: int = DEFAULT_MAX_RESIDENT):
+        """
+        :param cache_dir: Directory of the binary cache of the parsed profiles.
+        :param max_resident: Maximum number of profiles kept open.
+        """
+        assert max_resident > 0, "max_resident must be positive"
+        self.cache_dir = Path(cache_dir)
+        self.max_resident = max_resident
+        self._sources: dict[ProfileKey, tuple[Path, Parser]] = {}
+        self._resident: OrderedDict[ProfileKey, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def __contains__(self, key: ProfileKey) -> bool:
+        return key in self._sources
+
+    @classmethod
+    def default(cls, **kwargs) -> "ProfileCatalog":
+        """
+        A catalog of the shipped profiles.
+        """
+        catalog = cls(**kwargs)
+        catalog.register(ProfileKey(ProfileKind.DEMAND, SHIPPED_YEAR), DEMAND_JSON)
+        catalog.register(ProfileKey(ProfileKind.SOLAR, SHIPPED_YEAR), SOLAR_CSV)
+        return catalog
+
+    def register(self, key: ProfileKey, path: str | os.PathLike, parse: Parser | None = None):
+        """
+        :param parse: Parses the file into an array, defaults to the parser of the shipped files of the same kind.
+        """
+        path = Path(path)
+        if parse is None:
+            parse = _PARSERS[(key.kind, path.suffix.lstrip("."))]
+        self._sources[key] = (path, parse)
+        self._resident.pop(key, None)
+
+    def discover(self, directory: str | os.PathLike) -> list[ProfileKey]:
+        """
+        Register every profile file in a directory, see the module documentation for the naming.
+
+        :return: The registered keys.
+        """
+        keys = []
+        for path in sorted(Path(directory).iterdir()):
+            match = _PROFILE_FILE.match(path.name)
+            if not match or match["kind"] not in {kind.value for kind in ProfileKind}:
+                continue
+            key = ProfileKey(ProfileKind(match["kind"]), int(match["year"]), match["region"] or DEFAULT_REGION)
+            self.register(key, path)
+            keys.append(key)
+        return keys
+
+    def keys(self, kind: ProfileKind | None = None, region: str | None = None) -> list[ProfileKey]:
+        return sorted(
+            key for key in self._sources
+            if (kind is None or key.kind == kind) and (region is None or key.region == region)
+        )
+
+    def years(self, region: str = DEFAULT_REGION) -> list[int]:
+        """
+        The years with both a demand and a solar profile in the region.
+        """
+        demand_years = {key.year for key in self.keys(ProfileKind.DEMAND, region)}
+        solar_years = {key.year for key in self.keys(ProfileKind.SOLAR, region)}
+        return sorted(demand_years & solar_years)
+
+    def load(self, key: ProfileKey) -> np.ndarray:
+        """
+        :return: The read-only, memory-mapped values of a profile.
+        """
+        values = self._resident.get(key)
+        if values is not None:
+            self._resident.move_to_end(key)
+            return values
+
+        assert key in self._sources, f"no profile for {key}"
+        path, parse = self._sources[key]
+        values = cached_array(path, parse, self.cache_dir, name=f"{key.kind.value}_{key.year}_{key.region}")
+
+        self._resident[key] = values
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+        return values
+
+    @property
+    def resident(self) -> list[ProfileKey]:
+        """
+        The profiles currently kept open, least recently used first.
+        """
+        return list(self._resident)
+
+    def demand(self, year: int, region: str = DEFAULT_REGION) -> DemandSeries:
+        return DemandSeries(year, pd.Series(self.load(ProfileKey(ProfileKind.DEMAND, year, region))))
+
+    def solar(self, year: int, region: str = DEFAULT_REGION) -> pd.Series:
+        """
+        :return: The normalized solar production ratio, like `data.get_normalized_solar_prod_ratio`.
+        """
+        return normalize(pd.Series(self.load(ProfileKey(ProfileKind.SOLAR, year, region))))
+
+    def profiles(self, years: t.Iterable[int] | None = None,
+                 region: str = DEFAULT_REGION) -> t.Iterator[tuple[int, DemandSeries, pd.Series]]:
+        """
+        Lazily load the demand and solar profiles of every year.
+
+        :param years: Defaults to all the years with both profiles, see `years`.
+        :return: Iterator of (year, demand, normalized solar ratio).
+        """
+        for year in (self.years(region) if years is None else years):
+            yield year, self.demand(year, region), self.solar(year, region)
@@ -1,10 +1,15 @@
 import pandas as pd
+import numpy as np
 import os
 import functools
+from pathlib import Path
 
-from common import DemandSeries
+from common import DemandSeries, SolarProfile
+from .cache import cached_array
 
-DATA_DIR = "./data/raw/"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw")
+# parsed raw files, rebuilt automatically when the raw files change
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
 SOLAR_CSV = os.path.join(DATA_DIR, "national_solar_production.csv")
 DEMAND_JSON = os.path.join(DATA_DIR, "demand_2018.json")
 
@@ -16,12 +21,25 @@ def normalize(series):
     min_value = series.min()
     return (series - min_value) / (max_value - min_value)
 
+def _parse_solar_csv(path: Path) -> np.ndarray:
+    return pd.read_csv(path)["SolarProduction"].to_numpy()
+
+def _parse_demand_json(path: Path) -> np.ndarray:
+    return pd.read_json(path)[0].to_numpy()
+
 @functools.cache
 def get_normalized_solar_prod_ratio() -> pd.Series:
-    solar_prod = pd.read_csv(SOLAR_CSV)["SolarProduction"]
+    solar_prod = pd.Series(cached_array(SOLAR_CSV, _parse_solar_csv, CACHE_DIR), name="SolarProduction")
     return normalize(solar_prod)
 
+@functools.cache
+def get_solar_profile() -> SolarProfile:
+    """
+    The normalized solar production ratio, validated once for all the simulations.
+    """
+    return SolarProfile.from_ratio(get_normalized_solar_prod_ratio())
+
 @functools.cache
 def read_2018_demand() -> DemandSeries:
-    demand = pd.read_json(DEMAND_JSON)[0]
-    return DemandSeries(2018, demand)
\ No newline at end of file
+    demand = pd.Series(cached_array(DEMAND_JSON, _parse_demand_json, CACHE_DIR), name=0)
+    return DemandSeries(2018, demand)
@@ -0,0 +1,86 @@
+"""
+Resample large telemetry CSVs into the fixed-step profiles the simulation runs on.
+
+The CSV is read in chunks, so files far larger than memory can be resampled. Every reading is put in the step
+of the year it falls in, the readings of every step are aggregated, and steps without any readings are
+interpolated from the steps around them. So profiles resampled to the same year and step length are always
+aligned, one value per step, whatever the timestamps and gaps of the original readings were.
+
+The resampler can be used as the parser of a catalog profile, to resample the file once into the binary cache::
+
+    catalog.register(key, path, functools.partial(resample_csv, column="kw", year=2021, step_minutes=15))
+"""
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from common import year_steps
+
+__all__ = [
+    "resample_csv",
+]
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_TIME_COLUMN = "timestamp"
+
+# "mean" suits power readings and ratios, "sum" suits energy readings, when every step has many readings
+Aggregation = t.Literal["mean", "sum"]
+
+
+def _step_indices(times: pd.Series, year: int, step_minutes: int, time_format: str | None) -> np.ndarray:
+    times = pd.to_datetime(times, format=time_format)
+    if times.dt.tz is not None:
+        # keep the local wall time
+        times = times.dt.tz_localize(None)
+    offsets = times.to_numpy(dtype="datetime64[ns]") - np.datetime64(f"{year}-01-01", "ns")
+    return offsets // np.timedelta64(step_minutes, "m")
+
+
+def resample_csv(
+        path: str | os.PathLike,
+        column: str,
+        year: int,
+        step_minutes: int = 60,
+        how: Aggregation = "mean",
+        time_column: str = DEFAULT_TIME_COLUMN,
+        time_format: str | None = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> np.ndarray:
+    """
+    Resample a column of timestamped readings into one value for every step of a year.
+
+    :param path: CSV file with a timestamp column and a value column. The rows don't have to be sorted.
+    :param column: The column of the values.
+    :param year: Readings outside the year are ignored.
+    :param step_minutes: The length of the steps, see `GeneralParams.step_minutes`.
+    :param how: How to aggregate the readings of a step.
+    :param time_column: The column of the timestamps.
+    :param time_format: The `pd.to_datetime` format of the timestamps, inferred from the first one by default.
+    :param chunk_rows: Number of rows read at once, which bounds the memory use.
+    :return: (steps) array of the year.
+    """
+    assert how in ("mean", "sum"), f"unknown aggregation {how}"
+    steps = year_steps(year, step_minutes)
+    totals = np.zeros(steps)
+    counts = np.zeros(steps, dtype=np.int64)
+
+    for chunk in pd.read_csv(path, usecols=[time_column, column], chunksize=chunk_rows):
+        indices = _step_indices(chunk[time_column], year, step_minutes, time_format)
+        values = chunk[column].to_numpy(dtype=np.float64)
+        valid = (indices >= 0) & (indices < steps) & ~np.isnan(values)
+        totals += np.bincount(indices[valid], weights=values[valid], minlength=steps)
+        counts += np.bincount(indices[valid], minlength=steps)
+
+    filled = counts > 0
+    if not filled.any():
+        raise Exception(f"no readings of {column} in {year}")
+
+    resampled = totals
+    if how == "mean":
+        np.divide(totals, counts, out=resampled, where=filled)
+    if not filled.all():
+        all_steps = np.arange(steps)
+        resampled[~filled] = np.interp(all_steps[~filled], all_steps[filled], resampled[filled])
+    return resampled
@@ -0,0 +1,74 @@
+"""
+Publish the base hourly profiles once into shared memory, so worker processes can attach to them
+as zero-copy, read-only NumPy views instead of parsing and pickling them again.
+"""
+import typing as t
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from common import DemandSeries, SolarProfile, as_solar_profile
+
+__all__ = [
+    "SharedProfiles",
+    "publish_profiles",
+]
+
+
+@dataclass(frozen=True)
+class SharedProfiles:
+    """
+    A small, picklable handle to profiles published with `publish_profiles`.
+
+    The block holds the demand profile followed by the normalized solar profile, as float64.
+    """
+
+    shm_name: str
+    demand_year: int
+    demand_len: int
+    solar_len: int
+
+    def attach(self) -> tuple[SharedMemory, DemandSeries, SolarProfile]:
+        """
+        Attach to the shared block.
+
+        The returned `SharedMemory` must be kept alive for as long as the profiles are used.
+
+        :return: (shared memory, demand, solar profile), both profiles are read-only views.
+        """
+        shm = SharedMemory(name=self.shm_name)
+        values = np.ndarray((self.demand_len + self.solar_len,), dtype=np.float64, buffer=shm.buf)
+        values.flags.writeable = False
+
+        demand = pd.Series(values[:self.demand_len], copy=False)
+        # validated when published
+        solar = SolarProfile(values[self.demand_len:])
+        return shm, DemandSeries(self.demand_year, demand), solar
+
+
+@contextmanager
+def publish_profiles(
+        demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+) -> t.Iterator[SharedProfiles]:
+    """
+    Copy the profiles into a new shared memory block, which is released when the context exits.
+    """
+    demand_values = demand.series.to_numpy(dtype=np.float64)
+    solar_values = as_solar_profile(solar_prod_ratio).ratio
+    size = demand_values.nbytes + solar_values.nbytes
+
+    shm = SharedMemory(create=True, size=size)
+    try:
+        values = np.ndarray((len(demand_values) + len(solar_values),), dtype=np.float64, buffer=shm.buf)
+        values[:len(demand_values)] = demand_values
+        values[len(demand_values):] = solar_values
+        del values
+
+        yield SharedProfiles(shm.name, demand.year, len(demand_values), len(solar_values))
+    finally:
+        shm.close()
+        shm.unlink()
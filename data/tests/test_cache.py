@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+from ..cache import cached_array
+
+
+def parse_lines(path):
+    parse_lines.calls += 1
+    return np.array([float(line) for line in path.read_text().split()])
+
+
+def test_cached_array_rebuilds_on_change(tmp_path):
+    source = tmp_path / "profile.txt"
+    source.write_text("1\n2\n3\n")
+    cache_dir = tmp_path / "cache"
+    parse_lines.calls = 0
+
+    values = cached_array(source, parse_lines, cache_dir)
+    np.testing.assert_array_equal(values, [1, 2, 3])
+    assert isinstance(values, np.memmap) and not values.flags.writeable
+
+    # loaded from the cache
+    np.testing.assert_array_equal(cached_array(source, parse_lines, cache_dir), [1, 2, 3])
+    assert parse_lines.calls == 1
+
+    # touched but unchanged, so the checksum still matches
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cached_array(source, parse_lines, cache_dir)
+    assert parse_lines.calls == 1
+
+    source.write_text("4\n5\n")
+    np.testing.assert_array_equal(cached_array(source, parse_lines, cache_dir), [4, 5])
+    assert parse_lines.calls == 2
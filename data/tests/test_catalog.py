@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+
+from ..catalog import ProfileCatalog, ProfileKey, ProfileKind
+
+
+def write_profiles(directory, years):
+    for year in years:
+        (directory / f"demand_{year}.json").write_text(json.dumps([year, year + 1, year + 2]))
+        (directory / f"solar_{year}.csv").write_text("SolarProduction\n0\n5\n10\n")
+    (directory / "demand_2019_north.json").write_text(json.dumps([1, 2, 3]))
+    (directory / "notes.txt").write_text("not a profile")
+
+
+def test_catalog_loads_lazily(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_profiles(raw_dir, [2019, 2020, 2021])
+    catalog = ProfileCatalog(cache_dir=tmp_path / "cache", max_resident=2)
+
+    keys = catalog.discover(raw_dir)
+    assert len(keys) == len(catalog) == 7
+    assert ProfileKey(ProfileKind.DEMAND, 2019, "north") in catalog
+    assert catalog.years() == [2019, 2020, 2021]
+    assert catalog.years("north") == []
+    # nothing is parsed before it's used
+    assert not (tmp_path / "cache").exists() and catalog.resident == []
+
+    demand = catalog.demand(2020)
+    assert demand.year == 2020
+    np.testing.assert_array_equal(demand.series, [2020, 2021, 2022])
+    np.testing.assert_array_equal(catalog.solar(2020), [0, 0.5, 1])
+
+    # only the most recently used profiles are kept open
+    catalog.demand(2021)
+    assert catalog.resident == [ProfileKey(ProfileKind.SOLAR, 2020), ProfileKey(ProfileKind.DEMAND, 2021)]
+
+    years = [year for year, _, _ in catalog.profiles([2021, 2019])]
+    assert years == [2021, 2019]
+    assert len(catalog.resident) == 2
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from common import year_steps
+from ..resample import resample_csv
+
+
+def test_year_steps():
+    assert year_steps(2018, 60) == 8760
+    assert year_steps(2020, 15) == 366 * 96
+
+
+def test_resample_csv(tmp_path):
+    times = pd.date_range("2021-01-01", "2021-12-31 23:55", freq="5min")
+    values = np.arange(len(times), dtype=np.float64)
+    readings = pd.DataFrame({"timestamp": times, "kw": values})
+    # shuffled, with a missing hour and readings of other years
+    readings = readings.drop(index=range(12, 24)).sample(frac=1, random_state=0)
+    extra = pd.DataFrame({"timestamp": pd.to_datetime(["2020-12-31 23:55", "2022-01-01 00:00"]), "kw": [1e9, 1e9]})
+    path = tmp_path / "telemetry.csv"
+    pd.concat([readings, extra]).to_csv(path, index=False, date_format="%Y-%m-%d %H:%M")
+
+    resampled = resample_csv(path, "kw", 2021, step_minutes=15, chunk_rows=10_000)
+    assert resampled.shape == (year_steps(2021, 15),)
+    np.testing.assert_allclose(resampled[:4], [1, 4, 7, 10])
+    # the missing hour is interpolated between its neighbours
+    np.testing.assert_allclose(resampled[4:9], [13, 16, 19, 22, 25])
+    np.testing.assert_allclose(resampled[-1], values[-2])
+
+    hourly = resample_csv(path, "kw", 2021, how="sum", chunk_rows=10_000)
+    assert hourly.shape == (8760,) and hourly[2] == values[24:36].sum()
+
+    with pytest.raises(Exception):
+        resample_csv(path, "kw", 2019)
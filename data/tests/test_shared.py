@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from common import DemandSeries, SolarProfile
+from ..shared import publish_profiles
+
+
+def test_publish_profiles_roundtrip():
+    demand = DemandSeries(2018, pd.Series([1.0, 2.5, 3.25]))
+    solar = pd.Series([0.0, 0.5, 1.0, 0.25])
+
+    with publish_profiles(demand, solar) as profiles:
+        shm, attached_demand, attached_solar = profiles.attach()
+
+        assert attached_demand.year == 2018
+        np.testing.assert_array_equal(attached_demand.series, demand.series)
+        np.testing.assert_array_equal(attached_solar, solar)
+        assert not attached_solar.ratio.flags.writeable
+
+        del attached_demand, attached_solar
+        shm.close()
+
+
+def test_publish_solar_profile():
+    demand = DemandSeries(2018, pd.Series([1.0, 2.5]))
+    solar = SolarProfile.from_ratio(pd.Series([0.0, 0.5]))
+
+    with publish_profiles(demand, solar) as profiles:
+        shm, _, attached_solar = profiles.attach()
+        np.testing.assert_array_equal(attached_solar.production(10.0), solar.production(10.0))
+
+        del attached_solar
+        shm.close()
@@ -1,9 +1,12 @@
 from __future__ import annotations
+import numpy as np
 from numpy_financial import pmt, npv
 from dataclasses import dataclass
 from functools import cached_property
 from params.params import AllParams
-from common import EnergySource, EmissionType, POLLUTING_ENERGY_SOURCES
+from params.compiled import CompiledParams, as_compiled, SOURCES, EMISSION_TYPES
+from params.roadmap import ScenarioBatch, YearlyScenario
+from common import EnergySource, EmissionType, POLLUTING_ENERGY_SOURCES, YearlySummary
 from units import kWh, ILS
 from units.units import ILS_per_kWh
 
@@ -20,6 +23,23 @@ class YearlySimulationProductionResults:
     used_gas_kwh: kWh
     used_coal_kwh: kWh
 
+    @classmethod
+    def from_summary(cls, summary: YearlySummary, yearly_scenario: YearlyScenario,
+                     installed_coal_kw: float) -> YearlySimulationProductionResults:
+        """
+        Build the production results of a year from its simulation summary.
+        Installed gas is sized to cover the peak hourly gas usage.
+        """
+        return cls(
+            installed_gas_kw=summary.peak_gas_kw,
+            installed_solar_kw=yearly_scenario.solar_capacity_kw,
+            installed_wind_kw=yearly_scenario.wind_capacity_kw,
+            installed_coal_kw=installed_coal_kw,
+            installed_storage_kwh=yearly_scenario.storage_capacity_kwh,
+            used_gas_kwh=summary.gas_kwh,
+            used_coal_kwh=summary.coal_kwh,
+        )
+
     @property
     def emitting_used(self) -> kWh:
         return self.used_gas_kwh + self.used_coal_kwh
@@ -130,3 +150,222 @@ def calculate_costs(yearly_capacities: list[YearlySimulationProductionResults],
         year_npvs.append(current_year_npvs)
 
     return year_costs, year_npvs
+
+
+@dataclass
+class CostArrays:
+    """
+    The results of `calculate_costs` as dense arrays.
+
+    Per-source arrays are (... x years x sources), with sources ordered as in `SOURCES`,
+    and any leading axes (e.g. scenarios) are those of the capacities they were calculated from.
+    The first year only serves as a baseline, so all of its costs are 0.
+    """
+    years: np.ndarray
+    capex: np.ndarray
+    opex: np.ndarray
+    variable_opex: np.ndarray
+    npv: np.ndarray
+    externalities: np.ndarray
+    externalities_npv: np.ndarray
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.capex + self.opex + self.variable_opex
+
+    @property
+    def total_npv(self) -> float | np.ndarray:
+        """
+        The NPV of all sources and externalities at the last year, for every leading index.
+        """
+        total_npv = self.npv[..., -1, :].sum(axis=-1) + self.externalities_npv[..., -1]
+        return float(total_npv) if np.ndim(total_npv) == 0 else total_npv
+
+    def scenario(self, idx: int) -> CostArrays:
+        """
+        The costs of a single scenario, out of costs with a leading scenarios axis.
+        """
+        return CostArrays(self.years, self.capex[idx], self.opex[idx], self.variable_opex[idx], self.npv[idx],
+                          self.externalities[idx], self.externalities_npv[idx])
+
+
+@dataclass(frozen=True)
+class CostTables:
+    """
+    Per-year cost parameters, looked up once so that costs can be computed with broadcasting.
+
+    Per-source tables are (years x sources), with sources ordered as in `SOURCES`.
+    The first year is only a baseline, so its values are never used.
+    """
+    years: np.ndarray
+    # the yearly capex payment for every kW of new capacity
+    annuity: np.ndarray
+    opex: np.ndarray
+    variable_opex: np.ndarray
+    # the emissions cost of every emitting kWh
+    emissions_cost_per_kwh: np.ndarray
+    # (1 + interest rate) ** years since the start year
+    discount: np.ndarray
+
+    @classmethod
+    def from_params(cls, params: AllParams | CompiledParams) -> CostTables:
+        return cls.from_compiled(as_compiled(params))
+
+    @classmethod
+    def from_compiled(cls, params: CompiledParams) -> CostTables:
+        years = params.years
+
+        emissions_cost_per_kwh = np.zeros(len(years))
+        for source in POLLUTING_ENERGY_SOURCES:
+            source_emissions = params.emissions[SOURCES.index(source)]
+            for emission_idx in range(len(EMISSION_TYPES)):
+                emissions_cost_per_kwh[1:] += source_emissions[emission_idx] * \
+                                              params.emissions_costs[1:, emission_idx]
+
+        return cls(
+            years=years,
+            annuity=-1 * pmt(params.wacc_rate, params.lifetime, 1),
+            opex=params.opex,
+            variable_opex=params.variable_opex,
+            emissions_cost_per_kwh=emissions_cost_per_kwh,
+            discount=(params.interest_rate + 1) ** np.arange(len(years), dtype=np.float64),
+        )
+
+
+def _discounted_cumsum(discount: np.ndarray, cash_flows: np.ndarray, years_axis: int) -> np.ndarray:
+    """
+    Vectorized `running_npv` over the years axis, where the first year is the (zero) baseline.
+    """
+    shape = [1] * cash_flows.ndim
+    shape[years_axis] = -1
+    discounted = cash_flows / discount.reshape(shape)
+    discounted = np.moveaxis(discounted, years_axis, 0)
+    discounted[0] = 0
+    return np.moveaxis(np.cumsum(discounted, axis=0), 0, years_axis)
+
+
+def calculate_costs_batch(capacities: np.ndarray, emitting_used: np.ndarray, tables: CostTables) -> CostArrays:
+    """
+    Calculate the costs of many scenarios at once, with the same formulas as `calculate_costs`.
+
+    :param capacities: (... x years x sources) installed capacity, sources ordered as in `SOURCES`.
+    :param emitting_used: (... x years) kWh used from emitting sources.
+    :param tables: the cost parameters of every year.
+    :return: CostArrays with the leading axes of the inputs.
+    """
+    capacities = np.asarray(capacities, dtype=np.float64)
+    emitting_used = np.asarray(emitting_used, dtype=np.float64)
+    assert capacities.shape[-2:] == (len(tables.years), len(SOURCES))
+    assert emitting_used.shape == capacities.shape[:-1]
+
+    capex = np.zeros_like(capacities)
+    opex = np.zeros_like(capacities)
+    variable_opex = np.zeros_like(capacities)
+
+    # pmt is linear in the present value, so every kW of new capacity costs one annuity
+    capex[..., 1:, :] = tables.annuity[1:] * np.diff(capacities, axis=-2)
+    # Original model adds comulative capex to current non-comulative opex...
+    opex[..., 1:, :] = tables.opex[1:] * capacities[..., 1:, :]
+    # TODO: get used capacity and multiply by variable_opex here
+
+    externalities = tables.emissions_cost_per_kwh * emitting_used
+
+    total = capex + opex + variable_opex
+    return CostArrays(
+        years=tables.years,
+        capex=capex,
+        opex=opex,
+        variable_opex=variable_opex,
+        npv=_discounted_cumsum(tables.discount, total, years_axis=-2),
+        externalities=externalities,
+        externalities_npv=_discounted_cumsum(tables.discount, externalities, years_axis=-1),
+    )
+
+
+def _npv_per_unit(discount: np.ndarray, annuity: np.ndarray, opex: np.ndarray) -> np.ndarray:
+    """
+    The contribution of one unit of capacity in every year to the total NPV of `calculate_costs_batch`.
+
+    A unit in year y pays its opex and annuity in that year, and saves the annuity of year y + 1,
+    since the capacity of the next year is then new only beyond it.
+    """
+    per_unit = np.zeros(len(discount))
+    per_unit[1:] += (annuity[1:] + opex[1:]) / discount[1:]
+    per_unit[:-1] -= annuity[1:] / discount[1:]
+    return per_unit
+
+
+def total_npv_lower_bound(capacities: np.ndarray,
+                          peak_gas_kw: tuple[np.ndarray, np.ndarray],
+                          emitting_used: tuple[np.ndarray, np.ndarray],
+                          tables: CostTables) -> np.ndarray:
+    """
+    A lower bound of the total NPV of scenarios, which only needs their capacities and no simulation.
+
+    The costs of all sources but gas are known exactly from the capacities. Gas capacity (the peak gas usage)
+    and the emitting usage are only known to be within a range, so every year takes whichever end is cheaper.
+
+    :param capacities: (... x years x sources) installed capacity, where the gas capacity is ignored.
+    :param peak_gas_kw: (min, max) of the peak gas usage, (... x years) or (years).
+    :param emitting_used: (min, max) of the kWh used from emitting sources, (... x years) or (years).
+    :return: The lower bound of `CostArrays.total_npv`, for every leading index.
+    """
+    gas_idx = SOURCES.index(EnergySource.GAS)
+    capacities = np.array(capacities, dtype=np.float64)
+    capacities[..., gas_idx] = 0
+
+    known = calculate_costs_batch(capacities, np.zeros(capacities.shape[:-1]), tables).total_npv
+
+    gas_per_kw = _npv_per_unit(tables.discount, tables.annuity[:, gas_idx], tables.opex[:, gas_idx])
+    emitting_per_kwh = np.zeros(len(tables.years))
+    emitting_per_kwh[1:] = tables.emissions_cost_per_kwh[1:] / tables.discount[1:]
+
+    def cheapest(per_unit: np.ndarray, value_range: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        low, high = value_range
+        return (per_unit * np.where(per_unit >= 0, low, high)).sum(axis=-1)
+
+    return known + cheapest(gas_per_kw, peak_gas_kw) + cheapest(emitting_per_kwh, emitting_used)
+
+
+def capacity_matrix(yearly_capacities: list[YearlySimulationProductionResults]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: (years x sources) installed capacities, and (years) kWh used from emitting sources.
+    """
+    capacities = np.array([[year_data.get(source) for source in SOURCES] for year_data in yearly_capacities],
+                          dtype=np.float64)
+    emitting_used = np.array([year_data.emitting_used for year_data in yearly_capacities], dtype=np.float64)
+    return capacities, emitting_used
+
+
+def scenario_capacities(batch: ScenarioBatch, peak_gas_kw: np.ndarray, coal_must_run: np.ndarray) -> np.ndarray:
+    """
+    The installed capacities of a batch of scenarios, straight from its columns.
+    Installed gas is sized to cover the peak hourly gas usage, like `YearlySimulationProductionResults.from_summary`.
+
+    :param peak_gas_kw: (scenarios x years) peak hourly gas usage.
+    :param coal_must_run: (years) installed coal, shared by all scenarios.
+    :return: (scenarios x years x sources) installed capacities, sources ordered as in `SOURCES`.
+    """
+    peak_gas_kw = np.asarray(peak_gas_kw, dtype=np.float64)
+    years = peak_gas_kw.shape[1]
+    columns = {
+        EnergySource.GAS: peak_gas_kw,
+        EnergySource.COAL: coal_must_run[:years],
+        EnergySource.SOLAR: batch.solar_capacity_kw[:, :years],
+        EnergySource.STORAGE: batch.storage_capacity_kwh[:, :years],
+        EnergySource.WIND: batch.wind_capacity_kw[:, :years],
+    }
+    return np.stack([np.broadcast_to(columns[source], peak_gas_kw.shape) for source in SOURCES], axis=-1)
+
+
+def calculate_cost_arrays(yearly_capacities: list[YearlySimulationProductionResults],
+                          params: AllParams | CompiledParams,
+                          tables: CostTables | None = None) -> CostArrays:
+    """
+    Same as `calculate_costs`, but all years and sources are computed together as NumPy arrays.
+
+    :param tables: precomputed `CostTables.from_params(params)`, to reuse across scenarios.
+    """
+    tables = tables or CostTables.from_params(params)
+    assert len(yearly_capacities) == len(tables.years), "yearly_capacities must cover [start_year, end_year)"
+    return calculate_costs_batch(*capacity_matrix(yearly_capacities), tables)
@@ -1,30 +1,68 @@
-import copy
+import weakref
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
-from common import DemandSeries
+from common import DemandSeries, SolarProfile, as_solar_profile, fingerprint_arrays
+
+# number of demand projections kept by `demand_projection`
+DEMAND_PROJECTION_CACHE_SIZE = 16
+
+_demand_projections: OrderedDict[tuple, np.ndarray] = OrderedDict()
+# the fingerprints of the base demand profiles, by the identity of the series, see `_series_fingerprint`
+_series_fingerprints: dict[int, tuple[weakref.ref, str]] = {}
+
+
+def effective_solar_capacity(solar_capacity_kw: np.ndarray, degradation_rate: float) -> np.ndarray:
+    """
+    The capacity of the solar panels that is still producing every year, when panels lose
+    degradation_rate of their capacity every year.
+
+    The panels are tracked in cohorts by the year they were built: the capacity of the first year,
+    and the capacity added in every later year. A cohort built i years ago produces (1 - degradation_rate) ** i
+    of its capacity. When the built capacity decreases, the oldest panels are removed first, so no cohort
+    ever has a negative capacity.
+
+    :param solar_capacity_kw: (... x years) built capacity, in KW (>= 0)
+    :param degradation_rate: the yearly proportion of the capacity lost, like 0.005
+    :return: np.ndarray: (... x years) effective capacity, in KW
+    """
+    solar_capacity_kw = np.asarray(solar_capacity_kw, dtype=np.float64)
+    if degradation_rate == 0:
+        return solar_capacity_kw
+
+    change = np.diff(solar_capacity_kw, axis=-1, prepend=0)
+    added = change.clip(min=0)
+    # the capacity built up to every cohort, and the capacity removed up to every year
+    built = np.cumsum(added, axis=-1)
+    removed = np.cumsum((-change).clip(min=0), axis=-1)
+    # remaining[..., year, cohort]: the capacity of a cohort left after the oldest removed capacity
+    remaining = np.clip(built[..., np.newaxis, :] - removed[..., :, np.newaxis], 0, added[..., np.newaxis, :])
+
+    ages = np.arange(solar_capacity_kw.shape[-1])
+    # retention[year, built] of a cohort built in a year, at a later year
+    age = ages[:, np.newaxis] - ages[np.newaxis, :]
+    retention = np.where(age >= 0, (1 - degradation_rate) ** np.maximum(age, 0), 0)
+    return np.einsum("...yc,yc->...y", remaining, retention)
 
 
 def predict_solar_production(
-    normalised_production: pd.Series,
+    normalised_production: pd.Series | SolarProfile,
     solar_panel_generation_kw: float,
+    step_hours: float = 1.0,
 ) -> pd.Series:
     """
-    Get Solar Production Profile as pd.DataFrame.
+    Get Solar Production Profile as pd.Series.
 
-    :param normalised_production: normalised solar hourly production ratios (0<=n<=1)
-    :param solar_panel_generation_kw: float max power of solar panels built [KW]
-    :param params: namedtuple simulation params
+    :param normalised_production: normalised solar production ratios of every step (0<=n<=1)
+    :param solar_panel_generation_kw: float max power of solar panels working, see `effective_solar_capacity` [KW]
+    :param step_hours: the length of a step of the profile, in hours
     :return: pd.Series: yearly production of solar panels, in KwH
     """
-    assert normalised_production.max() <= 1 and normalised_production.min() >= 0, "normalized production values not in range"
-    # TODO: improve this to track degradation over the years properly? Should make a big difference during the years when solar production is ramped up.
-    # average_production_ratio = (
-    #     1 + (1 - params.PV_DEGRADATION) ** params.FACILITY_LIFE_SPAN
-    # ) / 2
-    average_production_ratio = 1
-    generation_with_ratio = solar_panel_generation_kw * average_production_ratio
-    adjusted_prod = normalised_production * generation_with_ratio
-    return adjusted_prod
+    production = as_solar_profile(normalised_production).production(solar_panel_generation_kw, step_hours)
+    index = normalised_production.index if isinstance(normalised_production, pd.Series) else None
+    return pd.Series(production, index=index)
 
 
 def predict_demand(
@@ -41,9 +79,88 @@ def predict_demand(
     """
     assert simulated_year >= hourly_demand.year
 
-    expected_demand = copy.deepcopy(hourly_demand)
-    expected_demand.series *= yoy_growth_proportion ** (
-        simulated_year - expected_demand.year
+    growth = yoy_growth_proportion ** (simulated_year - hourly_demand.year)
+    return DemandSeries(simulated_year, hourly_demand.series * growth)
+
+
+def predict_solar_production_matrix(
+    normalised_production: pd.Series | np.ndarray | SolarProfile,
+    solar_panel_generation_kw: np.ndarray,
+) -> np.ndarray:
+    """
+    Like `predict_solar_production`, for many capacities at once.
+
+    :param normalised_production: normalised solar hourly production ratios (0<=n<=1)
+    :param solar_panel_generation_kw: max power of solar panels working, for each row [KW]
+    :return: np.ndarray: (rows x hours) production of solar panels, in KwH
+    """
+    return as_solar_profile(normalised_production).production(solar_panel_generation_kw)
+
+
+def predict_demand_matrix(
+    hourly_demand: DemandSeries, yoy_growth_proportion: float, simulated_years: np.ndarray
+) -> np.ndarray:
+    """
+    Like `predict_demand`, for many years at once.
+
+    :param hourly_demand: DemandSeries of the base year
+    :param yoy_growth_proportion: float: the Year-over-Year growth proportion. Like 1.03
+    :param simulated_years: the years of the wanted output
+    :return: np.ndarray: (years x hours) predicted demand, in KwH
+    """
+    simulated_years = np.asarray(simulated_years)
+    assert (simulated_years >= hourly_demand.year).all()
+
+    growth = np.power(yoy_growth_proportion, (simulated_years - hourly_demand.year).astype(np.float64))
+    return growth[:, np.newaxis] * hourly_demand.series.to_numpy(dtype=np.float64)[np.newaxis, :]
+
+
+def _series_fingerprint(series: pd.Series) -> str:
+    """
+    The fingerprint of a base profile, computed once per series object, as long as it's alive.
+    """
+    series_id = id(series)
+    entry = _series_fingerprints.get(series_id)
+    if entry is not None and entry[0]() is series:
+        return entry[1]
+
+    fingerprint = fingerprint_arrays(series.to_numpy())
+    _series_fingerprints[series_id] = (
+        weakref.ref(series, lambda _: _series_fingerprints.pop(series_id, None)),
+        fingerprint,
     )
-    expected_demand.year = simulated_year
-    return expected_demand
+    return fingerprint
+
+
+def demand_projection(
+    hourly_demand: DemandSeries, yoy_growth_proportion: float, start_year: int, end_year: int
+) -> np.ndarray:
+    """
+    The `predict_demand_matrix` of every year in [start_year, end_year), computed once and cached.
+
+    Projections are cached by the values of the base profile, the growth and the years, so simulating
+    the same years for many scenarios doesn't scale the same profile again.
+    The values of a profile are only hashed the first time its series is seen, so the series must not
+    be modified in place after it was projected.
+    The result is shared by all the callers, so it's read-only, and so are its rows.
+
+    :return: np.ndarray: read-only (years x hours) predicted demand, in KwH
+    """
+    key = (
+        _series_fingerprint(hourly_demand.series),
+        hourly_demand.year,
+        float(yoy_growth_proportion),
+        start_year,
+        end_year,
+    )
+    projection = _demand_projections.get(key)
+    if projection is not None:
+        _demand_projections.move_to_end(key)
+        return projection
+
+    projection = predict_demand_matrix(hourly_demand, yoy_growth_proportion, np.arange(start_year, end_year))
+    projection.flags.writeable = False
+    _demand_projections[key] = projection
+    while len(_demand_projections) > DEMAND_PROJECTION_CACHE_SIZE:
+        _demand_projections.popitem(last=False)
+    return projection
@@ -1,8 +1,10 @@
 class Battery:
-    __slots__ = ["_charge_rate", "_efficiency", "_capacity", "_curr_energy"]
+    __slots__ = ["_charge_rate", "_efficiency", "_capacity", "_curr_energy", "_step_hours"]
 
-    def __init__(self, capacity_kwh: float, energy_kwh: float, charge_rate: float, efficiency: float):
+    def __init__(self, capacity_kwh: float, energy_kwh: float, charge_rate: float, efficiency: float,
+                 step_hours: float = 1.0):
         self._charge_rate = charge_rate
+        self._step_hours = step_hours
         self._efficiency = efficiency
         self._capacity = capacity_kwh
         assert energy_kwh <= capacity_kwh
@@ -13,7 +15,7 @@ class Battery:
 
         return min(
             max_charge_at_efficiency,
-            self._capacity * self._charge_rate
+            self._capacity * self._charge_rate * self._step_hours
         )
 
     def calc_allowed_charge(self, desired_kwh):
@@ -25,7 +27,7 @@ class Battery:
     def get_max_discharge(self):
         return min(
             self._curr_energy,
-            self._capacity * self._charge_rate
+            self._capacity * self._charge_rate * self._step_hours
         )
 
     def calc_allowed_discharge(self, desired_kwh):
@@ -1,19 +1,38 @@
+import typing as t
+
 import pandas as pd
 import numpy as np
 
-from .battery import Battery
-from common import EnergySource, VARIABLE_ENERGY_SOURCES, SimOutFields, FIXED_ENERGY_SOURCES, SimUsageFields
+from .nzo_kernel import NzoDispatch, nzo_dispatch, nzo_dispatch_batch, nzo_dispatch_summary
+from common import EnergySource, SimOutFields, SimUsageFields, SummaryColumns, YearlySummary
 
 __all__ = [
-    "nzo_strategy"
+    "nzo_strategy",
+    "nzo_strategy_batch",
+    "nzo_strategy_block",
+    "nzo_strategy_summary",
+    "nzo_strategy_summary_columns",
+    "nzo_renewable_share",
+    "BLOCK_FIELDS",
 ]
 
+# the columns of the `nzo_strategy` result, in order
+BLOCK_FIELDS = (
+    SimUsageFields.GAS,
+    SimUsageFields.STORAGE,
+    SimUsageFields.SOLAR,
+    SimUsageFields.COAL,
+    *SimOutFields,
+    SimUsageFields.WIND,
+)
+
 
 def nzo_strategy(demand: pd.Series,
                  fixed_production: pd.DataFrame,
                  storage_capacity_kwh: float,
                  storage_efficiency: float,
                  storage_charge_rate: float,
+                 step_hours: float = 1.0,
                  ) -> pd.DataFrame:
     sums_df = pd.DataFrame()
     sums_df["demand"] = demand
@@ -22,20 +41,199 @@ def nzo_strategy(demand: pd.Series,
     sums_df["fixed_over_demand"] = (sums_df["fixed_gen"] - sums_df["demand"]).clip(lower=0)
 
     out_misc, variable_gen = nzo_strategy_sim(demand, sums_df, storage_capacity_kwh, storage_efficiency,
-                                              storage_charge_rate)
+                                              storage_charge_rate, step_hours)
     res = postprocess(out_misc, variable_gen, sums_df, fixed_production)
     return res
 
 
+def _net_and_over_demand(demand: np.ndarray, fixed_gen: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    net_demand = (demand - fixed_gen).clip(min=0)
+    fixed_over_demand = (fixed_gen - demand).clip(min=0)
+    return net_demand, fixed_over_demand
+
+
+def nzo_strategy_batch(demand: pd.Series | np.ndarray,
+                       fixed_production: np.ndarray,
+                       storage_capacity_kwh: np.ndarray,
+                       storage_efficiency: np.ndarray,
+                       storage_charge_rate: np.ndarray | float,
+                       step_hours: float = 1.0,
+                       ) -> NzoDispatch:
+    """
+    Run the greedy NZO strategy for many storage configurations in one pass over the hours.
+
+    :param demand: demand of every step in KwH, shared by all scenarios or given per scenario (scenarios x steps).
+    :param fixed_production: (scenarios x steps) total production of fixed sources, in KwH.
+    :param storage_capacity_kwh: battery capacity of every scenario, in KwH.
+    :param storage_efficiency: battery efficiency of every scenario.
+    :param storage_charge_rate: battery charge rate of every scenario, or one for all of them.
+    :param step_hours: the length of a step, in hours, see `nzo_kernel`.
+
+    :return: NzoDispatch with (scenarios x hours) arrays, see `nzo_strategy_sim` for the strategy itself.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    fixed_production = np.atleast_2d(np.asarray(fixed_production, dtype=np.float64))
+    net_demand, fixed_over_demand = _net_and_over_demand(demand, fixed_production)
+
+    return nzo_dispatch_batch(net_demand, fixed_over_demand, storage_capacity_kwh, storage_efficiency,
+                              storage_charge_rate, step_hours)
+
+
+def nzo_strategy_block(demand: np.ndarray,
+                       fixed_production: dict[EnergySource, np.ndarray],
+                       storage_capacity_kwh: np.ndarray,
+                       storage_efficiency: np.ndarray,
+                       storage_charge_rate: np.ndarray | float,
+                       step_hours: float = 1.0,
+                       ) -> np.ndarray:
+    """
+    Run the greedy NZO strategy for independent rows (e.g. years) at once, including the `postprocess`
+    bookkeeping, without building any DataFrames.
+
+    :param demand: (rows x hours) demand, in KwH.
+    :param fixed_production: (rows x hours) production of every fixed source, in KwH.
+    :param storage_capacity_kwh: battery capacity of every row, in KwH.
+    :param storage_efficiency: battery efficiency of every row.
+    :param storage_charge_rate: battery charge rate of every row, or one for all of them.
+    :param step_hours: the length of a step, in hours, see `nzo_kernel`.
+
+    :return: (rows x len(BLOCK_FIELDS) x hours) array, with the same values as `nzo_strategy`'s columns.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    fixed_gen = sum(fixed_production.values())
+    net_demand, fixed_over_demand = _net_and_over_demand(demand, fixed_gen)
+
+    dispatch = nzo_dispatch_batch(net_demand, fixed_over_demand, storage_capacity_kwh, storage_efficiency,
+                                  storage_charge_rate, step_hours)
+
+    curtailed = fixed_over_demand - dispatch.fixed_storage_charge
+
+    # same bookkeeping as `postprocess`, where 0/0 stays nan and x/0 becomes 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fixed_waste_rate = curtailed / fixed_gen
+        fixed_storage_rate = dispatch.fixed_storage_charge / fixed_gen
+    fixed_waste_rate[np.isinf(fixed_waste_rate)] = 0
+    fixed_storage_rate[np.isinf(fixed_storage_rate)] = 0
+    fixed_demand_rate = 1 - fixed_waste_rate - fixed_storage_rate
+
+    rows, hours = demand.shape
+    block = np.zeros((rows, len(BLOCK_FIELDS), hours))
+    columns = {field: block[:, idx] for idx, field in enumerate(BLOCK_FIELDS)}
+
+    columns[SimUsageFields.GAS][:] = dispatch.gas
+    columns[SimUsageFields.STORAGE][:] = dispatch.storage_discharge
+    for source, production in fixed_production.items():
+        columns[source][:] = production * fixed_demand_rate
+    columns[SimOutFields.BATTERY_STATE][:] = dispatch.battery_state
+    columns[SimOutFields.CURTAILED_ENERGY][:] = curtailed
+    columns[SimOutFields.FIXED_STORAGE_CHARGE][:] = dispatch.fixed_storage_charge
+    columns[SimOutFields.DEMAND][:] = demand
+    columns[SimOutFields.NET_DEMAND][:] = net_demand
+
+    return block
+
+
+def nzo_strategy_summary_columns(years: t.Sequence[int],
+                                 demand: np.ndarray,
+                                 fixed_production: dict[EnergySource, np.ndarray],
+                                 storage_capacity_kwh: np.ndarray,
+                                 storage_efficiency: np.ndarray,
+                                 storage_charge_rate: np.ndarray | float,
+                                 step_hours: float = 1.0,
+                                 ) -> SummaryColumns:
+    """
+    Like `nzo_strategy_block`, but only annual totals are kept, as one array per `YearlySummary` field.
+
+    The dispatch totals are accumulated by the kernel while it steps through the hours,
+    so no hourly outputs are materialized.
+
+    :param years: the year of every row.
+    :return: SummaryColumns with one value per row, where the peak gas is converted from KwH per step to KW.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    fixed_gen = sum(fixed_production.values())
+    net_demand, fixed_over_demand = _net_and_over_demand(demand, fixed_gen)
+
+    dispatch = nzo_dispatch_summary(net_demand, fixed_over_demand, storage_capacity_kwh, storage_efficiency,
+                                    storage_charge_rate, step_hours)
+
+    # the proportion of fixed production that went to demand, like `postprocess`' fixed_demand_rate
+    fixed_demand_rate = np.divide(np.minimum(demand, fixed_gen), fixed_gen,
+                                  out=np.zeros_like(demand), where=fixed_gen > 0)
+    used = {source: (production * fixed_demand_rate).sum(axis=1) for source, production in fixed_production.items()}
+    zeros = np.zeros(len(demand))
+
+    return SummaryColumns(
+        year=np.asarray(years, dtype=np.int64),
+        demand_kwh=demand.sum(axis=1),
+        solar_kwh=used.get(EnergySource.SOLAR, zeros),
+        coal_kwh=used.get(EnergySource.COAL, zeros),
+        gas_kwh=dispatch.gas,
+        storage_charge_kwh=dispatch.fixed_storage_charge,
+        storage_discharge_kwh=dispatch.storage_discharge,
+        curtailed_kwh=fixed_over_demand.sum(axis=1) - dispatch.fixed_storage_charge,
+        peak_gas_kw=dispatch.peak_gas / step_hours,
+        peak_gas_hour=(dispatch.peak_gas_hour * step_hours).astype(np.int64),
+    )
+
+
+def nzo_strategy_summary(years: t.Sequence[int],
+                         demand: np.ndarray,
+                         fixed_production: dict[EnergySource, np.ndarray],
+                         storage_capacity_kwh: np.ndarray,
+                         storage_efficiency: np.ndarray,
+                         storage_charge_rate: np.ndarray | float,
+                         step_hours: float = 1.0,
+                         ) -> list[YearlySummary]:
+    """
+    Like `nzo_strategy_summary_columns`, as one small record per row.
+    """
+    return nzo_strategy_summary_columns(years, demand, fixed_production, storage_capacity_kwh, storage_efficiency,
+                                        storage_charge_rate, step_hours).summaries()
+
+
+def nzo_renewable_share(demand: np.ndarray,
+                        fixed_production: dict[EnergySource, np.ndarray],
+                        storage_capacity_kwh: float,
+                        storage_efficiency: float,
+                        storage_charge_rate: float,
+                        step_hours: float = 1.0,
+                        ) -> float:
+    """
+    The `YearlySummary.renewable_share` of a single year, without building the summary.
+
+    Runs the single-scenario kernel, which is the cheapest way to simulate one configuration,
+    so it suits solvers that simulate many configurations one after the other.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    fixed_gen = sum(fixed_production.values())
+    net_demand, fixed_over_demand = _net_and_over_demand(demand, fixed_gen)
+
+    dispatch = nzo_dispatch(net_demand, fixed_over_demand, storage_capacity_kwh, storage_efficiency,
+                            storage_charge_rate, step_hours)
+
+    total_demand = demand.sum()
+    if not total_demand:
+        return 1.0
+
+    fixed_demand_rate = np.divide(np.minimum(demand, fixed_gen), fixed_gen,
+                                  out=np.zeros_like(demand), where=fixed_gen > 0)
+    coal = fixed_production.get(EnergySource.COAL, 0)
+    coal_used = (coal * fixed_demand_rate).sum()
+    return 1 - (dispatch.gas.sum() + coal_used) / total_demand
+
+
 def nzo_strategy_sim(demand: pd.Series,
                      sums_df: pd.DataFrame,
                      storage_capacity_kwh: float,
                      storage_efficiency: float,
                      storage_charge_rate: float,
+                     step_hours: float = 1.0,
                      ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
-    :param demand: A series of demand values, in KwH, for every hour in the year.
+    :param demand: A series of demand values, in KwH, for every step in the year.
     :param storage_capacity_kwh: the battery capacity, in KwH.
+    :param step_hours: the length of a step, in hours (1 for hourly profiles).
 
     :return: pd.DataFrame[EnergySource, float] of variable energy sources, and another dataframe
              of misc values like battery state.
@@ -50,6 +248,8 @@ def nzo_strategy_sim(demand: pd.Series,
     Otherwise:
         Discharge as much as possible, and if that isn't enough, fulfill demand using gas.
 
+    The loop over the steps itself runs in `nzo_kernel.nzo_dispatch`; this function only wraps its arrays in DataFrames.
+
     TODO: If the battery is not full, and we're below the average net demand, charge using gas.
 
     TODO: If we're above the average net demand, discharge according to a ratio that minimizes peak gas usage.
@@ -57,39 +257,24 @@ def nzo_strategy_sim(demand: pd.Series,
           instead of discharging 20MwH on the first hour and then using 20MwH of gas on the next hour.
     """
 
-    battery = Battery(storage_capacity_kwh, 0, storage_charge_rate,
-                      storage_efficiency)
+    dispatch = nzo_dispatch(sums_df["net_demand"].to_numpy(),
+                            sums_df["fixed_over_demand"].to_numpy(),
+                            storage_capacity_kwh,
+                            storage_efficiency,
+                            storage_charge_rate, step_hours)
 
     zero_ndarray = np.zeros(len(sums_df), dtype="float")
-    variable_gen_np = {k: zero_ndarray.copy() for k in VARIABLE_ENERGY_SOURCES}
+    variable_gen_np = {
+        SimUsageFields.GAS: dispatch.gas,
+        SimUsageFields.STORAGE: dispatch.storage_discharge,
+    }
 
     out_np = {k: zero_ndarray.copy() for k in SimOutFields}
     out_np[SimOutFields.DEMAND] = demand.to_numpy()
     out_np[SimOutFields.NET_DEMAND] = sums_df["net_demand"].to_numpy()
-
-    for hour in sums_df.itertuples():
-        hour_index = hour.Index
-        net_demand = hour.net_demand
-
-        if net_demand == 0:
-            fixed_over_demand = hour.fixed_over_demand
-            assert fixed_over_demand >= 0
-
-            storage_fixed_charge = battery.try_charge(fixed_over_demand)
-            assert storage_fixed_charge >= 0
-
-            # TODO: this needs to be split among fixed energy sources, for when we integrate wind
-            out_np[SimOutFields.FIXED_STORAGE_CHARGE][hour_index] = storage_fixed_charge
-        else:
-            storage_discharge = battery.try_discharge(net_demand)
-            variable_gen_np[SimUsageFields.STORAGE][hour_index] = storage_discharge
-
-            net_after_storage = net_demand - storage_discharge
-
-            if net_after_storage != 0:
-                variable_gen_np[SimUsageFields.GAS][hour_index] = net_after_storage
-
-        out_np[SimOutFields.BATTERY_STATE][hour_index] = battery.get_energy_kwh()
+    # TODO: this needs to be split among fixed energy sources, for when we integrate wind
+    out_np[SimOutFields.FIXED_STORAGE_CHARGE] = dispatch.fixed_storage_charge
+    out_np[SimOutFields.BATTERY_STATE] = dispatch.battery_state
 
     out = pd.DataFrame(out_np)
     variable_gen = pd.DataFrame(variable_gen_np)
@@ -0,0 +1,262 @@
+"""
+Array-native dispatch kernels for the greedy NZO strategy.
+
+The kernels operate on plain float64 arrays and write into preallocated output arrays.
+They follow the exact semantics of ``Battery.try_charge`` and ``Battery.try_discharge``,
+without creating any per-step Python objects or touching pandas.
+
+``nzo_dispatch`` simulates a single storage configuration, while ``nzo_dispatch_batch`` steps many
+configurations forward together, vectorized over the scenario axis.
+``nzo_dispatch_summary`` steps like ``nzo_dispatch_batch``, but only accumulates annual totals.
+
+The kernels step through the year in steps of ``step_hours`` hours (one hour by default), so sub-hourly
+profiles are simulated with the same code: all the energies are per step, and only the battery charge rate,
+which is given per hour, is scaled to the length of a step.
+"""
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+__all__ = [
+    "NzoDispatch",
+    "nzo_dispatch",
+    "nzo_dispatch_batch",
+    "NzoDispatchSummary",
+    "nzo_dispatch_summary",
+]
+
+
+@dataclass
+class NzoDispatch:
+    """
+    The raw output of a dispatch kernel, with one value per step (or per scenario and step).
+    """
+
+    fixed_storage_charge: np.ndarray
+    storage_discharge: np.ndarray
+    gas: np.ndarray
+    battery_state: np.ndarray
+
+    @classmethod
+    def zeros(cls, shape: int | tuple[int, ...]) -> "NzoDispatch":
+        return cls(*(np.zeros(shape, dtype=np.float64) for _ in fields(cls)))
+
+
+@dataclass
+class NzoDispatchSummary:
+    """
+    Totals of a dispatch kernel over all steps, with one value per scenario.
+    The peak gas is the highest gas energy of a single step, and the peak gas hour is the index of that step.
+    """
+
+    fixed_storage_charge: np.ndarray
+    storage_discharge: np.ndarray
+    gas: np.ndarray
+    peak_gas: np.ndarray
+    peak_gas_hour: np.ndarray
+
+
+def nzo_dispatch(net_demand: np.ndarray,
+                 fixed_over_demand: np.ndarray,
+                 storage_capacity_kwh: float,
+                 storage_efficiency: float,
+                 storage_charge_rate: float,
+                 step_hours: float = 1.0,
+                 ) -> NzoDispatch:
+    """
+    Dispatch storage and gas for every step, starting with an empty battery.
+
+    :param net_demand: demand not covered by fixed sources, in KwH, for every step (>= 0).
+    :param fixed_over_demand: fixed production exceeding demand, in KwH, for every step (>= 0).
+    :param storage_capacity_kwh: the battery capacity, in KwH.
+    :param storage_efficiency: the proportion of charged energy that ends up stored.
+    :param storage_charge_rate: the proportion of the capacity that can be (dis)charged every hour.
+    :param step_hours: the length of a step, in hours.
+
+    :return: NzoDispatch with preallocated arrays of the same length as net_demand.
+    """
+    net_demand = np.ascontiguousarray(net_demand, dtype=np.float64)
+    fixed_over_demand = np.ascontiguousarray(fixed_over_demand, dtype=np.float64)
+    assert net_demand.shape == fixed_over_demand.shape and net_demand.ndim == 1
+
+    out = NzoDispatch.zeros(len(net_demand))
+
+    # item assignment through a memoryview is considerably cheaper than through the ndarray
+    charge_out = memoryview(out.fixed_storage_charge)
+    discharge_out = memoryview(out.storage_discharge)
+    gas_out = memoryview(out.gas)
+    state_out = memoryview(out.battery_state)
+
+    capacity = float(storage_capacity_kwh)
+    efficiency = float(storage_efficiency)
+    max_rate = capacity * float(storage_charge_rate) * float(step_hours)
+    energy = 0.0
+
+    for step, (net, over) in enumerate(zip(net_demand.tolist(), fixed_over_demand.tolist())):
+        if net == 0:
+            # Battery.try_charge
+            if energy != capacity:
+                charge = min((capacity - energy) / efficiency, max_rate, over)
+                energy += charge * efficiency
+                charge_out[step] = charge
+        else:
+            # Battery.try_discharge
+            if energy:
+                discharge = min(net, energy, max_rate)
+                energy -= discharge
+                discharge_out[step] = discharge
+                net -= discharge
+
+            if net != 0:
+                gas_out[step] = net
+
+        state_out[step] = energy
+
+    return out
+
+
+def _nzo_batch_steps(net_demand_t: np.ndarray,
+                     fixed_over_demand_t: np.ndarray,
+                     capacity: np.ndarray,
+                     efficiency: np.ndarray,
+                     max_rate: np.ndarray,
+                     ):
+    """
+    Step all scenarios forward together, one step at a time.
+
+    Yields (step, charge, discharge, gas, energy) where each array has one value per scenario.
+    The yielded arrays are work buffers which are overwritten on the next step.
+    """
+    scenarios = len(capacity)
+
+    energy = np.zeros(scenarios)
+    charge = np.empty(scenarios)
+    discharge = np.empty(scenarios)
+    gas = np.empty(scenarios)
+    stored = np.empty(scenarios)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for step, (net, over) in enumerate(zip(net_demand_t, fixed_over_demand_t)):
+            # Battery.try_charge, only where there is no net demand and the battery isn't full
+            np.subtract(capacity, energy, out=charge)
+            np.divide(charge, efficiency, out=charge)
+            np.minimum(charge, max_rate, out=charge)
+            np.minimum(charge, over, out=charge)
+            np.copyto(charge, 0.0, where=(net != 0) | (energy == capacity))
+
+            # Battery.try_discharge, which is a no-op where there is no net demand or the battery is empty
+            np.minimum(net, energy, out=discharge)
+            np.minimum(discharge, max_rate, out=discharge)
+
+            np.multiply(charge, efficiency, out=stored)
+            energy += stored
+            energy -= discharge
+
+            np.subtract(net, discharge, out=gas)
+
+            yield step, charge, discharge, gas, energy
+
+
+def _scenario_vector(values, scenarios: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (scenarios,))
+
+
+def nzo_dispatch_batch(net_demand: np.ndarray,
+                       fixed_over_demand: np.ndarray,
+                       storage_capacity_kwh: np.ndarray,
+                       storage_efficiency: np.ndarray,
+                       storage_charge_rate: np.ndarray | float,
+                       step_hours: float = 1.0,
+                       ) -> NzoDispatch:
+    """
+    Dispatch storage and gas for many storage configurations at once, each starting with an empty battery.
+
+    A single Python-level pass over the steps serves every scenario, and the results are identical
+    to calling `nzo_dispatch` for every scenario separately.
+
+    :param net_demand: (scenarios x steps) demand not covered by fixed sources, in KwH.
+    :param fixed_over_demand: (scenarios x steps) fixed production exceeding demand, in KwH.
+    :param storage_capacity_kwh: battery capacity of every scenario, in KwH.
+    :param storage_efficiency: battery efficiency of every scenario.
+    :param storage_charge_rate: battery charge rate of every scenario, or one for all of them.
+    :param step_hours: the length of a step, in hours.
+
+    :return: NzoDispatch with (scenarios x steps) arrays.
+    """
+    net_demand = np.asarray(net_demand, dtype=np.float64)
+    fixed_over_demand = np.asarray(fixed_over_demand, dtype=np.float64)
+    assert net_demand.shape == fixed_over_demand.shape and net_demand.ndim == 2
+    scenarios, hours = net_demand.shape
+
+    capacity = _scenario_vector(storage_capacity_kwh, scenarios)
+    efficiency = _scenario_vector(storage_efficiency, scenarios)
+    max_rate = capacity * _scenario_vector(storage_charge_rate, scenarios) * float(step_hours)
+
+    # step-major layout, so that every step reads and writes contiguous rows
+    out = NzoDispatch.zeros((hours, scenarios))
+    steps = _nzo_batch_steps(
+        np.ascontiguousarray(net_demand.T),
+        np.ascontiguousarray(fixed_over_demand.T),
+        capacity,
+        efficiency,
+        max_rate,
+    )
+
+    for step, charge, discharge, gas, energy in steps:
+        out.fixed_storage_charge[step] = charge
+        out.storage_discharge[step] = discharge
+        out.gas[step] = gas
+        out.battery_state[step] = energy
+
+    return NzoDispatch(*(getattr(out, field.name).T for field in fields(out)))
+
+
+def nzo_dispatch_summary(net_demand: np.ndarray,
+                         fixed_over_demand: np.ndarray,
+                         storage_capacity_kwh: np.ndarray,
+                         storage_efficiency: np.ndarray,
+                         storage_charge_rate: np.ndarray | float,
+                         step_hours: float = 1.0,
+                         ) -> NzoDispatchSummary:
+    """
+    Like `nzo_dispatch_batch`, but only the totals are accumulated while stepping,
+    so no (scenarios x steps) outputs are allocated.
+
+    :return: NzoDispatchSummary with one value per scenario.
+    """
+    net_demand = np.asarray(net_demand, dtype=np.float64)
+    fixed_over_demand = np.asarray(fixed_over_demand, dtype=np.float64)
+    assert net_demand.shape == fixed_over_demand.shape and net_demand.ndim == 2
+    scenarios, hours = net_demand.shape
+
+    capacity = _scenario_vector(storage_capacity_kwh, scenarios)
+    efficiency = _scenario_vector(storage_efficiency, scenarios)
+    max_rate = capacity * _scenario_vector(storage_charge_rate, scenarios) * float(step_hours)
+
+    out = NzoDispatchSummary(
+        fixed_storage_charge=np.zeros(scenarios),
+        storage_discharge=np.zeros(scenarios),
+        gas=np.zeros(scenarios),
+        peak_gas=np.zeros(scenarios),
+        peak_gas_hour=np.zeros(scenarios, dtype=np.int64),
+    )
+    new_peak = np.empty(scenarios, dtype=bool)
+
+    steps = _nzo_batch_steps(
+        np.ascontiguousarray(net_demand.T),
+        np.ascontiguousarray(fixed_over_demand.T),
+        capacity,
+        efficiency,
+        max_rate,
+    )
+
+    for step, charge, discharge, gas, _energy in steps:
+        out.fixed_storage_charge += charge
+        out.storage_discharge += discharge
+        out.gas += gas
+
+        np.greater(gas, out.peak_gas, out=new_peak)
+        np.copyto(out.peak_gas, gas, where=new_peak)
+        np.copyto(out.peak_gas_hour, step, where=new_peak)
+
+    return out
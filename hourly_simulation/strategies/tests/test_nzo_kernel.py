@@ -0,0 +1,97 @@
+import numpy as np
+
+from ..battery import Battery
+from ..nzo_kernel import nzo_dispatch, nzo_dispatch_batch
+
+STORAGE_EFFICIENCY = 0.87
+STORAGE_CHARGE_RATE = 0.25
+HOURS = 24 * 14
+
+
+def battery_dispatch(net_demand, fixed_over_demand, capacity, efficiency, charge_rate):
+    """
+    The original per-hour Battery loop, used as a reference.
+    """
+    battery = Battery(capacity, 0, charge_rate, efficiency)
+    charge, discharge, gas, state = (np.zeros(len(net_demand)) for _ in range(4))
+
+    for hour, (net, over) in enumerate(zip(net_demand, fixed_over_demand)):
+        if net == 0:
+            charge[hour] = battery.try_charge(over)
+        else:
+            discharge[hour] = battery.try_discharge(net)
+            gas[hour] = net - discharge[hour]
+        state[hour] = battery.get_energy_kwh()
+
+    return charge, discharge, gas, state
+
+
+def random_profile(seed):
+    rng = np.random.default_rng(seed)
+    demand = rng.uniform(5, 15, HOURS)
+    fixed = rng.uniform(0, 25, HOURS) * (np.arange(HOURS) % 24 > 7)
+    net_demand = (demand - fixed).clip(min=0)
+    fixed_over_demand = (fixed - demand).clip(min=0)
+    return net_demand, fixed_over_demand
+
+
+def test_nzo_dispatch_matches_battery():
+    for seed, capacity in enumerate((0, 5, 50, 500)):
+        net_demand, fixed_over_demand = random_profile(seed)
+
+        out = nzo_dispatch(net_demand, fixed_over_demand, capacity, STORAGE_EFFICIENCY, STORAGE_CHARGE_RATE)
+        expected = battery_dispatch(net_demand, fixed_over_demand, capacity, STORAGE_EFFICIENCY,
+                                    STORAGE_CHARGE_RATE)
+
+        np.testing.assert_array_equal(out.fixed_storage_charge, expected[0])
+        np.testing.assert_array_equal(out.storage_discharge, expected[1])
+        np.testing.assert_array_equal(out.gas, expected[2])
+        np.testing.assert_array_equal(out.battery_state, expected[3])
+
+
+def test_nzo_dispatch_energy_balance():
+    net_demand, fixed_over_demand = random_profile(42)
+    out = nzo_dispatch(net_demand, fixed_over_demand, 50, STORAGE_EFFICIENCY, STORAGE_CHARGE_RATE)
+
+    np.testing.assert_allclose(out.storage_discharge + out.gas, net_demand)
+    assert (out.fixed_storage_charge <= fixed_over_demand).all()
+    assert (out.battery_state <= 50).all() and (out.battery_state >= 0).all()
+
+
+def test_nzo_dispatch_batch_matches_single():
+    net_demand, fixed_over_demand = zip(*(random_profile(seed) for seed in range(6)))
+    capacities = np.array([0, 5, 50, 500, 50, 20])
+    efficiencies = np.array([0.87, 0.87, 0.9, 0.95, 0.5, 1])
+    charge_rates = np.array([0.25, 0.25, 0.25, 0.5, 1, 0.1])
+
+    out = nzo_dispatch_batch(np.array(net_demand), np.array(fixed_over_demand), capacities, efficiencies,
+                             charge_rates)
+
+    for idx in range(len(capacities)):
+        expected = nzo_dispatch(net_demand[idx], fixed_over_demand[idx], capacities[idx], efficiencies[idx],
+                                charge_rates[idx])
+        np.testing.assert_array_equal(out.fixed_storage_charge[idx], expected.fixed_storage_charge)
+        np.testing.assert_array_equal(out.storage_discharge[idx], expected.storage_discharge)
+        np.testing.assert_array_equal(out.gas[idx], expected.gas)
+        np.testing.assert_array_equal(out.battery_state[idx], expected.battery_state)
+
+
+def test_nzo_dispatch_sub_hourly_steps():
+    step_hours = 0.25
+    for seed, capacity in enumerate((5, 50)):
+        net_demand, fixed_over_demand = random_profile(seed)
+
+        out = nzo_dispatch(net_demand, fixed_over_demand, capacity, STORAGE_EFFICIENCY, STORAGE_CHARGE_RATE,
+                           step_hours)
+        batch = nzo_dispatch_batch(net_demand[np.newaxis], fixed_over_demand[np.newaxis], [capacity],
+                                   [STORAGE_EFFICIENCY], STORAGE_CHARGE_RATE, step_hours)
+
+        battery = Battery(capacity, 0, STORAGE_CHARGE_RATE, STORAGE_EFFICIENCY, step_hours)
+        for step, (net, over) in enumerate(zip(net_demand, fixed_over_demand)):
+            if net == 0:
+                assert out.fixed_storage_charge[step] == battery.try_charge(over)
+            else:
+                assert out.storage_discharge[step] == battery.try_discharge(net)
+        # the charge rate is per hour, so a step only moves a quarter of it
+        assert out.fixed_storage_charge.max() <= capacity * STORAGE_CHARGE_RATE * step_hours
+        np.testing.assert_array_equal(batch.battery_state[0], out.battery_state)
@@ -1,6 +1,9 @@
-from ..nzo_greedy_strategy import nzo_strategy
+from dataclasses import astuple
+
+from ..nzo_greedy_strategy import nzo_strategy, nzo_strategy_batch, nzo_strategy_summary
+import numpy as np
 import pandas as pd
-from common import EnergySource
+from common import EnergySource, SimOutFields
 
 
 STORAGE_EFFICIENCY = 0.87
@@ -14,3 +17,39 @@ def test_nzo_strategy():
     solar_prod = pd.Series([0, 0, 0, 0, 0, 2, 5, 9, 17, 19, 15, 10, 7, 5, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 5, 9, 17, 19, 15, 10, 7, 5, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0])
     fixed_prod = pd.DataFrame({EnergySource.SOLAR: solar_prod})
     out = nzo_strategy(demand, fixed_prod, storage_capacity_kwh, STORAGE_EFFICIENCY, STORAGE_CHARGE_RATE)
+
+
+def test_nzo_strategy_batch():
+    demand = pd.Series([1, 2, 2.5, 3, 4, 5, 7, 9, 11, 12, 12, 11, 9, 9, 9, 7, 6, 5, 4, 3, 2, 2, 2, 1])
+    solar_prod = pd.Series([0, 0, 0, 0, 0, 2, 5, 9, 17, 19, 15, 10, 7, 5, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0])
+    capacities = np.array([0, 5, 10])
+    solar_scales = np.array([0.5, 1, 2])
+
+    batch = nzo_strategy_batch(demand, np.outer(solar_scales, solar_prod), capacities, STORAGE_EFFICIENCY,
+                               STORAGE_CHARGE_RATE)
+
+    for idx, (capacity, scale) in enumerate(zip(capacities, solar_scales)):
+        fixed_prod = pd.DataFrame({EnergySource.SOLAR: solar_prod * scale})
+        out = nzo_strategy(demand, fixed_prod, capacity, STORAGE_EFFICIENCY, STORAGE_CHARGE_RATE)
+        np.testing.assert_array_equal(batch.gas[idx], out[EnergySource.GAS])
+        np.testing.assert_array_equal(batch.storage_discharge[idx], out[EnergySource.STORAGE])
+        np.testing.assert_array_equal(batch.battery_state[idx], out[SimOutFields.BATTERY_STATE])
+
+
+def test_nzo_strategy_summary_sub_hourly():
+    demand = np.array([[1, 2, 2.5, 3, 4, 5, 7, 9, 11, 12, 12, 11, 9, 9, 9, 7, 6, 5, 4, 3, 2, 2, 2, 1]])
+    solar_prod = np.array([[0, 0, 0, 0, 0, 2, 5, 9, 17, 19, 15, 10, 7, 5, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0]])
+    steps_per_hour = 4
+
+    # the charge rate limits the storage at noon
+    storage_capacity = [20]
+
+    hourly, = nzo_strategy_summary([2020], demand, {EnergySource.SOLAR: solar_prod}, storage_capacity,
+                                   [STORAGE_EFFICIENCY], STORAGE_CHARGE_RATE)
+    # the same day in 15 minute steps, where the energy of every hour is split between its steps
+    split, = nzo_strategy_summary([2020], np.repeat(demand, steps_per_hour, axis=1) / steps_per_hour,
+                                  {EnergySource.SOLAR: np.repeat(solar_prod, steps_per_hour, axis=1) / steps_per_hour},
+                                  storage_capacity, [STORAGE_EFFICIENCY], STORAGE_CHARGE_RATE, 1 / steps_per_hour)
+
+    assert hourly.storage_discharge_kwh > 0
+    np.testing.assert_allclose(astuple(split), astuple(hourly))
@@ -1,4 +1,7 @@
-from ..costs import calculate_costs, YearlySimulationProductionResults, npv
+import numpy as np
+
+from ..costs import calculate_costs, calculate_cost_arrays, calculate_costs_batch, capacity_matrix, CostTables, \
+    YearlySimulationProductionResults, npv
 from common import EnergySource
 from params import AllParams
 from data.defaults import DEFAULT_PARAMS
@@ -28,3 +31,44 @@ def test_get_costs():
 
         diff = abs(calculated_npv - result_npv)
         assert diff < EPSILON
+
+
+def test_cost_arrays_match_costs():
+    yearly_capacities = [
+        YearlySimulationProductionResults(100, 100, 10, 100, 100, 95, 100),
+        YearlySimulationProductionResults(90, 120, 25, 100, 100, 65, 100),
+        YearlySimulationProductionResults(80, 140, 45, 100, 150, 55, 100),
+        YearlySimulationProductionResults(70, 160, 60, 90, 200, 45, 80),
+    ]
+
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = params.general.start_year + len(yearly_capacities)
+
+    year_costs, year_npvs = calculate_costs(yearly_capacities, params)
+    arrays = calculate_cost_arrays(yearly_capacities, params)
+
+    for year_idx in range(1, len(yearly_capacities)):
+        for source_idx, source in enumerate(EnergySource):
+            assert abs(arrays.capex[year_idx, source_idx] - year_costs[year_idx][source].capex) < EPSILON
+            assert abs(arrays.opex[year_idx, source_idx] - year_costs[year_idx][source].opex) < EPSILON
+            assert abs(arrays.npv[year_idx, source_idx] - year_npvs[year_idx][source]) < EPSILON
+        assert abs(arrays.externalities[year_idx] - year_costs[year_idx]["externalities"]) < EPSILON
+
+
+def test_costs_batch_matches_single():
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = params.general.start_year + 3
+    tables = CostTables.from_params(params)
+
+    scenarios = [
+        [YearlySimulationProductionResults(100 + i, 100, 10, 100, 100 * i, 95, 100) for i in range(3)],
+        [YearlySimulationProductionResults(90, 120 * i, 25, 100, 100, 65 - i, 100) for i in range(3)],
+    ]
+    capacities, emitting_used = zip(*(capacity_matrix(scenario) for scenario in scenarios))
+    batch = calculate_costs_batch(np.array(capacities), np.array(emitting_used), tables)
+
+    for idx, scenario in enumerate(scenarios):
+        single = calculate_cost_arrays(scenario, params)
+        np.testing.assert_allclose(batch.npv[idx], single.npv)
+        np.testing.assert_allclose(batch.externalities_npv[idx], single.externalities_npv)
+        assert abs(batch.total_npv[idx] - single.total_npv) < EPSILON
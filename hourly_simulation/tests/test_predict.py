@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
-from ..predict import predict_demand
+import pytest
+
+from .. import predict
+from ..predict import SolarProfile, demand_projection, effective_solar_capacity, predict_demand, \
+    predict_demand_matrix
 from common import DemandSeries
 
 growth_per_year = 1.03
@@ -28,4 +33,89 @@ def test_predict_demand_multiple():
     assert predicted2.series[1] == target2
 
 
+def test_predict_demand_matrix():
+    series = pd.Series([1236.0, 1215.5, 1300.25])
+    demand = DemandSeries(2021, series)
+    years = np.arange(2021, 2031)
+    matrix = predict_demand_matrix(demand, growth_per_year, years)
+
+    for year, row in zip(years, matrix):
+        np.testing.assert_array_equal(row, predict_demand(demand, growth_per_year, year).series)
+
+
+def test_demand_projection():
+    series = pd.Series([1236.0, 1215.5, 1300.25])
+    demand = DemandSeries(2021, series)
+    projection = demand_projection(demand, growth_per_year, 2021, 2031)
+
+    np.testing.assert_array_equal(projection, predict_demand_matrix(demand, growth_per_year, np.arange(2021, 2031)))
+    assert not projection.flags.writeable and not projection[0].flags.writeable
+    # the same values give the same cached projection
+    assert demand_projection(DemandSeries(2021, series.copy()), growth_per_year, 2021, 2031) is projection
+    assert demand_projection(demand, growth_per_year, 2021, 2030) is not projection
+    # the base profile isn't modified
+    predict_demand(demand, growth_per_year, 2030)
+    assert series[1] == 1215.5
+
+
+def test_demand_projection_hashes_series_once(monkeypatch):
+    hashed = []
+    fingerprint_arrays = predict.fingerprint_arrays
+
+    def counted(*arrays):
+        hashed.append(arrays)
+        return fingerprint_arrays(*arrays)
+
+    monkeypatch.setattr(predict, "fingerprint_arrays", counted)
+    demand = DemandSeries(2021, pd.Series([1236.0, 1215.5, 1300.25]))
+
+    for year in range(2021, 2031):
+        demand_projection(demand, growth_per_year, 2021, year + 1)
+    assert len(hashed) == 1
+
+
+def test_solar_profile():
+    profile = SolarProfile.from_ratio(pd.Series([0, 0.5, 1]))
+    production = profile.production(np.array([[10.0, 20.0]]))
+    assert production.shape == (1, 2, 3)
+    np.testing.assert_array_equal(production[0, 1], [0, 10, 20])
+    assert not profile.ratio.flags.writeable
+
+    with pytest.raises(AssertionError):
+        SolarProfile.from_ratio(pd.Series([0, 1.5]))
+
+
+def test_effective_solar_capacity():
+    degradation_rate = 0.1
+    capacity = np.array([[100.0, 100.0, 300.0, 300.0], [0.0, 50.0, 50.0, 150.0], [100.0, 200.0, 150.0, 0.0]])
+
+    # track the cohorts year by year, removing the oldest capacity first
+    expected = np.zeros_like(capacity)
+    for row in range(len(capacity)):
+        cohorts = []
+        built = 0
+        for year, year_capacity in enumerate(capacity[row]):
+            cohorts = [[nominal, working * (1 - degradation_rate)] for nominal, working in cohorts]
+            if year_capacity > built:
+                cohorts.append([year_capacity - built, year_capacity - built])
+            removed = max(built - year_capacity, 0)
+            for cohort in cohorts:
+                taken = min(removed, cohort[0])
+                cohort[1] *= (cohort[0] - taken) / cohort[0]
+                cohort[0] -= taken
+                removed -= taken
+            cohorts = [cohort for cohort in cohorts if cohort[0] > 0]
+            built = year_capacity
+            expected[row, year] = sum(working for _, working in cohorts)
+
+    np.testing.assert_allclose(effective_solar_capacity(capacity, degradation_rate), expected)
+    np.testing.assert_allclose(effective_solar_capacity(capacity[0], degradation_rate), expected[0])
+    assert effective_solar_capacity(capacity, 0) is capacity
+
+
+def test_effective_solar_capacity_is_never_negative():
+    np.testing.assert_allclose(effective_solar_capacity(np.array([100.0, 100.0, 0.0]), 0.5), [100, 50, 0])
+    np.testing.assert_allclose(effective_solar_capacity(np.array([100.0, 200.0, 100.0]), 0.5), [100, 150, 50])
+
+
 # TODO: add tests for solar production
@@ -1,4 +1,5 @@
 import math
+import os
 import typing as t
 
 import datetime
@@ -14,9 +15,10 @@ from dash_models import Page
 from dash_models.utils import comp_id
 from pages.graph_utils import month_marks, year_marks
 
+from params.params import MINUTES_PER_DAY
 from params.roadmap import Roadmap, RoadmapParam
 from common import EnergySource, SimOutFields, SimUsageFields
-from scenario_evaluator.run_scenarios import run_scenario
+from scenario_evaluator.store import ResultStore, StoredResult
 import functools
 
 if t.TYPE_CHECKING:
@@ -24,17 +26,34 @@ if t.TYPE_CHECKING:
     from params import AllParams
     from dash import Dash
 
-sim_results: list[pd.DataFrame] | None = None
+# simulated scenarios are kept here, so they are not simulated again when the app restarts
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
+# every edit of the params stores a new scenario, only the most recent ones are kept
+MAX_STORED_RESULTS = 16
 SPAN = "</span>"
 BR = "<br>"
 ONLY_SOLAR = "onlysolar"
 TICK_STEP = 20000
 DAYS_IN_YEAR = 365
 
-theta = [f"{n}:00" for n in range(24)]
-no_fill_theta = list(theta)
-no_fill_theta.append(theta[0])
-width = [1] * 24
+HOURS_IN_DAY = 24
+
+
+@functools.cache
+def day_theta(steps_per_day: int) -> list[str]:
+    """
+    The labels of the steps of a day, like "13:45".
+    """
+    step_minutes = MINUTES_PER_DAY // steps_per_day
+    return [f"{minute // 60}:{minute % 60:02d}" for minute in range(0, MINUTES_PER_DAY, step_minutes)]
+
+
+def day_power(df: pd.DataFrame, name: str, day: int, steps_per_day: int) -> pd.Series:
+    """
+    The power of a field in every step of a day, in KW, from its energy in every step.
+    """
+    r = df[name][(day * steps_per_day): (day + 1) * steps_per_day]
+    return r * (steps_per_day / HOURS_IN_DAY)
 
 
 @dataclass
@@ -44,27 +63,30 @@ class BarField:
     color: str
 
 
-def polar_bar(df: pd.DataFrame, day: int, field: BarField):
-    r = df[field.name][(day * 24): (day + 1) * 24]
+def polar_bar(df: pd.DataFrame, day: int, field: BarField, steps_per_day: int):
+    r = day_power(df, field.name, day, steps_per_day)
     return go.Barpolar(
         name=field.label,
         r=r,
-        theta=theta,
-        width=width,
+        theta=day_theta(steps_per_day),
+        width=[1] * steps_per_day,
         marker_color=field.color,
         hovertemplate="<i>%{theta} : %{r:,.0f} KW</i>",
     )
 
 
-def polar_scatter(df: pd.DataFrame, day: int, name: str, label: str, color: str, fill=True, dash=False):
-    r = df[name][(day * 24): (day + 1) * 24]
+def polar_scatter(df: pd.DataFrame, day: int, name: str, label: str, color: str, steps_per_day: int, fill=True,
+                  dash=False):
+    r = day_power(df, name, day, steps_per_day)
+    theta = day_theta(steps_per_day)
     if not fill:  # if fill is false then add another point to close the loop
         r = list(r)
         r.append(r[0])
+        theta = theta + theta[:1]
     return go.Scatterpolar(
         name=label,
         r=r,
-        theta=theta if fill else no_fill_theta,
+        theta=theta,
         fillcolor=color,
         fill="toself" if fill else "none",
         marker=dict(color=color),
@@ -106,15 +128,15 @@ def annotation(df: pd.DataFrame, year: int, day_of_year: int):
     )
 
 
-def barplot(df: pd.DataFrame, fields: list[BarField], year: int, day_of_year: int):
+def barplot(df: pd.DataFrame, fields: list[BarField], year: int, day_of_year: int, steps_per_day: int):
     f = go.Figure()
 
     for field in fields:
-        f.add_trace(polar_bar(df, day_of_year, field))
+        f.add_trace(polar_bar(df, day_of_year, field, steps_per_day))
 
-    f.add_trace(polar_scatter(df, day_of_year, SimOutFields.DEMAND, "Demand", "red", False))
+    f.add_trace(polar_scatter(df, day_of_year, SimOutFields.DEMAND, "Demand", "red", steps_per_day, False))
     f.add_trace(
-        polar_scatter(df, day_of_year, SimOutFields.NET_DEMAND, "Net Demand", "purple", False, True)
+        polar_scatter(df, day_of_year, SimOutFields.NET_DEMAND, "Net Demand", "purple", steps_per_day, False, True)
     )
     f.add_annotation(
         xref="paper",
@@ -128,7 +150,7 @@ def barplot(df: pd.DataFrame, fields: list[BarField], year: int, day_of_year: in
     return f
 
 
-def plot(df: pd.DataFrame, year: int, day_of_year: int):
+def plot(df: pd.DataFrame, year: int, day_of_year: int, steps_per_day: int = HOURS_IN_DAY):
     fields = [
         BarField(SimUsageFields.COAL, "Coal", "black"),
         BarField(SimUsageFields.GAS, "Gas", "lightgray"),
@@ -140,13 +162,13 @@ def plot(df: pd.DataFrame, year: int, day_of_year: int):
         BarField(SimOutFields.CURTAILED_ENERGY, "Curtailed Energy", "yellow"),
     ]
 
-    bars_sum = sum((df[field.name] for field in fields))
+    bars_sum = sum((df[field.name] for field in fields)) * (steps_per_day / HOURS_IN_DAY)
 
     max_tick = math.ceil(bars_sum.max() / TICK_STEP) * TICK_STEP
 
     tickvals = list(np.arange(0, max_tick, TICK_STEP))
 
-    f = barplot(df, fields, year, day_of_year)
+    f = barplot(df, fields, year, day_of_year, steps_per_day)
     f.update_layout(
         height=800,
         polar=dict(
@@ -182,7 +204,7 @@ def heatmap(df: pd.DataFrame, name: str, pallette):
     return f
 
 
-def calculate_daily_usage_data(params: "AllParams") -> list[pd.DataFrame]:
+def calculate_daily_usage_data(params: "AllParams", store: ResultStore) -> StoredResult:
     r = Roadmap(
         start_year=params.general.start_year,
         end_year=params.general.end_year,
@@ -202,14 +224,18 @@ def calculate_daily_usage_data(params: "AllParams") -> list[pd.DataFrame]:
         storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
     )
 
-    scenario = next(r.scenarios)
-    res = run_scenario(scenario, params)
+    scenario = r.scenarios[0]
+    return store.get_or_run(scenario, params)
 
-    for i, df in enumerate(res):
-        date_nums = (df.index.to_series() // 24)
-        df["date"] = date_nums.apply(str)
 
-    return res
+def daily_usage_frame(sim_result: StoredResult, year: int, steps_per_day: int = HOURS_IN_DAY) -> pd.DataFrame:
+    """
+    Read a single year of the stored result, without loading the other years.
+    """
+    df = sim_result.year_frame(year)
+    date_nums = (df.index.to_series() // steps_per_day)
+    df["date"] = date_nums.apply(str)
+    return df
 
 
 def daily_page(app: "Dash", params: "AllParams") -> Page:
@@ -218,6 +244,10 @@ def daily_page(app: "Dash", params: "AllParams") -> Page:
     year_slider = comp_id("year_slider")
     day_slider = comp_id("dy_slider")
     heat_maps = comp_id("heat_maps")
+    store = ResultStore(RESULTS_DIR, max_scenarios=MAX_STORED_RESULTS)
+    # the result of the last applied params, and the steps per day it was simulated with
+    sim_result: StoredResult | None = None
+    steps_per_day = HOURS_IN_DAY
 
     @app.callback(
         Output(plot_div_id, "figure"),
@@ -228,13 +258,14 @@ def daily_page(app: "Dash", params: "AllParams") -> Page:
         prevent_initial_call=True,
     )
     def calc(_n_clicks: int, year: int, day_of_year: int):
-        global sim_results
+        nonlocal sim_result, steps_per_day
 
-        if ctx.triggered_id == update_btn:
-            sim_results = calculate_daily_usage_data(params)
+        # the sliders only browse the last result, edits are applied by the update button
+        if ctx.triggered_id == update_btn or sim_result is None:
+            sim_result = calculate_daily_usage_data(params, store)
+            steps_per_day = params.general.steps_per_day
 
-        year_idx = year - params.general.start_year
-        df = sim_results[year_idx]
+        df = daily_usage_frame(sim_result, year, steps_per_day)
 
         # TODO: add solar usage from appropriate df when available
         df[ONLY_SOLAR] = (
@@ -242,7 +273,7 @@ def daily_page(app: "Dash", params: "AllParams") -> Page:
                 + df[EnergySource.STORAGE]
         )
 
-        polar_plot = plot(df, year, day_of_year)
+        polar_plot = plot(df, year, day_of_year, steps_per_day)
 
         demand_title = html.H5("Energy Demand", style={"textAlign": "center"})
         demand_heatmap = dcc.Graph(
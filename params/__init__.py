@@ -1 +1,2 @@
 from .params import AllParams
+from .compiled import CompiledParams, as_compiled
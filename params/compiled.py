@@ -0,0 +1,138 @@
+"""
+----
+
+Compiled parameters
+===================
+
+``CompiledParams``
+------------------
+
+A frozen, picklable snapshot of ``AllParams``, created with ``AllParams.compile()``.
+
+All values are plain scalars and read-only NumPy arrays indexed by year, energy source and
+emission type, so the simulation and cost engines can use them without any pydantic overhead.
+It is cheap to send to worker processes and safe to share across threads.
+
+----
+"""
+
+import typing as t
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from common import EmissionType, EnergySource, POLLUTING_ENERGY_SOURCES, fingerprint_arrays
+
+if t.TYPE_CHECKING:
+    from .params import AllParams
+
+__all__ = "CompiledParams", "as_compiled", "SOURCES", "EMISSION_TYPES"
+
+# the order of the sources axis in all compiled arrays
+SOURCES = tuple(EnergySource)
+# the order of the emission types axis in all compiled arrays
+EMISSION_TYPES = tuple(EmissionType)
+
+
+@dataclass(frozen=True)
+class CompiledParams:
+    start_year: int
+    end_year: int
+
+    wacc_rate: float
+    interest_rate: float
+    demand_growth_rate: float
+    charge_rate: float
+    pv_degradation_rate: float
+    # the length of a simulation step, see `GeneralParams.step_minutes`
+    step_minutes: int
+
+    # (years)
+    coal_must_run: np.ndarray
+
+    # (years x sources)
+    capex: np.ndarray
+    opex: np.ndarray
+    variable_opex: np.ndarray
+    lifetime: np.ndarray
+
+    # (sources x emission types) kg per kWh, zero for sources that don't pollute
+    emissions: np.ndarray
+    # (years x emission types) emissions pricing, per kg
+    emissions_costs: np.ndarray
+
+    def __post_init__(self):
+        self._freeze()
+
+    def __setstate__(self, state: dict[str, t.Any]):
+        self.__dict__.update(state)
+        self._freeze()
+
+    def _freeze(self):
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Exact hash of all the compiled values, for use as a cache key.
+        """
+        return fingerprint_arrays(*(getattr(self, field.name) for field in fields(self)))
+
+    @property
+    def step_hours(self) -> float:
+        return self.step_minutes / 60
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(self.start_year, self.end_year)
+
+    def year_index(self, year: int | np.ndarray) -> int | np.ndarray:
+        """
+        Index of a year (or years) in the years axis.
+        """
+        if np.any(np.asarray(year) < self.start_year) or np.any(np.asarray(year) >= self.end_year):
+            raise Exception(f"requested year not in range [{self.start_year}, {self.end_year})")
+        return year - self.start_year
+
+    @classmethod
+    def from_params(cls, params: "AllParams") -> "CompiledParams":
+        years = np.arange(params.general.start_year, params.general.end_year)
+        source_costs = [params.costs.get(source) for source in SOURCES]
+
+        def source_table(get_param) -> np.ndarray:
+            return np.stack([get_param(costs).at_many(years) for costs in source_costs], axis=1)
+
+        emissions = np.zeros((len(SOURCES), len(EMISSION_TYPES)))
+        for source in POLLUTING_ENERGY_SOURCES:
+            source_emissions = params.emissions.get(source)
+            emissions[SOURCES.index(source)] = [source_emissions.get(emission) for emission in EMISSION_TYPES]
+
+        return cls(
+            start_year=params.general.start_year,
+            end_year=params.general.end_year,
+            wacc_rate=params.general.wacc_rate,
+            interest_rate=params.general.interest_rate,
+            demand_growth_rate=params.general.demand_growth_rate,
+            charge_rate=params.general.charge_rate,
+            pv_degradation_rate=params.general.pv_degradation_rate,
+            step_minutes=params.general.step_minutes,
+            coal_must_run=params.general.coal_must_run.at_many(years),
+            capex=source_table(lambda costs: costs.capex),
+            opex=source_table(lambda costs: costs.opex),
+            variable_opex=source_table(lambda costs: costs.variable_opex),
+            lifetime=source_table(lambda costs: costs.lifetime),
+            emissions=emissions,
+            emissions_costs=np.stack(
+                [params.emissions_costs.get(emission).at_many(years) for emission in EMISSION_TYPES], axis=1
+            ),
+        )
+
+
+def as_compiled(params: "AllParams | CompiledParams") -> CompiledParams:
+    """
+    Compile the params, unless they are already compiled.
+    """
+    return params if isinstance(params, CompiledParams) else params.compile()
@@ -10,7 +10,11 @@ Interface
 ---------
 
 All interpolations implement ``.at(start_year, end_year, target_year)``,
-which will return the value at the target year according to the set attributes.
+which will return the value at the target year according to the set attributes,
+and ``.at_many(start_year, end_year, target_years)``,
+which will return the values at an array of target years in one call.
+
+New interpolations which only implement ``.at`` get a (slower) ``.at_many`` from ``BaseInterpo``.
 
 ``InterpoSelect``
 -----------------
@@ -44,12 +48,24 @@ class ABCInterpo(ABC):
         """Get the value at a certain year."""
         ...
 
+    @abstractmethod
+    def at_many(self, start_year: int, end_year: int, target_years: np.ndarray) -> np.ndarray:
+        """Get the values at an array of years."""
+        ...
+
 
 class BaseInterpo(DashSelectable, ABCInterpo):
     def at(self, start_year: int, end_year: int, target_year: int) -> float:
         """Get the value at a certain year."""
         ...
 
+    def at_many(self, start_year: int, end_year: int, target_years: np.ndarray) -> np.ndarray:
+        """Get the values at an array of years, one `.at` call at a time."""
+        return np.array(
+            [self.at(start_year, end_year, year) for year in np.asarray(target_years).tolist()],
+            dtype=np.float64,
+        )
+
 
 class Constant(BaseInterpo):
     """
@@ -63,6 +79,9 @@ class Constant(BaseInterpo):
     def at(self, start_year: int, end_year: int, target_year: int) -> float:
         return self.value
 
+    def at_many(self, start_year: int, end_year: int, target_years: np.ndarray) -> np.ndarray:
+        return np.full(np.shape(target_years), self.value, dtype=np.float64)
+
 
 class Linear(BaseInterpo):
     """
@@ -81,6 +100,9 @@ class Linear(BaseInterpo):
             fp=(self.start_value, self.end_value),
         )
 
+    def at_many(self, start_year: int, end_year: int, target_years: np.ndarray) -> np.ndarray:
+        return self.at(start_year, end_year, np.asarray(target_years))
+
 
 class Compound(BaseInterpo):
     """
@@ -102,6 +124,9 @@ class Compound(BaseInterpo):
             pv=-self.start_value,
         )
 
+    def at_many(self, start_year: int, end_year: int, target_years: np.ndarray) -> np.ndarray:
+        return np.asarray(self.at(start_year, end_year, np.asarray(target_years)), dtype=np.float64)
+
 
 class InterpoSelect(DashSelect[Constant, Linear, Compound]):
     _constant: Constant
@@ -7,12 +7,14 @@ Interpolation Range
 ``InterpoRange``
 ----------------
 
-Provides interpolated values in a given year range.
+Provides interpolated values in a given year range,
+either one year at a time or for its whole range at once.
 
 ----
 """
 from abc import ABC, abstractmethod
 
+import numpy as np
 from pydantic import PositiveInt
 
 from dash_models import DashListable
@@ -42,3 +44,15 @@ class InterpoRange(DashListable, ABCInterpoRange):
 
     def at(self, year: int) -> float:
         return self.interpo.__root__.at(self.start_year, self.end_year, year)
+
+    def at_many(self, years: np.ndarray) -> np.ndarray:
+        """Get the values at an array of years."""
+        return self.interpo.__root__.at_many(self.start_year, self.end_year, years)
+
+    def fill(self, table: np.ndarray, table_start_year: int):
+        """
+        Write the values of the whole range into its slice of a table indexed by year - table_start_year.
+        """
+        table[self.start_year - table_start_year:self.end_year - table_start_year] = self.at_many(
+            np.arange(self.start_year, self.end_year)
+        )
@@ -12,9 +12,18 @@ Represents a list of ``InterpoRange``s.
 Provides a `.at(year) method which will call the matching method on the appropriate
 ``InterpoRange``
 
+The values of all years are compiled lazily into a dense table indexed by year,
+so `.at(year)` and `.at_many(years)` are plain array lookups.
+The table is rebuilt on next use after any model was edited (see `DashModel.edits`), however the ranges
+were edited: through `.update()`, by the Dash inputs of a nested range, or by adding and removing ranges.
+
 ----
 """
 
+import typing as t
+
+import numpy as np
+
 from dash_models import DashList
 from .interpo_range import ABCInterpoRange, InterpoRange
 from typing import Generic, TypeVar, cast
@@ -24,15 +33,19 @@ T = TypeVar('T')
 class InterpolatedParam(DashList[InterpoRange], ABCInterpoRange, Generic[T]):
     _start_year: int = 0
     _end_year: int = 0
+    _table: np.ndarray | None = None
+    # the `DashModel.edits` the table was compiled at
+    _table_edits: int = -1
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._update_years()
 
+    def _update_years(self):
         # get the lowest start year out of all InterpoRanges
         if self.__root__:
             list_start_years = [r.start_year for r in self.__root__]
             list_end_years = [r.end_year for r in self.__root__]
-            # TODO: will those be changed if the interpolatedparam is modified on runtime?
             self._start_year = min(list_start_years)
             self._end_year = max(list_end_years)
 
@@ -40,19 +53,42 @@ class InterpolatedParam(DashList[InterpoRange], ABCInterpoRange, Generic[T]):
                 curr, next = self.__root__[idx], self.__root__[idx+1]
                 if curr.end_year != next.start_year:
                     raise Exception("all years within the range must be within exactly one InterpoRange")
+        else:
+            self._start_year = self._end_year = 0
 
+    def _compile(self):
+        self._update_years()
+        table = np.empty(self._end_year - self._start_year, dtype=np.float64)
+        for r in self.__root__:
+            r.fill(table, self._start_year)
+        table.flags.writeable = False
+        self._table = table
+        self._table_edits = self.edits()
 
-    def at(self, year: int) -> T:
-        if not self._start_year <= year < self._end_year:
+    @property
+    def table(self) -> np.ndarray:
+        """
+        Read-only values of every year in [start_year, end_year), indexed by year - start_year.
+        """
+        if self._table_edits != self.edits():
+            self._compile()
+        return self._table
+
+    def _check_years(self, first_year: int, last_year: int):
+        if not self._start_year <= first_year <= last_year < self._end_year:
             raise Exception(f"requested year not in range [{self._start_year}, {self._end_year})")
 
-        list_of_interpos = sum(
-            (
-                [r for _ in range(r.end_year - r.start_year)]
-                for r in sorted(self.__root__, key=lambda r: r.start_year)
-            ),
-            start=[],
-        )
-        interpo = list_of_interpos[year - self._start_year]
-        # TODO: make this less ugly :)
-        return cast(T, interpo.at(year))
+    def at(self, year: int) -> T:
+        table = self.table
+        self._check_years(year, year)
+        return cast(T, table[year - self._start_year])
+
+    def at_many(self, years: t.Sequence[int] | np.ndarray) -> np.ndarray:
+        """
+        Get the values of many years at once.
+        """
+        years = np.asarray(years, dtype=np.int64)
+        table = self.table
+        if years.size:
+            self._check_years(years.min(), years.max())
+        return table[years - self._start_year]
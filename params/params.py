@@ -8,14 +8,17 @@ Defines classes for the user-facing parameters of the model.
 ----
 """
 
-from pydantic import Field, NonNegativeInt, PositiveFloat, PositiveInt
+from pydantic import Field, NonNegativeFloat, NonNegativeInt, PositiveFloat, PositiveInt, validator
 
 from dash_models import DashEditorPage
 from dash_models.model import DashModel
 from .interpolated_param import InterpolatedParam
+from .compiled import CompiledParams
 from common import EmissionType, EnergySource
 from units import kg_per_kWh, ILS_per_kg, ILS_per_kW, ILS_per_kWh, kW
 
+MINUTES_PER_DAY = 24 * 60
+
 
 # TODO: validate that all InterpolatedParams start at the correct start year, and end at the correct end year.
 
@@ -160,6 +163,31 @@ class GeneralParams(DashModel):
                     "discharged every hour",
     )
 
+    pv_degradation_rate: NonNegativeFloat = Field(
+        0,
+        title="Solar Panel Degradation Rate YoY (Proportion)",
+        description="The proportion of their capacity that solar panels lose every year (like 0.005)",
+    )
+
+    step_minutes: PositiveInt = Field(
+        60,
+        title="Simulation Step (Minutes)",
+        description="The length of every step of the demand and solar profiles",
+    )
+
+    @validator("step_minutes")
+    def v_step_minutes(cls, step_minutes: int):
+        assert MINUTES_PER_DAY % step_minutes == 0, "step_minutes must divide a day"
+        return step_minutes
+
+    @property
+    def step_hours(self) -> float:
+        return self.step_minutes / 60
+
+    @property
+    def steps_per_day(self) -> int:
+        return MINUTES_PER_DAY // self.step_minutes
+
 
 class AllParams(DashEditorPage):
     general: GeneralParams = Field(GeneralParams(), title="General Parameters")
@@ -168,3 +196,9 @@ class AllParams(DashEditorPage):
         EmissionsPricing(), title="EmissionsCosts (Carbon Tax)"
     )
     emissions: AllEmissions = Field(AllEmissions(), title="Energy Source Emissions")
+
+    def compile(self) -> CompiledParams:
+        """
+        Create a frozen snapshot of the current values, for the simulation and cost engines.
+        """
+        return CompiledParams.from_params(self)
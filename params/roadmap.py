@@ -1,26 +1,30 @@
-import sys
 import typing as t
 from dataclasses import dataclass
-from itertools import product
-from pprint import pprint
 
 import numpy as np
 from pydantic import Field, NonNegativeFloat, PositiveInt, validator
 
+from common import fingerprint_arrays
 from dash_models import DashModel
 
 T = t.TypeVar("T")
-MINOR = 1
 
+# the value fields of `Scenario`, `YearlyScenario` and `ScenarioBatch`, in order
+SCENARIO_FIELDS = (
+    "solar_capacity_kw",
+    "wind_capacity_kw",
+    "storage_capacity_kwh",
+    "storage_efficiency",
+    "storage_min_energy_rate",
+)
 
-def remove_duplicates(it: t.Iterable[T]) -> t.Iterator[T]:
+
+def unique_values(values: np.ndarray) -> np.ndarray:
     """
-    Remove duplicates from an iterator while preserving order.
+    Remove duplicate values from an array while preserving order.
     """
-    assert (
-            sys.version_info[MINOR] >= 6
-    ), "This function only works in python 3.6+, where dicts are insertion order."
-    yield from dict.fromkeys(it)
+    _, first_idx = np.unique(values, return_index=True)
+    return values[np.sort(first_idx)]
 
 
 @dataclass
@@ -31,8 +35,18 @@ class YearlyScenario:
     storage_efficiency: float
     storage_min_energy_rate: float
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Exact hash of the values, for use as a cache key.
+        """
+        return fingerprint_arrays(
+            (self.solar_capacity_kw, self.wind_capacity_kw, self.storage_capacity_kwh,
+             self.storage_efficiency, self.storage_min_energy_rate)
+        )
 
-@dataclass
+
+@dataclass(eq=False)
 class Scenario:
     """
     Values for a possible futures.
@@ -53,10 +67,26 @@ class Scenario:
     storage_min_energy_rate: np.ndarray
 
     def __iter__(self) -> t.Iterator[YearlyScenario]:
-        zipped = np.dstack((self.solar_capacity_kw, self.wind_capacity_kw, self.storage_capacity_kwh,
-                            self.storage_efficiency, self.storage_min_energy_rate))
-        zipped = zipped[0]
-        return map(lambda x: YearlyScenario(*x), zipped)
+        """
+        The values of every year, as separate objects.
+        This is a convenience for inspecting a scenario; the engines use `values` or `batch()`.
+        """
+        return (YearlyScenario(*year_values) for year_values in self.values.T.tolist())
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Read-only (fields x years) array of all the values, with the fields ordered as in `SCENARIO_FIELDS`.
+        """
+        values = np.stack([getattr(self, field) for field in SCENARIO_FIELDS])
+        values.flags.writeable = False
+        return values
+
+    def batch(self) -> "ScenarioBatch":
+        """
+        A batch of this single scenario.
+        """
+        return ScenarioBatch(*(getattr(self, field)[np.newaxis] for field in SCENARIO_FIELDS))
 
     @property
     def title(self) -> str:
@@ -78,11 +108,158 @@ class Scenario:
     def __repr__(self):
         return self.title
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Exact hash of all the values of all the years, for use as a cache key.
+
+        Unlike `title`, scenarios which differ in any value have different fingerprints.
+        """
+        return fingerprint_arrays(
+            self.solar_capacity_kw,
+            self.wind_capacity_kw,
+            self.storage_capacity_kwh,
+            self.storage_efficiency,
+            self.storage_min_energy_rate,
+        )
+
     def __hash__(self):
-        return hash(self.title)
+        return hash(self.fingerprint)
 
     def __eq__(self, other: "Scenario"):
-        return self.title == other.title
+        return isinstance(other, Scenario) and self.fingerprint == other.fingerprint
+
+
+def scenario_from_ends(starts: t.Sequence[float], end_values: t.Sequence[float], years: int) -> Scenario:
+    """
+    Create a scenario which goes linearly from the start values to the end values.
+
+    :param starts: Value for the start year for each Scenario parameter, ordered.
+    :param end_values: Value for the end year for each Scenario parameter, ordered.
+    :param years: Number of years in the scenario.
+    """
+    return Scenario(
+        *(
+            np.linspace(start=start, stop=end_val, num=years)
+            for start, end_val in zip(starts, end_values)
+        )
+    )
+
+
+@dataclass
+class ScenarioBatch:
+    """
+    Many scenarios of the same length, as one (scenarios x years) array per field.
+
+    This is the input of the batched simulation and cost engines, which consume whole columns at once.
+    """
+
+    solar_capacity_kw: np.ndarray
+    wind_capacity_kw: np.ndarray
+    storage_capacity_kwh: np.ndarray
+    storage_efficiency: np.ndarray
+    storage_min_energy_rate: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.solar_capacity_kw)
+
+    def __iter__(self) -> t.Iterator[Scenario]:
+        return map(self.scenario, range(len(self)))
+
+    @property
+    def years(self) -> int:
+        return self.solar_capacity_kw.shape[1]
+
+    def scenario(self, idx: int) -> Scenario:
+        """
+        A single scenario of the batch, as views into the batch arrays.
+        """
+        return Scenario(*(getattr(self, field)[idx] for field in SCENARIO_FIELDS))
+
+    @classmethod
+    def from_scenarios(cls, scenarios: t.Iterable[Scenario]) -> "ScenarioBatch":
+        scenarios = list(scenarios)
+        return cls(*(np.stack([getattr(scenario, field) for scenario in scenarios]) for field in SCENARIO_FIELDS))
+
+
+class ScenarioSpace(t.Sequence[Scenario]):
+    """
+    A lazy sequence of the scenarios in the cartesian product of end values, in `itertools.product` order.
+
+    Nothing but the end values of every parameter is stored; a `Scenario` is built only when it is accessed.
+    Supports `len`, indexing and slicing (`space[i::n]` shards it between n workers), and is cheap to pickle.
+    """
+
+    def __init__(
+            self,
+            starts: t.Sequence[float],
+            end_values: t.Sequence[np.ndarray],
+            years: int,
+            indices: range | None = None,
+    ):
+        """
+        :param starts: Start value of every parameter, ordered as the `Scenario` fields.
+        :param end_values: Unique end values of every parameter.
+        :param years: Number of years in every scenario.
+        :param indices: The product indices in this space, defaults to all of them.
+        """
+        self.starts = tuple(starts)
+        self.end_values = tuple(end_values)
+        self.years = years
+        self._sizes = tuple(len(values) for values in self.end_values)
+        self._indices = indices if indices is not None else range(int(np.prod(self._sizes, dtype=np.int64)))
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @t.overload
+    def __getitem__(self, item: int) -> Scenario:
+        ...
+
+    @t.overload
+    def __getitem__(self, item: slice) -> "ScenarioSpace":
+        ...
+
+    def __getitem__(self, item: int | slice) -> "Scenario | ScenarioSpace":
+        if isinstance(item, slice):
+            return ScenarioSpace(self.starts, self.end_values, self.years, self._indices[item])
+        return self._scenario_at(self._indices[item])
+
+    def __iter__(self) -> t.Iterator[Scenario]:
+        return map(self._scenario_at, self._indices)
+
+    def __repr__(self):
+        return f"ScenarioSpace({len(self)} scenarios)"
+
+    def batch(self) -> ScenarioBatch:
+        """
+        All the scenarios of this space as a single batch, built without any per-scenario Python work.
+        """
+        digits = np.unravel_index(np.array(self._indices, dtype=np.int64), self._sizes)
+        return ScenarioBatch(
+            *(
+                np.linspace(start=start, stop=values[field_digits], num=self.years, axis=1)
+                for start, values, field_digits in zip(self.starts, self.end_values, digits)
+            )
+        )
+
+    def ends(self, index: int) -> tuple[float, ...]:
+        """
+        The end values of the scenario at an index of this space.
+        """
+        return self._ends_at(self._indices[index])
+
+    def _ends_at(self, product_idx: int) -> tuple[float, ...]:
+        # mixed radix, the last parameter changes fastest
+        digits = []
+        for size in reversed(self._sizes):
+            product_idx, digit = divmod(product_idx, size)
+            digits.append(digit)
+
+        return tuple(values[digit] for values, digit in zip(self.end_values, reversed(digits)))
+
+    def _scenario_at(self, product_idx: int) -> Scenario:
+        return scenario_from_ends(self.starts, self._ends_at(product_idx), self.years)
 
 
 class RoadmapParam(DashModel):
@@ -165,41 +342,29 @@ class Roadmap(DashModel):
             self.storage_min_energy_rate,
         )
 
-    def _scenario_from_ends(self, end_values: t.Sequence[int]) -> Scenario:
+    def scenario_from_ends(self, end_values: t.Sequence[float]) -> Scenario:
         """
-        Create a scenario from the given end values
-        and the years in this Roadmap.
-
-        :param end_values: Value for the end year for each Scenario parameter, ordered.
-        :return: A constructed Scenario.
+        Create a scenario from the given end values and the start values and years of this Roadmap,
+        even if the end values are outside of the ranges of this Roadmap.
         """
-        return Scenario(
-            *(
-                np.linspace(
-                    start=param.start,
-                    stop=end_val,
-                    num=self.end_year - self.start_year,
-                )
-                for param, end_val in zip(self._params, end_values)
-            )
-        )
+        return scenario_from_ends([param.start for param in self._params], end_values,
+                                  self.end_year - self.start_year)
 
     @property
-    def scenarios(self) -> t.Iterator[Scenario]:
+    def scenarios(self) -> ScenarioSpace:
         """
         All possible `Scenario` that can be generated from this `Roadmap`.
+
+        The scenarios are built lazily, so even huge roadmaps can be iterated in constant memory.
         """
-        # a range of end values for each parameter
-        end_value_ranges = (
-            np.arange(param.end_min, param.end_max, param.step) for param in self._params
-        )
+        years = self.end_year - self.start_year
 
-        # end value combinations
-        ends = product(*end_value_ranges)
+        # a range of unique end values for each parameter
+        end_value_ranges = [
+            unique_values(np.arange(param.end_min, param.end_max, param.step)) for param in self._params
+        ]
+        if years <= 1:
+            # the scenarios are empty, or only hold the start values, and thus are all equal
+            end_value_ranges = [values[:1] for values in end_value_ranges]
 
-        return remove_duplicates(
-            map(
-                self._scenario_from_ends,
-                ends,
-            )
-        )
+        return ScenarioSpace([param.start for param in self._params], end_value_ranges, years)
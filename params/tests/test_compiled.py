@@ -0,0 +1,58 @@
+import pickle
+
+import numpy as np
+
+from common import EmissionType, EnergySource
+from data.defaults import DEFAULT_PARAMS
+from ..compiled import SOURCES, EMISSION_TYPES
+from ..params import AllParams
+
+
+def test_compile_matches_params():
+    params = AllParams(**DEFAULT_PARAMS)
+    compiled = params.compile()
+
+    for year in (2020, 2031, 2049):
+        year_idx = compiled.year_index(year)
+        assert compiled.coal_must_run[year_idx] == params.general.coal_must_run.at(year)
+        for source_idx, source in enumerate(SOURCES):
+            assert compiled.capex[year_idx, source_idx] == params.costs.get(source).capex.at(year)
+            assert compiled.lifetime[year_idx, source_idx] == params.costs.get(source).lifetime.at(year)
+        for emission_idx, emission in enumerate(EMISSION_TYPES):
+            assert compiled.emissions_costs[year_idx, emission_idx] == params.emissions_costs.get(emission).at(year)
+
+    gas_idx = SOURCES.index(EnergySource.GAS)
+    assert compiled.emissions[gas_idx, EMISSION_TYPES.index(EmissionType.CO2)] == params.emissions.gas.CO2
+    assert not compiled.emissions[SOURCES.index(EnergySource.SOLAR)].any()
+
+
+def test_compiled_is_frozen_and_picklable():
+    compiled = AllParams(**DEFAULT_PARAMS).compile()
+    assert not compiled.opex.flags.writeable
+
+    unpickled = pickle.loads(pickle.dumps(compiled))
+    np.testing.assert_array_equal(unpickled.opex, compiled.opex)
+    assert not unpickled.opex.flags.writeable
+
+
+def test_fingerprints_follow_values():
+    params = AllParams(**DEFAULT_PARAMS)
+    other = AllParams(**DEFAULT_PARAMS)
+    assert params.fingerprint == other.fingerprint
+    assert params.compile().fingerprint == other.compile().fingerprint
+
+    other.general.wacc_rate += 1e-9
+    assert params.general.fingerprint != other.general.fingerprint
+    assert params.fingerprint != other.fingerprint
+    assert params.compile().fingerprint != other.compile().fingerprint
+
+
+def test_compile_follows_nested_edits():
+    params = AllParams(**DEFAULT_PARAMS)
+    year = params.general.start_year
+    before = params.compile().coal_must_run[0]
+
+    params.general.coal_must_run.__root__[0].interpo.__root__.value += 1000
+
+    assert params.general.coal_must_run.at(year) == before + 1000
+    assert params.compile().coal_must_run[0] == before + 1000
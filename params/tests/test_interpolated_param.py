@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from ..interpolated_param import InterpolatedParam
+
+RANGES = [
+    {"start_year": 2020, "end_year": 2025, "interpo": {"type": "linear", "start_value": 10, "end_value": 5}},
+    {"start_year": 2025, "end_year": 2030, "interpo": {"type": "compound", "start_value": 5, "rate": 10}},
+    {"start_year": 2030, "end_year": 2035, "interpo": {"type": "constant", "value": 3}},
+]
+
+
+def make_param():
+    return InterpolatedParam[float].parse_obj(RANGES)
+
+
+def test_at_matches_ranges():
+    param = make_param()
+    for r in param.__root__:
+        for year in range(r.start_year, r.end_year):
+            assert param.at(year) == r.at(year)
+
+
+def test_at_many():
+    param = make_param()
+    years = np.arange(2020, 2035)
+    np.testing.assert_array_equal(param.at_many(years), [param.at(year) for year in years])
+
+
+def test_out_of_range():
+    param = make_param()
+    with pytest.raises(Exception):
+        param.at(2035)
+    with pytest.raises(Exception):
+        param.at_many([2019, 2020])
+
+
+def test_update_invalidates_table():
+    param = make_param()
+    assert param.at(2031) == 3
+
+    updated = [dict(r) for r in RANGES]
+    updated[2] = {"start_year": 2030, "end_year": 2040, "interpo": {"type": "constant", "value": 7}}
+    param.update(updated)
+
+    assert param.at(2031) == 7
+    assert param.at(2039) == 7
+
+
+def test_interpo_at_many_matches_at():
+    for r in make_param().__root__:
+        years = np.arange(r.start_year, r.end_year + 3)
+        np.testing.assert_array_equal(r.at_many(years), [r.at(year) for year in years])
+
+
+def test_nested_edit_invalidates_table():
+    param = make_param()
+    assert param.at(2031) == 3
+
+    # as the Dash input of a nested field does
+    param.__root__[2].interpo.__root__.value += 1000
+    assert param.at(2031) == 1003
+    np.testing.assert_array_equal(param.at_many([2030, 2034]), [1003, 1003])
+
+    # as dropping the last range does
+    param.__root__ = param.__root__[:2]
+    with pytest.raises(Exception):
+        param.at(2031)
+    assert param.at(2029) == make_param().at(2029)
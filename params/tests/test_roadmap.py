@@ -1,4 +1,8 @@
-from ..roadmap import Roadmap, RoadmapParam
+from itertools import product
+
+import numpy as np
+
+from ..roadmap import Roadmap, RoadmapParam, ScenarioBatch
 
 
 def test_roadmap_simple():
@@ -19,3 +23,106 @@ def test_roadmap_simple():
         ),
         storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
     )
+
+
+def test_scenarios_with_close_values_are_distinct():
+    # both efficiencies have the same title, but they are different scenarios
+    r = Roadmap(
+        start_year=2020,
+        end_year=2025,
+        solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=50_001, step=20_000),
+        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=251, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=50_001, step=50_000),
+        storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.96, step=0.05),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.06, step=0.05),
+    )
+    first, second = r.scenarios
+    assert first.title == second.title
+    assert first != second
+    assert first.fingerprint != second.fingerprint
+    assert len({first, second}) == 2
+
+
+def test_roadmap_fingerprint():
+    def make(step: float):
+        return Roadmap(
+            start_year=2020,
+            end_year=2025,
+            solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=60_000, step=step),
+            wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=251, step=100),
+            storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=50_001, step=50_000),
+            storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.91, step=0.05),
+            storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.06, step=0.05),
+        )
+
+    assert make(5_000).fingerprint == make(5_000).fingerprint
+    assert make(5_000).fingerprint != make(5_000.5).fingerprint
+
+
+def test_scenario_space_matches_product():
+    r = Roadmap(
+        start_year=2020,
+        end_year=2030,
+        solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=150_000, step=20_000),
+        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=550, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=400_000, step=50_000),
+        storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.96, step=0.05),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
+    )
+    space = r.scenarios
+    ends = list(product(*(np.arange(p.end_min, p.end_max, p.step) for p in r._params)))
+
+    assert len(space) == len(ends) == 5 * 3 * 7 * 2 * 1
+    for idx in (0, 1, 17, len(ends) - 1, -1):
+        assert space.ends(idx) == ends[idx]
+        np.testing.assert_array_equal(space[idx].solar_capacity_kw, np.linspace(4_000, ends[idx][0], 10))
+
+    shards = [space[i::3] for i in range(3)]
+    assert sum(map(len, shards)) == len(space)
+    assert list(shards[1]) == [space[i] for i in range(1, len(space), 3)]
+    assert list(space[5:9]) == list(space)[5:9]
+    assert len(set(space)) == len(space)
+
+
+def test_scenario_batch_columns():
+    r = Roadmap(
+        start_year=2020,
+        end_year=2030,
+        solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=150_000, step=20_000),
+        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=550, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=400_000, step=50_000),
+        storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.96, step=0.05),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
+    )
+    space = r.scenarios[3::4]
+    batch = space.batch()
+
+    assert len(batch) == len(space) and batch.years == 10
+    for scenario, batch_scenario in zip(space, batch):
+        np.testing.assert_array_equal(scenario.values, batch_scenario.values)
+        assert scenario == batch_scenario
+
+    scenario = space[0]
+    assert scenario.values.shape == (5, 10)
+    yearly = list(scenario)
+    assert yearly[4].storage_capacity_kwh == scenario.storage_capacity_kwh[4]
+    np.testing.assert_array_equal(ScenarioBatch.from_scenarios(space).storage_efficiency, batch.storage_efficiency)
+
+
+def test_short_roadmaps_have_one_scenario():
+    def make(end_year: int):
+        return Roadmap(
+            start_year=2020,
+            end_year=end_year,
+            solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=150_000, step=20_000),
+            wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=3_000, step=100),
+            storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=400_000, step=50_000),
+            storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.96, step=0.05),
+            storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
+        )
+
+    # with a single year, every scenario only holds the start values
+    scenario, = make(2021).scenarios
+    assert scenario.solar_capacity_kw.tolist() == [4_000]
+    assert len(make(2020).scenarios) == 1
+    assert len(make(2022).scenarios) > 1
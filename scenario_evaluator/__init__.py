@@ -0,0 +1,2 @@
+from .sweep import iter_roadmap, run_roadmap, reduce_roadmap, run_roadmap_pruned
+from .optimize import optimize_roadmap
@@ -0,0 +1,174 @@
+"""
+Memoization of single simulated years.
+
+Every scenario of a roadmap starts from the same values, and many scenarios share the same values in
+other years as well, so a sweep simulates the same (year, yearly scenario) combination over and over.
+`YearResultCache` keeps the results of `run_scenario_year` under a memory budget, and optionally
+spills evicted results to disk instead of dropping them.
+"""
+import os
+import pickle
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from common import DemandSeries, fingerprint_arrays, fingerprint_text
+from hourly_simulation.predict import SolarProfile
+from params.roadmap import YearlyScenario
+
+__all__ = [
+    "YearKey",
+    "YearResultCache",
+    "profiles_fingerprint",
+    "year_key",
+]
+
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+# (year, yearly scenario fingerprint, general params fingerprint, input profiles fingerprint)
+YearKey = tuple[int, str, str, str]
+
+
+def profiles_fingerprint(original_demand: DemandSeries, solar_prod_ratio: pd.Series | SolarProfile) -> str:
+    """
+    Exact hash of the hourly input profiles of a simulation.
+    """
+    return fingerprint_arrays(original_demand.year, original_demand.series, solar_prod_ratio)
+
+
+def year_key(year: int, yearly_scenario: YearlyScenario, general: str, profiles: str) -> YearKey:
+    """
+    The fingerprints of the params and profiles are the same for every year of a scenario,
+    so they are computed once by the caller.
+
+    :param general: Fingerprint of the general params, see `GeneralParams.fingerprint`.
+    :param profiles: Fingerprint of the input profiles, see `profiles_fingerprint`.
+    """
+    return year, yearly_scenario.fingerprint, general, profiles
+
+
+def _frame_size(frame: pd.DataFrame) -> int:
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class YearResultCache:
+    """
+    LRU cache of simulated years, bounded by the total memory of the cached results.
+
+    Results are copied in and out of the cache, so callers are free to modify them.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: str | os.PathLike | None = None):
+        """
+        :param max_bytes: Memory budget of the results held in memory.
+        :param spill_dir: If given, results evicted from memory are pickled into this directory,
+                          and are loaded back from it on a later miss.
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.hits = 0
+        self.misses = 0
+
+        self._frames: OrderedDict[YearKey, pd.DataFrame] = OrderedDict()
+        self._sizes: dict[YearKey, int] = {}
+        self._bytes = 0
+
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, key: YearKey) -> bool:
+        return key in self._frames or (self.spill_dir is not None and self._spill_path(key).exists())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the results held in memory.
+        """
+        return self._bytes
+
+    def get(self, key: YearKey) -> pd.DataFrame | None:
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+        else:
+            frame = self._load_spilled(key)
+            if frame is None:
+                return None
+            self._insert(key, frame)
+
+        return frame.copy()
+
+    def put(self, key: YearKey, frame: pd.DataFrame):
+        if key in self._frames:
+            self._remove(key)
+        self._insert(key, frame.copy())
+
+    def get_or_compute(self, key: YearKey, compute: t.Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cached result of the key, or compute and cache it.
+        """
+        frame = self.get(key)
+        if frame is not None:
+            self.hits += 1
+            return frame
+
+        self.misses += 1
+        frame = compute()
+        self.put(key, frame)
+        return frame
+
+    def clear(self):
+        """
+        Drop the results held in memory. Spilled results are kept.
+        """
+        self._frames.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def _insert(self, key: YearKey, frame: pd.DataFrame):
+        size = _frame_size(frame)
+        self._frames[key] = frame
+        self._sizes[key] = size
+        self._bytes += size
+        self._evict()
+
+    def _remove(self, key: YearKey) -> pd.DataFrame:
+        self._bytes -= self._sizes.pop(key)
+        return self._frames.pop(key)
+
+    def _evict(self):
+        # always keep the most recent result, even if it is larger than the whole budget
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            key = next(iter(self._frames))
+            frame = self._remove(key)
+            if self.spill_dir is not None:
+                self._spill(key, frame)
+
+    def _spill_path(self, key: YearKey) -> Path:
+        return self.spill_dir / f"{fingerprint_text(repr(key))}.pkl"
+
+    def _spill(self, key: YearKey, frame: pd.DataFrame):
+        path = self._spill_path(key)
+        if path.exists():
+            return
+
+        # write to a temporary file first, so a concurrent reader never sees a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _load_spilled(self, key: YearKey) -> pd.DataFrame | None:
+        if self.spill_dir is None:
+            return None
+
+        path = self._spill_path(key)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,264 @@
+"""
+Search a roadmap for its cheapest scenario, instead of simulating every scenario in it.
+
+The search is a coordinate descent over the grid of end values of the roadmap, with step halving:
+every parameter is moved up and down by its current step, a move is taken as soon as it improves,
+and the steps are halved when no move improves, down to the roadmap's own step.
+
+A scenario is better than another if it meets the renewable share target and the other doesn't,
+or if both meet it and it has a lower total NPV. Scenarios which don't meet the target are ranked
+by how far they are from it, so the search can start from an infeasible point.
+
+When a move is blocked by the edge of a parameter's range, the range is extended (up to the hard limits
+of the parameter), since the best values might be lying beyond. The result reports which ranges were
+extended, and which parameters still ended up on the edge of their range.
+"""
+import math
+import typing as t
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import data
+from common import DemandSeries
+from params.compiled import CompiledParams, as_compiled
+from params.params import AllParams
+from params.roadmap import Roadmap, Scenario, SCENARIO_FIELDS
+from .run_scenarios import ScenarioCosts, run_scenario_costs_ex
+
+__all__ = [
+    "HARD_LIMITS",
+    "OptimizationResult",
+    "optimize_roadmap",
+]
+
+Evaluator = t.Callable[[DemandSeries, pd.Series, Scenario, CompiledParams], ScenarioCosts]
+
+# the values a parameter can never go beyond, whatever the roadmap ranges are
+HARD_LIMITS: dict[str, tuple[float, float]] = {
+    "solar_capacity_kw": (0, math.inf),
+    "wind_capacity_kw": (0, math.inf),
+    "storage_capacity_kwh": (0, math.inf),
+    "storage_efficiency": (0, 1),
+    "storage_min_energy_rate": (0, 1),
+}
+
+DEFAULT_MAX_EVALUATIONS = 200
+# initial steps are about a quarter of the range
+INITIAL_STEP_DIVISOR = 4
+# tolerance for floating point errors when converting values to grid indices
+GRID_TOLERANCE = 1e-9
+
+
+@dataclass
+class OptimizationResult:
+    """
+    The best scenario found, and how it was found.
+    """
+
+    scenario: Scenario
+    end_values: dict[str, float]
+    costs: ScenarioCosts
+    # whether the best scenario meets the renewable share target
+    feasible: bool
+    # number of simulated scenarios
+    evaluations: int
+    # the (min, max) end values of every parameter at the end of the search
+    ranges: dict[str, tuple[float, float]]
+    # parameters whose range was extended during the search
+    extended: list[str] = field(default_factory=list)
+    # parameters whose best value is on the edge of their final range, so better values might lie beyond
+    on_boundary: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Axis:
+    """
+    A parameter's grid: value = origin + index * step, for index in [lo, hi].
+    """
+
+    origin: float
+    step: float
+    lo: int
+    hi: int
+    hard_lo: int | float
+    hard_hi: int | float
+
+    def value(self, index: int) -> float:
+        return self.origin + index * self.step
+
+    @property
+    def fixed(self) -> bool:
+        return self.step == 0
+
+    @classmethod
+    def from_param(cls, param, hard_limits: tuple[float, float]) -> "_Axis":
+        if param.step == 0:
+            return cls(param.end_min, 0, 0, 0, 0, 0)
+
+        size = len(np.arange(param.end_min, param.end_max, param.step))
+        hard_lo, hard_hi = ((limit - param.end_min) / param.step for limit in hard_limits)
+        return cls(
+            origin=param.end_min,
+            step=param.step,
+            lo=0,
+            hi=max(size - 1, 0),
+            hard_lo=math.ceil(hard_lo - GRID_TOLERANCE),
+            hard_hi=math.floor(hard_hi + GRID_TOLERANCE) if math.isfinite(hard_hi) else math.inf,
+        )
+
+    def candidate(self, idx: int, step: int) -> tuple[int, int, int] | None:
+        """
+        The index `step` away from idx, stopping at the edge of the range, or extending the range if idx is on its edge.
+
+        The range itself isn't modified, so it is only extended if the candidate is actually evaluated.
+
+        :return: (index, lo, hi) of the candidate and the range it is in, or None if idx is on a hard limit.
+        """
+        target, lo, hi = idx + step, self.lo, self.hi
+        if step > 0 and target > hi:
+            if idx == hi:
+                if hi >= self.hard_hi:
+                    return None
+                hi = int(min(self.hard_hi, hi + max(1, hi - lo)))
+            target = min(target, hi)
+        elif step < 0 and target < lo:
+            if idx == lo:
+                if lo <= self.hard_lo:
+                    return None
+                lo = int(max(self.hard_lo, lo - max(1, hi - lo)))
+            target = max(target, lo)
+        return target, lo, hi
+
+
+def _rank(costs: ScenarioCosts, renewable_target: float) -> tuple[int, float]:
+    shortfall = renewable_target - costs.renewable_share
+    if shortfall > 0:
+        return 1, shortfall
+    return 0, costs.total_npv
+
+
+Indices = tuple[int, ...]
+Rank = tuple[int, float]
+
+
+class _Search:
+    """
+    A coordinate descent over the axes, remembering the rank and costs of every evaluated grid point.
+    """
+
+    def __init__(
+            self,
+            axes: list[_Axis],
+            evaluate: t.Callable[[Indices], ScenarioCosts],
+            renewable_target: float,
+            max_evaluations: int,
+    ):
+        self.axes = axes
+        self.evaluated: dict[Indices, tuple[Rank, ScenarioCosts]] = {}
+        self._evaluate = evaluate
+        self._renewable_target = renewable_target
+        self._max_evaluations = max_evaluations
+
+    @property
+    def exhausted(self) -> bool:
+        return len(self.evaluated) >= self._max_evaluations
+
+    def run(self, indices: Indices) -> Rank:
+        if indices not in self.evaluated:
+            costs = self._evaluate(indices)
+            self.evaluated[indices] = (_rank(costs, self._renewable_target), costs)
+        return self.evaluated[indices][0]
+
+    def move(self, current: Indices, best_rank: Rank, axis_idx: int, step: int) -> tuple[Indices, Rank] | None:
+        """
+        The first move along an axis, up then down by step, which improves on best_rank.
+        """
+        axis = self.axes[axis_idx]
+        for direction in (1, -1):
+            candidate = axis.candidate(current[axis_idx], direction * step)
+            if candidate is None or self.exhausted:
+                continue
+            target, axis.lo, axis.hi = candidate
+            indices = current[:axis_idx] + (target,) + current[axis_idx + 1:]
+            rank = self.run(indices)
+            if rank < best_rank:
+                return indices, rank
+        return None
+
+    def descend(self, current: Indices, steps: list[int]) -> tuple[Indices, Rank]:
+        """
+        Move along every axis in turn, halving the steps whenever no move improves.
+        """
+        best_rank = self.run(current)
+        while not self.exhausted:
+            improved = False
+            for axis_idx, step in enumerate(steps):
+                if not step:
+                    continue
+                move = self.move(current, best_rank, axis_idx, step)
+                if move is not None:
+                    (current, best_rank), improved = move, True
+
+            if not improved:
+                if all(step <= 1 for step in steps):
+                    break
+                steps = [step and max(1, step // 2) for step in steps]
+        return current, best_rank
+
+
+def optimize_roadmap(
+        roadmap: Roadmap,
+        params: AllParams | CompiledParams,
+        renewable_target: float,
+        evaluate: Evaluator = run_scenario_costs_ex,
+        max_evaluations: int = DEFAULT_MAX_EVALUATIONS,
+        hard_limits: dict[str, tuple[float, float]] | None = None,
+) -> OptimizationResult:
+    """
+    Find the scenario of the roadmap with the lowest total NPV that meets a renewable share target.
+
+    :param roadmap: The roadmap whose end values grid is searched, starting from its center.
+    :param params: The model parameters.
+    :param renewable_target: Minimal renewable share of the last year, see `ScenarioCosts.renewable_share`.
+    :param evaluate: Function with the signature of `run_scenario_costs_ex`.
+    :param max_evaluations: Stop the search after simulating this many scenarios.
+    :param hard_limits: Override `HARD_LIMITS` for some parameters.
+    """
+    params = as_compiled(params)
+    hard_limits = {**HARD_LIMITS, **(hard_limits or {})}
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+
+    axes = [_Axis.from_param(getattr(roadmap, name), hard_limits[name]) for name in SCENARIO_FIELDS]
+    initial_ranges = [(axis.lo, axis.hi) for axis in axes]
+
+    def evaluate_indices(indices: Indices) -> ScenarioCosts:
+        scenario = roadmap.scenario_from_ends([axis.value(idx) for axis, idx in zip(axes, indices)])
+        return evaluate(original_demand, solar_prod_ratio, scenario, params)
+
+    search = _Search(axes, evaluate_indices, renewable_target, max_evaluations)
+    current, best_rank = search.descend(
+        tuple((axis.lo + axis.hi) // 2 for axis in axes),
+        [0 if axis.fixed else max(1, (axis.hi - axis.lo + 1) // INITIAL_STEP_DIVISOR) for axis in axes],
+    )
+
+    best_costs = search.evaluated[current][1]
+    end_values = {name: axis.value(idx) for name, axis, idx in zip(SCENARIO_FIELDS, axes, current)}
+
+    return OptimizationResult(
+        scenario=roadmap.scenario_from_ends(list(end_values.values())),
+        end_values=end_values,
+        costs=best_costs,
+        feasible=best_rank[0] == 0,
+        evaluations=len(search.evaluated),
+        ranges={name: (axis.value(axis.lo), axis.value(axis.hi)) for name, axis in zip(SCENARIO_FIELDS, axes)},
+        extended=[
+            name for name, axis, initial in zip(SCENARIO_FIELDS, axes, initial_ranges) if (axis.lo, axis.hi) != initial
+        ],
+        on_boundary=[
+            name for name, axis, idx in zip(SCENARIO_FIELDS, axes, current)
+            if axis.lo != axis.hi and idx in (axis.lo, axis.hi)
+        ],
+    )
@@ -0,0 +1,159 @@
+"""
+Streaming reducers over the results of a roadmap sweep.
+
+A reducer sees every (scenario, costs) pair once, and only keeps what it needs, so its memory use doesn't
+grow with the number of scenarios. Reducers built from different parts of a sweep (e.g. in different
+worker processes) can be merged, and the result doesn't depend on how the sweep was split.
+"""
+import heapq
+import typing as t
+from bisect import bisect_right
+
+from params.roadmap import Scenario
+from .run_scenarios import ScenarioCosts
+
+__all__ = [
+    "Reducer",
+    "TopK",
+    "ParetoFront",
+]
+
+R = t.TypeVar("R", bound="Reducer")
+
+
+class Reducer(t.Protocol):
+    def push(self, scenario: Scenario, costs: ScenarioCosts) -> None:
+        ...
+
+    def merge(self: R, other: R) -> R:
+        """
+        Add everything another reducer of the same kind has seen.
+        """
+        ...
+
+    def empty(self: R) -> R:
+        """
+        A new reducer with the same settings, which hasn't seen anything.
+        """
+        ...
+
+
+_NEGATE_HEX = str.maketrans("0123456789abcdef", "fedcba9876543210")
+
+
+def _negated(fingerprint: str) -> str:
+    # so that in the negated-keys heap, lower fingerprints win ties
+    return fingerprint.translate(_NEGATE_HEX)
+
+
+def _total_npv(costs: ScenarioCosts) -> float:
+    return costs.total_npv
+
+
+class TopK:
+    """
+    The k scenarios with the lowest key, which defaults to the total NPV.
+    The key must be picklable (e.g. a module-level function) for the reducer to be sent to worker processes.
+    Ties are broken by the scenario fingerprint, so the result doesn't depend on the order of the pushes.
+    """
+
+    def __init__(self, k: int, key: t.Callable[[ScenarioCosts], float] = _total_npv):
+        assert k > 0, "k must be positive"
+        self.k = k
+        self.key = key
+        # a max-heap (by negated keys) of the best k, so the worst of them is always at the top.
+        # the counter only keeps the heap from comparing scenarios when the same scenario is pushed twice
+        self._heap: list[tuple[float, str, int, Scenario, ScenarioCosts]] = []
+        self._pushed = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, scenario: Scenario, costs: ScenarioCosts):
+        self._push(-self.key(costs), _negated(scenario.fingerprint), scenario, costs)
+
+    def _push(self, negated_key: float, negated_fingerprint: str, scenario: Scenario, costs: ScenarioCosts):
+        self._pushed += 1
+        entry = (negated_key, negated_fingerprint, self._pushed, scenario, costs)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: "TopK") -> "TopK":
+        for negated_key, negated_fingerprint, _, scenario, costs in other._heap:
+            self._push(negated_key, negated_fingerprint, scenario, costs)
+        return self
+
+    def empty(self) -> "TopK":
+        return TopK(self.k, self.key)
+
+    def results(self) -> list[tuple[Scenario, ScenarioCosts]]:
+        """
+        :return: The best scenarios, best first.
+        """
+        ordered = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [(scenario, costs) for _, _, _, scenario, costs in ordered]
+
+
+Objectives = tuple[float, float, float]
+
+
+def _objectives(costs: ScenarioCosts) -> Objectives:
+    # all minimized
+    return costs.total_npv, costs.total_co2_kg, -costs.renewable_share
+
+
+def _covers(a: Objectives, b: Objectives) -> bool:
+    # a dominates or equals b
+    return a[0] <= b[0] and a[1] <= b[1] and a[2] <= b[2]
+
+
+class ParetoFront:
+    """
+    The scenarios which no other scenario beats in all of (total NPV, total CO2 emitted, renewable share).
+
+    The front is kept sorted by total NPV, so a new point is only compared with the points cheaper than it
+    (which may dominate it) and the points more expensive than it (which it may dominate).
+    Of the scenarios with the exact same objectives, only the one with the lowest fingerprint is kept,
+    so the result doesn't depend on the order of the pushes.
+    """
+
+    def __init__(self):
+        # (objectives, scenario fingerprint) of every point, sorted
+        self._keys: list[tuple[Objectives, str]] = []
+        self._entries: list[tuple[Scenario, ScenarioCosts]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, scenario: Scenario, costs: ScenarioCosts):
+        self._push((_objectives(costs), scenario.fingerprint), scenario, costs)
+
+    def _push(self, key: tuple[Objectives, str], scenario: Scenario, costs: ScenarioCosts):
+        objectives = key[0]
+        split = bisect_right(self._keys, key)
+
+        # only points which are no more expensive can dominate (or equal, with a lower fingerprint) the new point
+        for other, _ in self._keys[:split]:
+            if other[1] <= objectives[1] and other[2] <= objectives[2]:
+                return
+
+        # and only points which are no cheaper can be dominated (or equaled) by it
+        kept = [idx for idx in range(split, len(self._keys)) if not _covers(objectives, self._keys[idx][0])]
+        self._keys[split:] = [key] + [self._keys[idx] for idx in kept]
+        self._entries[split:] = [(scenario, costs)] + [self._entries[idx] for idx in kept]
+
+    def merge(self, other: "ParetoFront") -> "ParetoFront":
+        for key, (scenario, costs) in zip(other._keys, other._entries):
+            self._push(key, scenario, costs)
+        return self
+
+    def empty(self) -> "ParetoFront":
+        return ParetoFront()
+
+    def results(self) -> list[tuple[Scenario, ScenarioCosts]]:
+        """
+        :return: The scenarios on the front, from the cheapest to the most expensive.
+        """
+        return list(self._entries)
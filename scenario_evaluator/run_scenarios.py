@@ -1,62 +1,199 @@
-from dataclasses import dataclass
+import typing as t
+from dataclasses import dataclass, replace
+from functools import cached_property
 
 import numpy as np
 import pandas as pd
-from common import EnergySource
+from common import EmissionType, EnergySource, SimOutFields, SummaryColumns, YearlySummary
 
-from params.roadmap import Scenario, YearlyScenario
+from params.roadmap import Scenario, ScenarioBatch, YearlyScenario
 from params.params import AllParams
-from common import DemandSeries
-from hourly_simulation.predict import predict_demand, predict_solar_production
+from params.compiled import CompiledParams, as_compiled, EMISSION_TYPES, SOURCES
+from common import DemandSeries, check_profile_steps
+from hourly_simulation.costs import YearlySimulationProductionResults, CostArrays, CostTables, \
+    calculate_costs_batch, scenario_capacities, total_npv_lower_bound
+from hourly_simulation.predict import SolarProfile, as_solar_profile, demand_projection, \
+    effective_solar_capacity, predict_solar_production
 from hourly_simulation.strategies import nzo_greedy_strategy
+from hourly_simulation.strategies.nzo_greedy_strategy import BLOCK_FIELDS
+from .cache import YearResultCache, profiles_fingerprint, year_key
 import data
+from data.catalog import DEFAULT_REGION, ProfileCatalog
+
+
+@dataclass
+class ScenarioBlock:
+    """
+    The hourly results of all the years of a scenario, as a single (years x fields x hours) array.
+
+    The fields are ordered as in `BLOCK_FIELDS`, which are the columns of the `nzo_strategy` result.
+    """
+
+    years: np.ndarray
+    values: np.ndarray
+
+    def field(self, field: EnergySource | SimOutFields) -> np.ndarray:
+        """
+        :return: (years x hours) view of a single field.
+        """
+        return self.values[:, BLOCK_FIELDS.index(field)]
+
+    def year_frame(self, year: int) -> pd.DataFrame:
+        """
+        :return: The results of a single year, as returned by `run_scenario_year`.
+        """
+        year_idx = int(np.searchsorted(self.years, year))
+        assert self.years[year_idx] == year, f"{year} is not in the block"
+        return pd.DataFrame(self.values[year_idx].T, columns=list(BLOCK_FIELDS))
+
+    def frames(self) -> list[pd.DataFrame]:
+        return [self.year_frame(year) for year in self.years]
+
+
+@dataclass
+class ScenarioCosts:
+    """
+    The yearly summaries of a scenario, along with their costs.
+    """
+
+    columns: SummaryColumns
+    costs: CostArrays
+    # (years) kg of CO2 emitted by gas and coal
+    co2_kg: np.ndarray
+
+    @cached_property
+    def summaries(self) -> list[YearlySummary]:
+        return self.columns.summaries()
+
+    @property
+    def total_npv(self) -> float:
+        return self.costs.total_npv
+
+    @property
+    def total_co2_kg(self) -> float:
+        return float(self.co2_kg.sum())
+
+    @property
+    def renewable_share(self) -> float:
+        """
+        The renewable share of the last simulated year.
+        """
+        return float(self.columns.renewable_share[-1])
 
 
 def run_scenario(scenario: Scenario, params: AllParams) -> list[pd.DataFrame]:
     original_demand = data.read_2018_demand()
-    solar_prod_ratio = data.get_normalized_solar_prod_ratio()
+    solar_prod_ratio = data.get_solar_profile()
     return run_scenario_ex(original_demand, solar_prod_ratio, scenario, params)
 
 
-# TODO: might be cool to check in the simulation whether we reached the edges of the Roadmap iterator
-#       in the optimal scenario. Could help us find an optimum because if the best value is at the edge, better
-#       values might be lying beyond.
+def run_scenario_block(scenario: Scenario, params: AllParams) -> ScenarioBlock:
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+    return run_scenario_block_ex(original_demand, solar_prod_ratio, scenario, params)
+
+
+def run_scenario_summary(scenario: Scenario, params: AllParams) -> list[YearlySummary]:
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+    return run_scenario_summary_ex(original_demand, solar_prod_ratio, scenario, params)
+
+
+def run_scenario_costs(scenario: Scenario, params: AllParams) -> ScenarioCosts:
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+    return run_scenario_costs_ex(original_demand, solar_prod_ratio, scenario, params)
+
+
 # TODO: add a progress bar?
 def run_scenario_ex(
         original_demand: DemandSeries,
-        solar_prod_ratio: pd.Series,
+        solar_prod_ratio: pd.Series | SolarProfile,
         scenario: Scenario,
         params: AllParams,
+        cache: YearResultCache | None = None,
 ) -> list[pd.DataFrame]:
-    scenario_iter = iter(scenario)
+    """
+    :param cache: If given, years which were already simulated with the same values, params and
+                  input profiles are taken from the cache instead of being simulated again.
+    """
+    solar_prod_ratio = as_solar_profile(solar_prod_ratio)
+    check_profile_steps(original_demand, solar_prod_ratio, params.general.step_minutes)
     year_and_scenario = zip(
-        range(params.general.start_year, params.general.end_year), scenario_iter
+        range(params.general.start_year, params.general.end_year),
+        _working_yearly_scenarios(scenario, params.general.pv_degradation_rate),
     )
 
     results: list[pd.DataFrame] = []
 
+    if cache is None:
+        for year, yearly_scenario in year_and_scenario:
+            results.append(run_scenario_year(year, yearly_scenario, original_demand, solar_prod_ratio, params))
+        return results
+
+    general = params.general.fingerprint
+    profiles = profiles_fingerprint(original_demand, solar_prod_ratio)
     for year, yearly_scenario in year_and_scenario:
-        results.append(run_scenario_year(year, yearly_scenario, original_demand, solar_prod_ratio, params))
+        results.append(cache.get_or_compute(
+            year_key(year, yearly_scenario, general, profiles),
+            lambda: run_scenario_year(year, yearly_scenario, original_demand, solar_prod_ratio, params),
+        ))
 
     return results
 
 
+def _working_yearly_scenarios(scenario: Scenario, pv_degradation_rate: float) -> list[YearlyScenario]:
+    """
+    The yearly values of the scenario, with the solar capacity that is still working after degradation.
+    """
+    solar_capacity_kw = effective_solar_capacity(scenario.solar_capacity_kw, pv_degradation_rate)
+    return [
+        replace(yearly_scenario, solar_capacity_kw=float(capacity))
+        for yearly_scenario, capacity in zip(scenario, solar_capacity_kw)
+    ]
+
+
+def run_scenario_profiles(
+        catalog: ProfileCatalog,
+        scenario: Scenario,
+        params: AllParams,
+        profile_years: t.Iterable[int] | None = None,
+        region: str = DEFAULT_REGION,
+        cache: YearResultCache | None = None,
+) -> t.Iterator[tuple[int, list[pd.DataFrame]]]:
+    """
+    Run a scenario against the demand and solar profiles of several years of the catalog, one after the other.
+    Only the profiles of the current year are loaded, so the whole catalog never has to fit in memory.
+
+    :param profile_years: The years of the profiles, defaults to all the years in the catalog.
+    :return: Iterator of (profile year, `run_scenario_ex` result).
+    """
+    for profile_year, original_demand, solar_prod_ratio in catalog.profiles(profile_years, region):
+        yield profile_year, run_scenario_ex(original_demand, solar_prod_ratio, scenario, params, cache)
+
+
 def run_scenario_year(
         year: int,
         yearly_scenario: YearlyScenario,
         original_demand: DemandSeries,
-        solar_prod_ratio: pd.Series,
+        solar_prod_ratio: pd.Series | SolarProfile,
         params: AllParams
 ):
-    demand_scaled = predict_demand(
-        original_demand, params.general.demand_growth_rate, year
-    )
+    """
+    :param yearly_scenario: The values of the year, where the solar capacity is the capacity that is still working,
+                            see `effective_solar_capacity`.
+    """
+    general = params.general
+    assert general.start_year <= year < general.end_year, f"{year} is not a simulated year"
+    demand_scaled = demand_projection(
+        original_demand, general.demand_growth_rate, general.start_year, general.end_year
+    )[year - general.start_year]
 
     solar_production = predict_solar_production(
-        solar_prod_ratio, yearly_scenario.solar_capacity_kw
+        solar_prod_ratio, yearly_scenario.solar_capacity_kw, general.step_hours
     )
 
-    coal_prod = np.full(len(solar_production), params.general.coal_must_run.at(year))
+    coal_prod = np.full(len(solar_production), general.coal_must_run.at(year) * general.step_hours)
 
     fixed_production = pd.DataFrame({
         EnergySource.SOLAR: solar_production,
@@ -68,11 +205,271 @@ def run_scenario_year(
     scaled_capacity = storage_capacity * (1 - yearly_scenario.storage_min_energy_rate)
 
     result = nzo_greedy_strategy.nzo_strategy(
-        demand_scaled.series,
+        pd.Series(demand_scaled),
         fixed_production,
         scaled_capacity,
         storage_efficiency,
-        params.general.charge_rate,
+        general.charge_rate,
+        general.step_hours,
     )
 
     return result
+
+
+@dataclass
+class _ScenarioMatrices:
+    """
+    The (years x hours) inputs of all the years of a scenario.
+    """
+    years: np.ndarray
+    demand: np.ndarray
+    fixed_production: dict[EnergySource, np.ndarray]
+    storage_capacity_kwh: np.ndarray
+    storage_efficiency: np.ndarray
+
+
+def _demand_matrix(original_demand: DemandSeries, params: CompiledParams, year_count: int) -> np.ndarray:
+    """
+    Read-only (years x hours) demand of the first year_count years.
+    """
+    projection = demand_projection(original_demand, params.demand_growth_rate, params.start_year, params.end_year)
+    return projection[:year_count]
+
+
+def _scenario_matrices(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        scenario: Scenario,
+        params: CompiledParams,
+) -> _ScenarioMatrices:
+    check_profile_steps(original_demand, solar_prod_ratio, params.step_minutes)
+    years = params.years[:len(scenario.solar_capacity_kw)]
+    year_count = len(years)
+
+    demand_scaled = _demand_matrix(original_demand, params, len(years))
+
+    solar_capacity = effective_solar_capacity(scenario.solar_capacity_kw[:year_count], params.pv_degradation_rate)
+    solar_production = as_solar_profile(solar_prod_ratio).production(solar_capacity, params.step_hours)
+
+    coal_must_run = params.coal_must_run[:year_count] * params.step_hours
+    coal_prod = np.broadcast_to(coal_must_run[:, np.newaxis], solar_production.shape)
+
+    storage_capacity = scenario.storage_capacity_kwh[:year_count]
+    scaled_capacity = storage_capacity * (1 - scenario.storage_min_energy_rate[:year_count])
+
+    return _ScenarioMatrices(
+        years=years,
+        demand=demand_scaled,
+        fixed_production={
+            EnergySource.SOLAR: solar_production,
+            EnergySource.COAL: coal_prod,
+        },
+        storage_capacity_kwh=scaled_capacity,
+        storage_efficiency=scenario.storage_efficiency[:year_count],
+    )
+
+
+def run_scenario_block_ex(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        scenario: Scenario,
+        params: AllParams | CompiledParams,
+) -> ScenarioBlock:
+    """
+    Like `run_scenario_ex`, but all years are simulated together.
+
+    The years are independent (every year starts with an empty battery), so the (years x hours) demand,
+    solar and coal matrices are built once and dispatched in a single kernel call.
+    """
+    params = as_compiled(params)
+    matrices = _scenario_matrices(original_demand, solar_prod_ratio, scenario, params)
+
+    values = nzo_greedy_strategy.nzo_strategy_block(
+        matrices.demand,
+        matrices.fixed_production,
+        matrices.storage_capacity_kwh,
+        matrices.storage_efficiency,
+        params.charge_rate,
+        params.step_hours,
+    )
+
+    return ScenarioBlock(matrices.years, values)
+
+
+def _summary_columns_ex(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        scenario: Scenario,
+        params: CompiledParams,
+) -> SummaryColumns:
+    matrices = _scenario_matrices(original_demand, solar_prod_ratio, scenario, params)
+
+    return nzo_greedy_strategy.nzo_strategy_summary_columns(
+        matrices.years,
+        matrices.demand,
+        matrices.fixed_production,
+        matrices.storage_capacity_kwh,
+        matrices.storage_efficiency,
+        params.charge_rate,
+        params.step_hours,
+    )
+
+
+def run_scenario_summary_ex(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        scenario: Scenario,
+        params: AllParams | CompiledParams,
+) -> list[YearlySummary]:
+    """
+    Like `run_scenario_block_ex`, but only the annual totals of every year are kept.
+    """
+    params = as_compiled(params)
+    return _summary_columns_ex(original_demand, solar_prod_ratio, scenario, params).summaries()
+
+
+def production_results(
+        scenario: Scenario,
+        summaries: list[YearlySummary],
+        params: AllParams | CompiledParams,
+) -> list[YearlySimulationProductionResults]:
+    """
+    Convert the yearly summaries of a scenario into the input of `calculate_costs`.
+    """
+    params = as_compiled(params)
+    return [
+        YearlySimulationProductionResults.from_summary(
+            summary, yearly_scenario, params.coal_must_run[params.year_index(summary.year)]
+        )
+        for summary, yearly_scenario in zip(summaries, scenario)
+    ]
+
+
+def _co2_columns(columns: SummaryColumns, params: CompiledParams) -> np.ndarray:
+    """
+    :return: kg of CO2 emitted, in the shape of the columns.
+    """
+    co2_idx = EMISSION_TYPES.index(EmissionType.CO2)
+    gas_co2 = params.emissions[SOURCES.index(EnergySource.GAS), co2_idx]
+    coal_co2 = params.emissions[SOURCES.index(EnergySource.COAL), co2_idx]
+    return columns.gas_kwh * gas_co2 + columns.coal_kwh * coal_co2
+
+
+def run_scenario_costs_ex(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        scenario: Scenario,
+        params: AllParams | CompiledParams,
+) -> ScenarioCosts:
+    """
+    Simulate a scenario in summary mode and calculate the costs of all of its years.
+
+    Cheap enough to be used as the `evaluate` function of a roadmap sweep.
+    """
+    params = as_compiled(params)
+    columns = _summary_columns_ex(original_demand, solar_prod_ratio, scenario, params)
+
+    capacities = scenario_capacities(scenario.batch(), columns.peak_gas_kw[np.newaxis], params.coal_must_run)
+    costs = calculate_costs_batch(capacities[0], columns.gas_kwh + columns.coal_kwh, CostTables.from_compiled(params))
+    return ScenarioCosts(columns, costs, _co2_columns(columns, params))
+
+
+def run_scenario_batch_costs_ex(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        batch: ScenarioBatch,
+        params: AllParams | CompiledParams,
+) -> list[ScenarioCosts]:
+    """
+    Like `run_scenario_costs_ex` for every scenario in the batch, with the same results.
+
+    Every year is dispatched for all the scenarios in a single kernel call, and the costs of all the scenarios
+    are calculated together, straight from the batch columns.
+    Memory use grows with (scenarios x hours), so huge roadmaps should be split into several batches.
+    """
+    params = as_compiled(params)
+    years = params.years[:batch.years]
+    demand_scaled = _demand_matrix(original_demand, params, len(years))
+    solar = as_solar_profile(solar_prod_ratio)
+    check_profile_steps(original_demand, solar, params.step_minutes)
+    solar_capacity = effective_solar_capacity(batch.solar_capacity_kw[:, :len(years)], params.pv_degradation_rate)
+
+    yearly_columns: list[SummaryColumns] = []
+    for year_idx, year in enumerate(years):
+        solar_production = solar.production(solar_capacity[:, year_idx], params.step_hours)
+        coal_prod = np.broadcast_to(params.coal_must_run[year_idx] * params.step_hours, solar_production.shape)
+        scaled_capacity = batch.storage_capacity_kwh[:, year_idx] * (1 - batch.storage_min_energy_rate[:, year_idx])
+
+        yearly_columns.append(nzo_greedy_strategy.nzo_strategy_summary_columns(
+            np.full(len(batch), year),
+            np.broadcast_to(demand_scaled[year_idx], solar_production.shape),
+            {
+                EnergySource.SOLAR: solar_production,
+                EnergySource.COAL: coal_prod,
+            },
+            scaled_capacity,
+            batch.storage_efficiency[:, year_idx],
+            params.charge_rate,
+            params.step_hours,
+        ))
+
+    # (scenarios x years) columns
+    columns = SummaryColumns.stack(yearly_columns, axis=1)
+
+    capacities = scenario_capacities(batch, columns.peak_gas_kw, params.coal_must_run)
+    costs = calculate_costs_batch(capacities, columns.gas_kwh + columns.coal_kwh, CostTables.from_compiled(params))
+    co2_kg = _co2_columns(columns, params)
+    return [
+        ScenarioCosts(columns[idx], costs.scenario(idx), co2_kg[idx])
+        for idx in range(len(batch))
+    ]
+
+
+def scenario_npv_lower_bounds(
+        original_demand: DemandSeries,
+        solar_prod_ratio: pd.Series | SolarProfile,
+        batch: ScenarioBatch,
+        params: AllParams | CompiledParams,
+) -> np.ndarray:
+    """
+    A lower bound of the `ScenarioCosts.total_npv` of every scenario in the batch, without simulating them.
+
+    The bounds only use whole-array operations over the hours, with no hourly dispatch:
+    storage can at most return all the fixed production exceeding demand, so the emitting sources
+    produce at least the rest of the demand, and gas covers at least the average remaining shortage.
+    Gas never has to cover more than the peak demand that the must-run coal doesn't,
+    and the emitting sources never produce more than the whole demand.
+    Memory use grows with (scenarios x hours).
+    """
+    params = as_compiled(params)
+    years = params.years[:batch.years]
+    demand_scaled = _demand_matrix(original_demand, params, len(years))
+    # must-run coal production of every step
+    coal_must_run = params.coal_must_run[:len(years)] * params.step_hours
+    hours = demand_scaled.shape[1] * params.step_hours
+    solar = as_solar_profile(solar_prod_ratio)
+    check_profile_steps(original_demand, solar, params.step_minutes)
+    solar_capacity = effective_solar_capacity(batch.solar_capacity_kw[:, :len(years)], params.pv_degradation_rate)
+
+    min_peak_gas = np.empty((len(batch), len(years)))
+    min_emitting_used = np.empty((len(batch), len(years)))
+    for year_idx in range(len(years)):
+        demand = demand_scaled[year_idx]
+        fixed_gen = solar.production(solar_capacity[:, year_idx], params.step_hours) + coal_must_run[year_idx]
+        # the proportion of fixed production that went to demand, as in `nzo_strategy_summary_columns`
+        fixed_demand_rate = np.divide(np.minimum(demand, fixed_gen), fixed_gen,
+                                      out=np.zeros_like(fixed_gen), where=fixed_gen > 0)
+        coal_used = coal_must_run[year_idx] * fixed_demand_rate.sum(axis=1)
+        # total gas >= total net demand - total fixed over demand
+        min_gas = (demand - fixed_gen).sum(axis=1).clip(min=0)
+
+        min_peak_gas[:, year_idx] = min_gas / hours
+        min_emitting_used[:, year_idx] = coal_used + min_gas
+
+    capacities = scenario_capacities(batch, np.zeros((len(batch), len(years))), params.coal_must_run)
+    return total_npv_lower_bound(
+        capacities,
+        peak_gas_kw=(min_peak_gas, (demand_scaled.max(axis=1) - coal_must_run).clip(min=0) / params.step_hours),
+        emitting_used=(min_emitting_used, demand_scaled.sum(axis=1)),
+        tables=CostTables.from_compiled(params),
+    )
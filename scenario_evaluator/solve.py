@@ -0,0 +1,205 @@
+"""
+Solve for the smallest capacity that reaches a renewable share target in a single year.
+
+With everything else fixed, the renewable share of the greedy NZO dispatch only grows with the storage
+capacity, and with the solar capacity. So instead of simulating a whole grid of capacities,
+the solvers bracket the answer by doubling the capacity, and then bisect the bracket down to the
+requested tolerance, simulating a single year for every step.
+"""
+import typing as t
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import data
+from common import DemandSeries, EnergySource, check_profile_steps
+from hourly_simulation.predict import SolarProfile, as_solar_profile, demand_projection, effective_solar_capacity
+from hourly_simulation.strategies.nzo_greedy_strategy import nzo_renewable_share
+from params.compiled import CompiledParams, as_compiled
+from params.params import AllParams
+from params.roadmap import Scenario
+
+__all__ = [
+    "SolveResult",
+    "min_storage_for_target",
+    "min_solar_for_target",
+]
+
+DEFAULT_STORAGE_TOLERANCE_KWH = 100
+DEFAULT_SOLAR_TOLERANCE_KW = 100
+# the first upper bound to try, if the scenario's own value is 0
+INITIAL_UPPER_BOUND = 1000
+MAX_DOUBLINGS = 64
+
+
+@dataclass
+class SolveResult:
+    """
+    The smallest value found that meets the target, within the tolerance.
+    """
+
+    # None if no value meets the target
+    value: float | None
+    # the renewable share at `value`, or the highest share found if the target can't be met
+    renewable_share: float
+    # number of simulated years
+    evaluations: int
+
+    @property
+    def feasible(self) -> bool:
+        return self.value is not None
+
+
+def _solve_monotone(share_at: t.Callable[[float], float], target: float, initial_hi: float,
+                    tolerance: float) -> SolveResult:
+    """
+    Find the smallest value in [0, inf) where the non-decreasing share_at reaches the target.
+    """
+    evaluations = 0
+
+    def share(value: float) -> float:
+        nonlocal evaluations
+        evaluations += 1
+        return share_at(value)
+
+    lo, lo_share = 0.0, share(0.0)
+    if lo_share >= target:
+        return SolveResult(lo, lo_share, evaluations)
+
+    # double the upper bound until it meets the target, or until it stops helping
+    hi = max(float(initial_hi), tolerance, INITIAL_UPPER_BOUND)
+    hi_share = share(hi)
+    for _ in range(MAX_DOUBLINGS):
+        if hi_share >= target:
+            break
+        if hi_share <= lo_share:
+            # the share stopped growing, so the target can't be reached
+            return SolveResult(None, hi_share, evaluations)
+        lo, lo_share = hi, hi_share
+        hi *= 2
+        hi_share = share(hi)
+    else:
+        return SolveResult(None, hi_share, evaluations)
+
+    while hi - lo > tolerance:
+        mid = (lo + hi) / 2
+        mid_share = share(mid)
+        if mid_share >= target:
+            hi, hi_share = mid, mid_share
+        else:
+            lo = mid
+
+    return SolveResult(hi, hi_share, evaluations)
+
+
+@dataclass
+class _YearInputs:
+    demand: np.ndarray
+    solar: SolarProfile
+    coal_must_run: float
+    solar_capacity_kw: float
+    # the capacity of the older solar panels lost to degradation by the year
+    solar_degradation_kw: float
+    storage_capacity_kwh: float
+    storage_efficiency: float
+    storage_min_energy_rate: float
+    charge_rate: float
+    step_hours: float
+
+    def share(self, solar_capacity_kw: float, storage_capacity_kwh: float) -> float:
+        solar_production = self.solar.production(max(solar_capacity_kw - self.solar_degradation_kw, 0),
+                                                 self.step_hours)
+        return nzo_renewable_share(
+            self.demand,
+            {
+                EnergySource.SOLAR: solar_production,
+                EnergySource.COAL: np.full(len(solar_production), self.coal_must_run * self.step_hours),
+            },
+            storage_capacity_kwh * (1 - self.storage_min_energy_rate),
+            self.storage_efficiency,
+            self.charge_rate,
+            self.step_hours,
+        )
+
+
+def _year_inputs(
+        scenario: Scenario,
+        params: CompiledParams,
+        year: int | None,
+        original_demand: DemandSeries | None,
+        solar_prod_ratio: pd.Series | SolarProfile | None,
+) -> _YearInputs:
+    original_demand = original_demand if original_demand is not None else data.read_2018_demand()
+    solar_prod_ratio = solar_prod_ratio if solar_prod_ratio is not None else data.get_solar_profile()
+    check_profile_steps(original_demand, solar_prod_ratio, params.step_minutes)
+
+    years = params.years[:len(scenario.solar_capacity_kw)]
+    year = int(years[-1]) if year is None else year
+    year_idx = params.year_index(year)
+    assert year_idx < len(years), f"{year} is not in the scenario"
+    solar_capacity_kw = scenario.solar_capacity_kw[year_idx]
+    working_solar_kw = effective_solar_capacity(scenario.solar_capacity_kw[:year_idx + 1], params.pv_degradation_rate)
+
+    return _YearInputs(
+        demand=demand_projection(original_demand, params.demand_growth_rate, params.start_year, params.end_year)[year_idx],
+        solar=as_solar_profile(solar_prod_ratio),
+        coal_must_run=params.coal_must_run[year_idx],
+        solar_capacity_kw=solar_capacity_kw,
+        # changing the capacity of the year only changes the newest cohort, which hasn't degraded yet
+        solar_degradation_kw=solar_capacity_kw - working_solar_kw[-1],
+        storage_capacity_kwh=scenario.storage_capacity_kwh[year_idx],
+        storage_efficiency=scenario.storage_efficiency[year_idx],
+        storage_min_energy_rate=scenario.storage_min_energy_rate[year_idx],
+        charge_rate=params.charge_rate,
+        step_hours=params.step_hours,
+    )
+
+
+def min_storage_for_target(
+        scenario: Scenario,
+        params: AllParams | CompiledParams,
+        renewable_target: float,
+        year: int | None = None,
+        tolerance_kwh: float = DEFAULT_STORAGE_TOLERANCE_KWH,
+        original_demand: DemandSeries | None = None,
+        solar_prod_ratio: pd.Series | SolarProfile | None = None,
+) -> SolveResult:
+    """
+    The smallest storage capacity with which a year of the scenario reaches the renewable share target,
+    keeping the rest of the scenario's values in that year.
+
+    :param renewable_target: Minimal `YearlySummary.renewable_share` of the year.
+    :param year: The year to solve for, defaults to the last year of the scenario.
+    :param tolerance_kwh: The result is at most this much above the true minimum.
+    :param original_demand: Defaults to the demand profile in `data`.
+    :param solar_prod_ratio: Defaults to the solar profile in `data`.
+    """
+    inputs = _year_inputs(scenario, as_compiled(params), year, original_demand, solar_prod_ratio)
+    return _solve_monotone(
+        lambda storage_capacity_kwh: inputs.share(inputs.solar_capacity_kw, storage_capacity_kwh),
+        renewable_target,
+        inputs.storage_capacity_kwh,
+        tolerance_kwh,
+    )
+
+
+def min_solar_for_target(
+        scenario: Scenario,
+        params: AllParams | CompiledParams,
+        renewable_target: float,
+        year: int | None = None,
+        tolerance_kw: float = DEFAULT_SOLAR_TOLERANCE_KW,
+        original_demand: DemandSeries | None = None,
+        solar_prod_ratio: pd.Series | SolarProfile | None = None,
+) -> SolveResult:
+    """
+    Like `min_storage_for_target`, for the solar capacity.
+    """
+    inputs = _year_inputs(scenario, as_compiled(params), year, original_demand, solar_prod_ratio)
+    return _solve_monotone(
+        lambda solar_capacity_kw: inputs.share(solar_capacity_kw, inputs.storage_capacity_kwh),
+        renewable_target,
+        inputs.solar_capacity_kw,
+        tolerance_kw,
+    )
@@ -0,0 +1,220 @@
+"""
+A persistent, columnar store of simulated scenarios.
+
+Every scenario is stored under ``<root>/<params fingerprint>/<scenario fingerprint>/``,
+as a ``meta.json`` file and one ``.npy`` file per field, holding a (years x hours) array.
+The field files are opened memory-mapped, so reading a single year or a single field
+doesn't load the rest of the scenario.
+
+The store is unbounded by default. With ``max_scenarios``, the least recently opened scenarios
+are deleted after every save, so that at most ``max_scenarios`` are kept.
+"""
+import json
+import os
+import shutil
+import tempfile
+import typing as t
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import data
+from common import DemandSeries, EnergySource, SimOutFields, fingerprint_text
+from hourly_simulation.predict import SolarProfile
+from hourly_simulation.strategies.nzo_greedy_strategy import BLOCK_FIELDS
+from params.compiled import CompiledParams, as_compiled
+from params.params import AllParams
+from params.roadmap import Scenario
+from .cache import profiles_fingerprint
+from .run_scenarios import ScenarioBlock, run_scenario_block_ex
+
+__all__ = [
+    "ResultStore",
+    "StoredResult",
+]
+
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+Field = EnergySource | SimOutFields
+_FIELDS_BY_NAME: dict[str, Field] = {field.value: field for field in BLOCK_FIELDS}
+
+
+class StoredResult:
+    """
+    Read-only access to a scenario in a `ResultStore`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path / META_FILE) as f:
+            meta = json.load(f)
+
+        assert meta["version"] == FORMAT_VERSION, f"unsupported result format {meta['version']}"
+        self.years = np.array(meta["years"])
+        self.hours: int = meta["hours"]
+        self.fields: list[Field] = [_FIELDS_BY_NAME[name] for name in meta["fields"]]
+        self._columns: dict[Field, np.ndarray] = {}
+
+    def field(self, field: Field) -> np.ndarray:
+        """
+        :return: Memory-mapped (years x hours) read-only array of a single field.
+        """
+        if field not in self._columns:
+            assert field in self.fields, f"{field} is not stored"
+            self._columns[field] = np.load(self.path / f"{field.value}.npy", mmap_mode="r")
+        return self._columns[field]
+
+    def column(self, field: Field, year: int) -> np.ndarray:
+        """
+        :return: The hourly values of a single field in a single year.
+        """
+        return self.field(field)[self._year_index(year)]
+
+    def year_frame(self, year: int) -> pd.DataFrame:
+        """
+        :return: The results of a single year, as returned by `run_scenario_year`.
+        """
+        year_idx = self._year_index(year)
+        return pd.DataFrame({field: np.array(self.field(field)[year_idx]) for field in self.fields})
+
+    def block(self) -> ScenarioBlock:
+        """
+        Load all the fields of all the years.
+        """
+        return ScenarioBlock(self.years, np.stack([self.field(field) for field in self.fields], axis=1))
+
+    def _year_index(self, year: int) -> int:
+        year_idx = int(np.searchsorted(self.years, year))
+        assert year_idx < len(self.years) and self.years[year_idx] == year, f"{year} is not stored"
+        return year_idx
+
+
+class ResultStore:
+    """
+    Simulation results on disk, keyed by the scenario, the params and the input profiles.
+
+    Writes are atomic: a scenario is written to a temporary directory which is then renamed into place,
+    so readers (and concurrent writers of the same scenario) never see a partially written result.
+    """
+
+    def __init__(self, root: str | os.PathLike, max_scenarios: int | None = None):
+        """
+        :param max_scenarios: If given, the least recently used scenarios are deleted beyond this many.
+        """
+        assert max_scenarios is None or max_scenarios > 0, "max_scenarios must be positive"
+        self.root = Path(root)
+        self.max_scenarios = max_scenarios
+
+    def path(
+            self,
+            scenario: Scenario,
+            params: AllParams | CompiledParams,
+            original_demand: DemandSeries | None = None,
+            solar_prod_ratio: pd.Series | SolarProfile | None = None,
+    ) -> Path:
+        """
+        The directory of a scenario. The profiles default to the ones in `data`.
+        """
+        original_demand = original_demand if original_demand is not None else data.read_2018_demand()
+        solar_prod_ratio = solar_prod_ratio if solar_prod_ratio is not None else \
+            data.get_solar_profile()
+
+        inputs = fingerprint_text(
+            as_compiled(params).fingerprint + profiles_fingerprint(original_demand, solar_prod_ratio)
+        )
+        return self.root / inputs / scenario.fingerprint
+
+    def open(self, scenario: Scenario, params: AllParams | CompiledParams, *profiles) -> StoredResult | None:
+        """
+        :return: The stored result, or None if the scenario wasn't stored with these params.
+        """
+        path = self.path(scenario, params, *profiles)
+        if not (path / META_FILE).exists():
+            return None
+        # the modification time of the meta file is the last use, see `prune`
+        os.utime(path / META_FILE)
+        return StoredResult(path)
+
+    def stored(self) -> list[Path]:
+        """
+        The directories of all the stored scenarios, least recently used first.
+        """
+        metas = [(meta.stat().st_mtime, meta.parent) for meta in self.root.glob(f"*/*/{META_FILE}")]
+        return [path for _, path in sorted(metas)]
+
+    def prune(self, max_scenarios: int):
+        """
+        Delete the least recently used scenarios, so that at most max_scenarios are kept.
+        """
+        stored = self.stored()
+        for path in stored[:max(len(stored) - max_scenarios, 0)]:
+            shutil.rmtree(path, ignore_errors=True)
+            try:
+                # drop the params directory along with its last scenario
+                path.parent.rmdir()
+            except OSError:
+                pass
+
+    def save(
+            self,
+            scenario: Scenario,
+            params: AllParams | CompiledParams,
+            block: ScenarioBlock,
+            *profiles,
+    ) -> StoredResult:
+        path = self.path(scenario, params, *profiles)
+        if (path / META_FILE).exists():
+            return StoredResult(path)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=path.parent, prefix=".tmp-"))
+        try:
+            for field_idx, field in enumerate(BLOCK_FIELDS):
+                np.save(tmp_path / f"{field.value}.npy", np.ascontiguousarray(block.values[:, field_idx]))
+
+            meta = {
+                "version": FORMAT_VERSION,
+                "years": [int(year) for year in block.years],
+                "hours": block.values.shape[2],
+                "fields": [field.value for field in BLOCK_FIELDS],
+            }
+            with open(tmp_path / META_FILE, "w") as f:
+                json.dump(meta, f)
+
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # someone else stored the same scenario first
+                if not (path / META_FILE).exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        if self.max_scenarios is not None:
+            self.prune(self.max_scenarios)
+        return StoredResult(path)
+
+    def get_or_run(
+            self,
+            scenario: Scenario,
+            params: AllParams | CompiledParams,
+            original_demand: DemandSeries | None = None,
+            solar_prod_ratio: pd.Series | SolarProfile | None = None,
+            run: t.Callable[..., ScenarioBlock] = run_scenario_block_ex,
+    ) -> StoredResult:
+        """
+        Open a stored scenario, simulating and storing it first if it isn't stored yet.
+        """
+        original_demand = original_demand if original_demand is not None else data.read_2018_demand()
+        solar_prod_ratio = solar_prod_ratio if solar_prod_ratio is not None else \
+            data.get_solar_profile()
+        params = as_compiled(params)
+
+        stored = self.open(scenario, params, original_demand, solar_prod_ratio)
+        if stored is not None:
+            return stored
+
+        block = run(original_demand, solar_prod_ratio, scenario, params)
+        return self.save(scenario, params, block, original_demand, solar_prod_ratio)
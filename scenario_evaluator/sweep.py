@@ -0,0 +1,308 @@
+"""
+Evaluate every scenario of a roadmap, spread over a pool of worker processes.
+
+The scenarios are submitted in chunks, with a bounded number of chunks in flight, and results are
+yielded in the same order as `Roadmap.scenarios` regardless of which worker finished first.
+
+Every task is a slice of the lazy `ScenarioSpace`, so only the end values of the roadmap are sent to
+the workers, which build the scenarios of their slice themselves.
+The hourly input profiles are published once into shared memory, and every worker attaches to them
+zero-copy, so memory use stays flat as the number of workers grows.
+The params are compiled once, and only the compiled snapshot is sent to the workers.
+So every evaluator receives `CompiledParams`: `run_scenario_block_ex`, `run_scenario_summary_ex`
+and `run_scenario_costs_ex` accept them, but `run_scenario_ex` reads `AllParams.general` and can't be used.
+"""
+import os
+import typing as t
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+
+import numpy as np
+
+import data
+from common import DemandSeries
+from data.shared import SharedProfiles, publish_profiles
+from hourly_simulation.predict import SolarProfile
+from params.params import AllParams
+from params.compiled import CompiledParams, as_compiled
+from params.roadmap import Roadmap, Scenario, ScenarioSpace
+from .reducers import Reducer
+from .run_scenarios import ScenarioCosts, run_scenario_block_ex, run_scenario_costs_ex, scenario_npv_lower_bounds
+
+__all__ = [
+    "iter_roadmap",
+    "run_roadmap",
+    "reduce_roadmap",
+    "PrunedSweep",
+    "run_roadmap_pruned",
+]
+
+T = t.TypeVar("T")
+Evaluator = t.Callable[[DemandSeries, SolarProfile, Scenario, CompiledParams], T]
+
+DEFAULT_CHUNK_SIZE = 4
+# scenarios whose lower bounds are computed together
+BOUND_BATCH_SIZE = 256
+# chunks in flight per worker, so workers don't idle while the parent collects results
+IN_FLIGHT_PER_WORKER = 2
+
+# set in every worker process by `_init_worker`
+_worker_inputs: tuple[DemandSeries, SolarProfile, CompiledParams, Evaluator] | None = None
+# keeps the shared profiles mapped for the lifetime of the worker
+_worker_shm = None
+
+
+def _init_worker(profiles: SharedProfiles, params: CompiledParams, evaluate: Evaluator):
+    """
+    Attach to the shared hourly input data once per worker, rather than loading it once per task.
+    """
+    global _worker_inputs, _worker_shm
+    _worker_shm, original_demand, solar_prod_ratio = profiles.attach()
+    _worker_inputs = (original_demand, solar_prod_ratio, params, evaluate)
+
+
+def _run_chunk(chunk: t.Sequence[Scenario]) -> list[T]:
+    original_demand, solar_prod_ratio, params, evaluate = _worker_inputs
+    return [evaluate(original_demand, solar_prod_ratio, scenario, params) for scenario in chunk]
+
+
+def _reduce_chunk(chunk: ScenarioSpace, reducers: list[Reducer]) -> list[Reducer]:
+    """
+    Evaluate a chunk into empty copies of the reducers, so only the partial reductions are sent back.
+    """
+    original_demand, solar_prod_ratio, params, evaluate = _worker_inputs
+    partial = [reducer.empty() for reducer in reducers]
+    for scenario in chunk:
+        costs = evaluate(original_demand, solar_prod_ratio, scenario, params)
+        for reducer in partial:
+            reducer.push(scenario, costs)
+    return partial
+
+
+def _chunks(scenarios: ScenarioSpace, size: int) -> t.Iterator[ScenarioSpace]:
+    for start in range(0, len(scenarios), size):
+        yield scenarios[start:start + size]
+
+
+def iter_roadmap(
+        roadmap: Roadmap,
+        params: AllParams | CompiledParams,
+        workers: int | None = None,
+        evaluate: Evaluator = run_scenario_block_ex,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int | None = None,
+) -> t.Iterator[tuple[Scenario, T]]:
+    """
+    Lazily evaluate every scenario of a roadmap.
+
+    :param roadmap: The roadmap whose scenarios are evaluated.
+    :param params: The model parameters, compiled (unless they already are) and sent once to every worker.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+                    With a single worker everything runs in the current process.
+    :param evaluate: Picklable function with the signature of `run_scenario_block_ex`,
+                     which receives `CompiledParams`, not `AllParams`.
+    :param chunk_size: Number of scenarios in every submitted task.
+    :param max_in_flight: Maximum number of submitted but uncollected tasks.
+    :return: Iterator of (scenario, result), in the order of `roadmap.scenarios`.
+    """
+    workers = workers or os.cpu_count() or 1
+    params = as_compiled(params)
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+
+    if workers == 1:
+        for scenario in roadmap.scenarios:
+            yield scenario, evaluate(original_demand, solar_prod_ratio, scenario, params)
+        return
+
+    max_in_flight = max_in_flight or workers * IN_FLIGHT_PER_WORKER
+    chunks = _chunks(roadmap.scenarios, chunk_size)
+    in_flight: deque[tuple[ScenarioSpace, Future]] = deque()
+
+    with publish_profiles(original_demand, solar_prod_ratio) as profiles, \
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(profiles, params, evaluate)) as pool:
+        def submit(count: int):
+            for chunk in islice(chunks, count):
+                in_flight.append((chunk, pool.submit(_run_chunk, chunk)))
+
+        submit(max_in_flight)
+
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            results = future.result()
+            submit(1)
+            yield from zip(chunk, results)
+
+
+def run_roadmap(
+        roadmap: Roadmap,
+        params: AllParams | CompiledParams,
+        workers: int | None = None,
+        evaluate: Evaluator = run_scenario_block_ex,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int | None = None,
+) -> list[tuple[Scenario, T]]:
+    """
+    Evaluate every scenario of a roadmap over a process pool, see `iter_roadmap`.
+
+    :return: (scenario, result) for every scenario, in the order of `roadmap.scenarios`.
+    """
+    return list(iter_roadmap(roadmap, params, workers, evaluate, chunk_size, max_in_flight))
+
+
+def reduce_roadmap(
+        roadmap: Roadmap,
+        params: AllParams | CompiledParams,
+        reducers: list[Reducer],
+        workers: int | None = None,
+        evaluate: Evaluator = run_scenario_costs_ex,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int | None = None,
+) -> list[Reducer]:
+    """
+    Evaluate every scenario of a roadmap into streaming reducers (see `reducers`), without keeping the results.
+
+    Every worker reduces its own chunks, and the partial reducers are merged into the given ones.
+
+    :param reducers: The reducers to update; they are returned for convenience.
+    :param evaluate: Picklable function with the signature of `run_scenario_costs_ex`.
+    See `iter_roadmap` for the other parameters.
+    """
+    workers = workers or os.cpu_count() or 1
+    params = as_compiled(params)
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+
+    if workers == 1:
+        for scenario in roadmap.scenarios:
+            costs = evaluate(original_demand, solar_prod_ratio, scenario, params)
+            for reducer in reducers:
+                reducer.push(scenario, costs)
+        return reducers
+
+    max_in_flight = max_in_flight or workers * IN_FLIGHT_PER_WORKER
+    chunks = _chunks(roadmap.scenarios, chunk_size)
+    empty = [reducer.empty() for reducer in reducers]
+    in_flight: deque[Future] = deque()
+
+    with publish_profiles(original_demand, solar_prod_ratio) as profiles, \
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(profiles, params, evaluate)) as pool:
+        def submit(count: int):
+            for chunk in islice(chunks, count):
+                in_flight.append(pool.submit(_reduce_chunk, chunk, empty))
+
+        submit(max_in_flight)
+
+        while in_flight:
+            partial = in_flight.popleft().result()
+            submit(1)
+            for reducer, chunk_reducer in zip(reducers, partial):
+                reducer.merge(chunk_reducer)
+
+    return reducers
+
+
+@dataclass
+class PrunedSweep:
+    """
+    The cheapest scenario of a roadmap, found by `run_roadmap_pruned`.
+    """
+
+    # None if no scenario meets the renewable share target
+    scenario: Scenario | None
+    costs: ScenarioCosts | None
+    # number of simulated scenarios
+    evaluated: int
+    # number of scenarios which were skipped, since their lower bound was no better than the best found
+    pruned: int
+
+
+def _npv_lower_bounds(
+        roadmap: Roadmap,
+        params: CompiledParams,
+        original_demand: DemandSeries,
+        solar_prod_ratio: SolarProfile,
+) -> np.ndarray:
+    scenarios = roadmap.scenarios
+    return np.concatenate([
+        scenario_npv_lower_bounds(original_demand, solar_prod_ratio, scenarios[start:start + BOUND_BATCH_SIZE].batch(),
+                                  params)
+        for start in range(0, len(scenarios), BOUND_BATCH_SIZE)
+    ] or [np.empty(0)])
+
+
+def run_roadmap_pruned(
+        roadmap: Roadmap,
+        params: AllParams | CompiledParams,
+        renewable_target: float = 0,
+        workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> PrunedSweep:
+    """
+    Find the scenario of the roadmap with the lowest total NPV that meets a renewable share target,
+    using branch-and-bound to skip simulating scenarios that can't be the cheapest.
+
+    A cheap lower bound of the NPV of every scenario is calculated from its capacities alone
+    (see `scenario_npv_lower_bounds`), and the scenarios are simulated in order of their bounds.
+    Once the best NPV found is no higher than the next bound, all the remaining scenarios are pruned.
+
+    :param renewable_target: Minimal renewable share of the last year, see `ScenarioCosts.renewable_share`.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+                    With a single worker everything runs in the current process.
+    :param chunk_size: Number of scenarios in every submitted task.
+    """
+    workers = workers or os.cpu_count() or 1
+    params = as_compiled(params)
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_solar_profile()
+
+    scenarios = roadmap.scenarios
+    bounds = _npv_lower_bounds(roadmap, params, original_demand, solar_prod_ratio)
+    order = np.argsort(bounds, kind="stable")
+
+    best: tuple[float, Scenario | None, ScenarioCosts | None] = (np.inf, None, None)
+    evaluated = 0
+
+    def collect(chunk: list[Scenario], results: list[ScenarioCosts]):
+        nonlocal best, evaluated
+        evaluated += len(chunk)
+        for scenario, costs in zip(chunk, results):
+            if costs.renewable_share >= renewable_target and costs.total_npv < best[0]:
+                best = (costs.total_npv, scenario, costs)
+
+    def next_chunk(position: int) -> list[Scenario]:
+        """
+        The next scenarios in bound order, stopping at the first one that can't beat the best found.
+        """
+        chunk = []
+        for scenario_idx in order[position:position + chunk_size]:
+            if bounds[scenario_idx] >= best[0]:
+                break
+            chunk.append(scenarios[int(scenario_idx)])
+        return chunk
+
+    position = 0
+    if workers == 1:
+        while chunk := next_chunk(position):
+            position += len(chunk)
+            collect(chunk, [run_scenario_costs_ex(original_demand, solar_prod_ratio, scenario, params)
+                            for scenario in chunk])
+    else:
+        in_flight: deque[tuple[list[Scenario], Future]] = deque()
+        with publish_profiles(original_demand, solar_prod_ratio) as profiles, \
+                ProcessPoolExecutor(workers, initializer=_init_worker,
+                                    initargs=(profiles, params, run_scenario_costs_ex)) as pool:
+            while True:
+                while len(in_flight) < workers * IN_FLIGHT_PER_WORKER and (chunk := next_chunk(position)):
+                    position += len(chunk)
+                    in_flight.append((chunk, pool.submit(_run_chunk, chunk)))
+                if not in_flight:
+                    break
+
+                chunk, future = in_flight.popleft()
+                collect(chunk, future.result())
+
+    _, scenario, costs = best
+    return PrunedSweep(scenario, costs, evaluated, len(scenarios) - evaluated)
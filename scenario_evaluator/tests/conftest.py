@@ -0,0 +1,73 @@
+"""
+Roadmaps and params shared by the tests of the scenario evaluator.
+"""
+import pytest
+
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from params.roadmap import Roadmap, RoadmapParam
+
+
+@pytest.fixture
+def roadmap() -> Roadmap:
+    """
+    Every year of the default params, with a large number of scenarios.
+    """
+    return Roadmap(
+        start_year=2020,
+        end_year=2050,
+        solar_capacity_kw=RoadmapParam(
+            start=4_000, end_min=50_000, end_max=150_000, step=20_000
+        ),
+        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=3_000, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=400_000, step=50_000),
+        storage_efficiency=RoadmapParam(
+            start=0.85,
+            end_min=0.9,
+            end_max=0.95,
+            step=0.05,
+        ),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
+    )
+
+
+@pytest.fixture
+def small_roadmap() -> Roadmap:
+    """
+    A few years and a dozen scenarios, for the sweeps.
+    """
+    return Roadmap(
+        start_year=2020,
+        end_year=2023,
+        solar_capacity_kw=RoadmapParam(start=4_000, end_min=50_000, end_max=110_000, step=20_000),
+        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=350, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=150_000, step=50_000),
+        storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.95, step=0.05),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
+    )
+
+
+@pytest.fixture
+def grid_roadmap() -> Roadmap:
+    """
+    A fine grid of solar and storage end values, for the searches over a roadmap.
+    """
+    return Roadmap(
+        start_year=2020,
+        end_year=2023,
+        solar_capacity_kw=RoadmapParam(start=0, end_min=20_000, end_max=300_000, step=20_000),
+        wind_capacity_kw=RoadmapParam(start=0, end_min=100, end_max=101, step=100),
+        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=450_000, step=50_000),
+        storage_efficiency=RoadmapParam(start=0.85, end_min=0.9, end_max=0.91, step=0.05),
+        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.1, end_max=0.11, step=0.05),
+    )
+
+
+@pytest.fixture
+def grid_params() -> AllParams:
+    """
+    The default params, over the years of `grid_roadmap`.
+    """
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = 2023
+    return params
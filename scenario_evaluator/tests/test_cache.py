@@ -0,0 +1,52 @@
+import pandas as pd
+
+import data
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from scenario_evaluator.cache import YearResultCache
+from scenario_evaluator.run_scenarios import run_scenario_ex
+
+
+def test_cached_years_match_simulation(small_roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.start_year = 2020
+    params.general.end_year = 2023
+    original_demand = data.read_2018_demand()
+    solar_prod_ratio = data.get_normalized_solar_prod_ratio()
+    scenarios = list(small_roadmap.scenarios)
+    cache = YearResultCache()
+
+    for scenario in scenarios:
+        cached = run_scenario_ex(original_demand, solar_prod_ratio, scenario, params, cache)
+        expected = run_scenario_ex(original_demand, solar_prod_ratio, scenario, params)
+        for cached_year, expected_year in zip(cached, expected):
+            pd.testing.assert_frame_equal(cached_year, expected_year)
+
+    # the first year is shared by all scenarios, and is only simulated once
+    assert len(scenarios) > 1 and cache.hits > 0
+    assert cache.misses == len(scenarios) * 2 + 1
+    assert cache.hits == len(scenarios) - 1
+
+    # different params are not served from the cache
+    params.general.charge_rate /= 2
+    run_scenario_ex(original_demand, solar_prod_ratio, scenarios[0], params, cache)
+    assert cache.hits == len(scenarios) - 1
+
+
+def test_cache_eviction_and_spill(tmp_path):
+    frame = pd.DataFrame({"a": range(1000)}, dtype=float)
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = YearResultCache(max_bytes=size * 2, spill_dir=tmp_path)
+
+    keys = [(2020 + i, "scenario", "params", "profiles") for i in range(3)]
+    for key in keys:
+        cache.put(key, frame + key[0])
+
+    assert len(cache) == 2 and cache.nbytes <= size * 2
+    assert keys[0] in cache
+    pd.testing.assert_frame_equal(cache.get(keys[0]), frame + 2020)
+    assert cache.get((2030, "scenario", "params", "profiles")) is None
+
+    # results are copied in and out
+    cache.get(keys[0])["a"] = 0
+    pd.testing.assert_frame_equal(cache.get(keys[0]), frame + 2020)
@@ -0,0 +1,45 @@
+import data
+from scenario_evaluator.optimize import optimize_roadmap
+from scenario_evaluator.run_scenarios import run_scenario_batch_costs_ex
+
+RENEWABLE_TARGET = 0.85
+
+
+def test_optimize_matches_grid(grid_roadmap, grid_params):
+    params, roadmap = grid_params, grid_roadmap
+    space = roadmap.scenarios
+    grid = run_scenario_batch_costs_ex(data.read_2018_demand(), data.get_normalized_solar_prod_ratio(),
+                                       space.batch(), params)
+    best_npv = min(costs.total_npv for costs in grid if costs.renewable_share >= RENEWABLE_TARGET)
+
+    # only search within the roadmap ranges
+    fixed = {
+        "wind_capacity_kw": (100, 100),
+        "storage_efficiency": (0.9, 0.9),
+        "storage_min_energy_rate": (0.1, 0.1),
+    }
+    res = optimize_roadmap(roadmap, params, RENEWABLE_TARGET, hard_limits=fixed)
+
+    assert res.feasible
+    assert res.costs.total_npv <= best_npv * (1 + 1e-9)
+    assert res.evaluations < len(space) / 4
+    assert res.extended == [] and res.on_boundary == []
+
+
+def test_optimize_extends_ranges(grid_roadmap, grid_params):
+    res = optimize_roadmap(grid_roadmap, grid_params, RENEWABLE_TARGET)
+
+    # a better battery is always cheaper, up to the hard limits
+    assert res.end_values["storage_efficiency"] == 1
+    assert res.end_values["storage_min_energy_rate"] == 0
+    assert {"storage_efficiency", "storage_min_energy_rate"} <= set(res.extended)
+    assert {"storage_efficiency", "storage_min_energy_rate"} <= set(res.on_boundary)
+    assert res.ranges["storage_efficiency"][1] == 1
+
+
+def test_optimize_only_extends_evaluated_ranges(grid_roadmap, grid_params):
+    # the candidates beyond the battery ranges are skipped once out of evaluations
+    res = optimize_roadmap(grid_roadmap, grid_params, RENEWABLE_TARGET, max_evaluations=2)
+
+    assert res.evaluations == 2
+    assert res.extended == []
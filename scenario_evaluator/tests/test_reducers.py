@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from params.roadmap import Scenario
+from scenario_evaluator import reduce_roadmap
+from scenario_evaluator.reducers import ParetoFront, TopK
+from scenario_evaluator.run_scenarios import ScenarioCosts
+
+
+class FakeCosts(ScenarioCosts):
+    def __init__(self, total_npv: float, total_co2_kg: float, renewable_share: float):
+        self._values = (total_npv, total_co2_kg, renewable_share)
+
+    total_npv = property(lambda self: self._values[0])
+    total_co2_kg = property(lambda self: self._values[1])
+    renewable_share = property(lambda self: self._values[2])
+
+
+def make_points(count: int):
+    rng = np.random.default_rng(7)
+    values = rng.integers(0, 20, (count, 3))
+    scenarios = [Scenario(*(np.full(2, float(idx)) for _ in range(5))) for idx in range(count)]
+    return [(scenario, FakeCosts(*map(float, value))) for scenario, value in zip(scenarios, values)]
+
+
+def brute_force_front(points):
+    def objectives(costs):
+        return costs.total_npv, costs.total_co2_kg, -costs.renewable_share
+
+    front = []
+    for scenario, costs in points:
+        a = objectives(costs)
+        if not any(all(x <= y for x, y in zip(objectives(other), a)) and objectives(other) != a
+                   for _, other in points):
+            front.append(objectives(costs))
+    return sorted(set(front))
+
+
+def test_reducers_merge_matches_single_pass():
+    points = make_points(300)
+    shuffled = random.Random(3).sample(points, len(points))
+
+    top, front = TopK(10), ParetoFront()
+    for scenario, costs in points:
+        top.push(scenario, costs)
+        front.push(scenario, costs)
+
+    parts = [(TopK(10), ParetoFront()) for _ in range(4)]
+    for idx, (scenario, costs) in enumerate(shuffled):
+        for reducer in parts[idx % 4]:
+            reducer.push(scenario, costs)
+    merged_top, merged_front = TopK(10), ParetoFront()
+    for part_top, part_front in parts:
+        merged_top.merge(part_top)
+        merged_front.merge(part_front)
+
+    expected_top = sorted(points, key=lambda point: (point[1].total_npv, point[0].fingerprint))[:10]
+    assert [scenario for scenario, _ in top.results()] == [scenario for scenario, _ in expected_top]
+    assert [scenario for scenario, _ in merged_top.results()] == [scenario for scenario, _ in expected_top]
+
+    expected_front = brute_force_front(points)
+    for reducer in (front, merged_front):
+        objectives = [(c.total_npv, c.total_co2_kg, -c.renewable_share) for _, c in reducer.results()]
+        assert objectives == expected_front
+
+
+def test_pareto_front_ties_are_order_independent():
+    (first, first_costs), (second, _) = make_points(2)
+    points = [(first, first_costs), (second, first_costs)]
+    lowest = min(first, second, key=lambda scenario: scenario.fingerprint)
+
+    for ordered in (points, points[::-1]):
+        front = ParetoFront()
+        for scenario, costs in ordered:
+            front.push(scenario, costs)
+        assert [scenario for scenario, _ in front.results()] == [lowest]
+
+
+def test_reduce_roadmap(small_roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = 2023
+    roadmap = small_roadmap
+
+    top, front = reduce_roadmap(roadmap, params, [TopK(2), ParetoFront()], workers=2, chunk_size=2)
+    seq_top, seq_front = reduce_roadmap(roadmap, params, [TopK(2), ParetoFront()], workers=1)
+
+    assert len(top) == 2 and 1 <= len(front) <= len(roadmap.scenarios)
+    assert [s for s, _ in top.results()] == [s for s, _ in seq_top.results()]
+    assert [s for s, _ in front.results()] == [s for s, _ in seq_front.results()]
+    assert top.results()[0][1].total_npv <= top.results()[1][1].total_npv
@@ -1,29 +1,152 @@
 from cProfile import run
+from dataclasses import astuple
 
+import numpy as np
+import pandas as pd
+import pytest
+
+from common import EnergySource, SimOutFields
 from data.defaults import DEFAULT_PARAMS
 from scenario_evaluator import run_scenarios
-from params.roadmap import Scenario, Roadmap, RoadmapParam
 from params.params import AllParams
+from hourly_simulation.costs import calculate_cost_arrays
+import data
+from data.catalog import ProfileCatalog, ProfileKey, ProfileKind
+from data.reader import DEMAND_JSON, SOLAR_CSV
 import logging
 
-def test_run_scenarios():
-    r = Roadmap(
-        start_year=2020,
-        end_year=2050,
-        solar_capacity_kw=RoadmapParam(
-            start=4_000, end_min=50_000, end_max=150_000, step=20_000
-        ),
-        wind_capacity_kw=RoadmapParam(start=80, end_min=250, end_max=3_000, step=100),
-        storage_capacity_kwh=RoadmapParam(start=0, end_min=50_000, end_max=400_000, step=50_000),
-        storage_efficiency=RoadmapParam(
-            start=0.85,
-            end_min=0.9,
-            end_max=0.95,
-            step=0.05,
-        ),
-        storage_min_energy_rate=RoadmapParam(start=0.2, end_min=0.05, end_max=0.1, step=0.05),
-    )
 
-    scenario = next(r.scenarios)
+def test_run_scenarios(roadmap):
+    scenario = roadmap.scenarios[0]
     params = AllParams(**DEFAULT_PARAMS)
     res = run_scenarios.run_scenario(scenario, params)
+
+
+def test_run_scenario_block(roadmap):
+    scenario = roadmap.scenarios[0]
+    params = AllParams(**DEFAULT_PARAMS)
+    frames = run_scenarios.run_scenario(scenario, params)
+    block = run_scenarios.run_scenario_block(scenario, params)
+
+    assert block.values.shape[:2] == (len(frames), len(frames[0].columns))
+    for year, expected in zip(block.years, frames):
+        pd.testing.assert_frame_equal(block.year_frame(year), expected)
+
+
+def test_run_scenario_summary(roadmap):
+    scenario = roadmap.scenarios[0]
+    params = AllParams(**DEFAULT_PARAMS)
+    block = run_scenarios.run_scenario_block(scenario, params)
+    summaries = run_scenarios.run_scenario_summary(scenario, params)
+
+    gas = block.field(EnergySource.GAS)
+    np.testing.assert_allclose([s.gas_kwh for s in summaries], gas.sum(axis=1))
+    np.testing.assert_allclose([s.peak_gas_kw for s in summaries], gas.max(axis=1))
+    np.testing.assert_array_equal([s.peak_gas_hour for s in summaries], gas.argmax(axis=1))
+    np.testing.assert_allclose([s.coal_kwh for s in summaries], np.nansum(block.field(EnergySource.COAL), axis=1))
+    np.testing.assert_allclose([s.solar_kwh for s in summaries], np.nansum(block.field(EnergySource.SOLAR), axis=1))
+    np.testing.assert_allclose([s.storage_discharge_kwh for s in summaries],
+                               block.field(EnergySource.STORAGE).sum(axis=1))
+    np.testing.assert_allclose([s.curtailed_kwh for s in summaries],
+                               block.field(SimOutFields.CURTAILED_ENERGY).sum(axis=1))
+
+    production = run_scenarios.production_results(scenario, summaries, params)
+    assert len(production) == len(summaries)
+    assert production[-1].installed_gas_kw == summaries[-1].peak_gas_kw
+
+
+def test_run_scenario_costs(roadmap):
+    scenario = roadmap.scenarios[0]
+    params = AllParams(**DEFAULT_PARAMS)
+    res = run_scenarios.run_scenario_costs(scenario, params)
+
+    assert len(res.summaries) == params.general.end_year - params.general.start_year
+    assert res.costs.npv.shape == (len(res.summaries), len(EnergySource))
+    assert np.isfinite(res.total_npv)
+    assert 0 <= res.renewable_share <= 1
+    assert res.renewable_share == res.summaries[-1].renewable_share
+
+    # the costs match the per-year production results path
+    production = run_scenarios.production_results(scenario, res.summaries, params)
+    np.testing.assert_allclose(res.total_npv, calculate_cost_arrays(production, params).total_npv)
+
+
+def test_run_scenario_batch_costs(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    space = roadmap.scenarios[::37]
+    results = run_scenarios.run_scenario_batch_costs_ex(
+        data.read_2018_demand(), data.get_normalized_solar_prod_ratio(), space.batch(), params
+    )
+
+    assert len(results) == len(space)
+    for scenario, res in zip(space, results):
+        expected = run_scenarios.run_scenario_costs(scenario, params)
+        # the totals are summed over differently laid out arrays, so they may differ in the last bits
+        np.testing.assert_allclose([astuple(s) for s in res.summaries], [astuple(s) for s in expected.summaries])
+        np.testing.assert_allclose(res.costs.npv, expected.costs.npv)
+        np.testing.assert_allclose(res.total_npv, expected.total_npv)
+
+
+def test_run_scenario_year_out_of_range(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    yearly_scenario = next(iter(roadmap.scenarios[0]))
+    with pytest.raises(AssertionError):
+        run_scenarios.run_scenario_year(params.general.start_year - 1, yearly_scenario, data.read_2018_demand(),
+                                        data.get_solar_profile(), params)
+
+
+def test_profile_steps_must_match_step_length(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.step_minutes = 15
+    scenario = roadmap.scenarios[0]
+    original_demand, solar = data.read_2018_demand(), data.get_solar_profile()
+
+    # hourly profiles can't be simulated in 15 minute steps
+    with pytest.raises(AssertionError):
+        run_scenarios.run_scenario_ex(original_demand, solar, scenario, params)
+    with pytest.raises(AssertionError):
+        run_scenarios.run_scenario_block_ex(original_demand, solar, scenario, params)
+    with pytest.raises(AssertionError):
+        run_scenarios.run_scenario_batch_costs_ex(original_demand, solar, roadmap.scenarios[:2].batch(), params)
+    with pytest.raises(AssertionError):
+        run_scenarios.scenario_npv_lower_bounds(original_demand, solar, roadmap.scenarios[:2].batch(), params)
+
+
+def test_run_scenario_profiles(roadmap, tmp_path):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = params.general.start_year + 2
+    scenario = roadmap.scenarios[0]
+    catalog = ProfileCatalog(cache_dir=tmp_path, max_resident=2)
+    for year in (2017, 2018):
+        catalog.register(ProfileKey(ProfileKind.DEMAND, year), DEMAND_JSON)
+        catalog.register(ProfileKey(ProfileKind.SOLAR, year), SOLAR_CSV)
+
+    results = dict(run_scenarios.run_scenario_profiles(catalog, scenario, params))
+    assert list(results) == [2017, 2018]
+
+    expected = run_scenarios.run_scenario_ex(data.read_2018_demand(), data.get_normalized_solar_prod_ratio(),
+                                             scenario, params)
+    for result_year, expected_year in zip(results[2018], expected):
+        pd.testing.assert_frame_equal(result_year, expected_year)
+    # the same hours, with one more year of demand growth
+    assert (results[2017][0][SimOutFields.DEMAND] > expected[0][SimOutFields.DEMAND]).all()
+
+
+def test_solar_degradation(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = params.general.start_year + 3
+    scenario = roadmap.scenarios[0]
+    original_demand = data.read_2018_demand()
+    solar = data.get_solar_profile()
+
+    results = run_scenarios.run_scenario_ex(original_demand, solar, scenario, params)
+    params.general.pv_degradation_rate = 0.05
+    degraded = run_scenarios.run_scenario_ex(original_demand, solar, scenario, params)
+    block = run_scenarios.run_scenario_block_ex(original_demand, solar, scenario, params)
+
+    # new panels in the first year haven't degraded yet
+    pd.testing.assert_frame_equal(degraded[0], results[0])
+    for year_idx in range(1, len(results)):
+        assert degraded[year_idx][EnergySource.SOLAR].sum() < results[year_idx][EnergySource.SOLAR].sum()
+    for year_idx, year_result in enumerate(degraded):
+        np.testing.assert_allclose(block.field(EnergySource.SOLAR)[year_idx], year_result[EnergySource.SOLAR])
@@ -0,0 +1,47 @@
+import numpy as np
+
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from params.roadmap import Scenario
+from scenario_evaluator.run_scenarios import run_scenario_summary
+from scenario_evaluator.solve import min_solar_for_target, min_storage_for_target
+
+
+def with_last_year(scenario: Scenario, **values: float) -> Scenario:
+    arrays = {name: getattr(scenario, name).copy() for name in scenario.__dataclass_fields__}
+    for name, value in values.items():
+        arrays[name][-1] = value
+    return Scenario(**arrays)
+
+
+def last_year_share(scenario: Scenario, params: AllParams) -> float:
+    return run_scenario_summary(scenario, params)[-1].renewable_share
+
+
+def test_min_storage_for_target(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    scenario = roadmap.scenarios[0]
+
+    res = min_storage_for_target(scenario, params, 0.55, tolerance_kwh=100)
+    assert res.feasible and res.evaluations <= 20
+    assert res.renewable_share >= 0.55
+    np.testing.assert_allclose(last_year_share(with_last_year(scenario, storage_capacity_kwh=res.value), params),
+                               res.renewable_share)
+    assert last_year_share(with_last_year(scenario, storage_capacity_kwh=res.value - 100), params) < 0.55
+
+    # storage alone can't store more than the solar surplus
+    res = min_storage_for_target(scenario, params, 0.9)
+    assert not res.feasible and res.renewable_share < 0.9
+
+
+def test_min_solar_for_target(roadmap):
+    params = AllParams(**DEFAULT_PARAMS)
+    scenario = roadmap.scenarios[0]
+
+    res = min_solar_for_target(scenario, params, 0.6, tolerance_kw=100)
+    assert res.feasible and res.evaluations <= 20
+    assert last_year_share(with_last_year(scenario, solar_capacity_kw=res.value), params) >= 0.6
+    assert last_year_share(with_last_year(scenario, solar_capacity_kw=res.value - 100), params) < 0.6
+
+    res = min_solar_for_target(scenario, params, 0.2, year=2025)
+    assert res.feasible and res.value <= scenario.solar_capacity_kw[5]
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from common import EnergySource
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from scenario_evaluator.run_scenarios import run_scenario_block
+from scenario_evaluator.store import ResultStore
+
+
+def test_store_roundtrip(small_roadmap, tmp_path):
+    params = AllParams(**DEFAULT_PARAMS)
+    scenario, other_scenario = small_roadmap.scenarios[:2]
+    store = ResultStore(tmp_path)
+
+    assert store.open(scenario, params) is None
+    stored = store.get_or_run(scenario, params)
+    block = run_scenario_block(scenario, params)
+
+    np.testing.assert_array_equal(stored.block().values, block.values)
+    np.testing.assert_array_equal(stored.column(EnergySource.GAS, 2021), block.field(EnergySource.GAS)[1])
+    pd.testing.assert_frame_equal(stored.year_frame(2021), block.year_frame(2021))
+    assert isinstance(stored.field(EnergySource.GAS), np.memmap)
+
+    # stored results are found again, but only for the same scenario and params
+    assert store.open(scenario, params.compile()).path == stored.path
+    assert store.open(other_scenario, params) is None
+    params.general.charge_rate /= 2
+    assert store.open(scenario, params) is None
+
+
+def test_store_prunes_least_recently_used(small_roadmap, tmp_path):
+    params = AllParams(**DEFAULT_PARAMS)
+    params.general.end_year = 2023
+    scenario, other_scenario = small_roadmap.scenarios[:2]
+    store = ResultStore(tmp_path, max_scenarios=1)
+
+    store.get_or_run(scenario, params)
+    stored = store.get_or_run(other_scenario, params)
+
+    assert store.stored() == [stored.path]
+    assert store.open(scenario, params) is None
@@ -0,0 +1,45 @@
+import numpy as np
+
+import data
+from data.defaults import DEFAULT_PARAMS
+from params.params import AllParams
+from scenario_evaluator import run_roadmap, run_roadmap_pruned
+from scenario_evaluator.run_scenarios import run_scenario_batch_costs_ex, run_scenario_block, \
+    scenario_npv_lower_bounds
+
+
+def test_run_roadmap_matches_sequential(small_roadmap):
+    roadmap = small_roadmap
+    params = AllParams(**DEFAULT_PARAMS)
+
+    results = run_roadmap(roadmap, params, workers=2, chunk_size=2, max_in_flight=2)
+    scenarios = list(roadmap.scenarios)
+
+    assert [scenario for scenario, _ in results] == scenarios
+    for scenario, block in results:
+        np.testing.assert_array_equal(block.values, run_scenario_block(scenario, params).values)
+
+
+def test_run_roadmap_pruned_matches_grid(grid_roadmap, grid_params):
+    params, roadmap = grid_params, grid_roadmap
+    space = roadmap.scenarios
+    original_demand, solar_prod_ratio = data.read_2018_demand(), data.get_normalized_solar_prod_ratio()
+
+    grid = run_scenario_batch_costs_ex(original_demand, solar_prod_ratio, space.batch(), params)
+    bounds = scenario_npv_lower_bounds(original_demand, solar_prod_ratio, space.batch(), params)
+    assert (bounds <= np.array([costs.total_npv for costs in grid])).all()
+
+    res = run_roadmap_pruned(roadmap, params, workers=1)
+    assert res.evaluated + res.pruned == len(space)
+    assert res.pruned > len(space) / 2
+    np.testing.assert_allclose(res.costs.total_npv, min(costs.total_npv for costs in grid))
+
+
+def test_run_roadmap_accepts_compiled_params(small_roadmap):
+    roadmap = small_roadmap
+    params = AllParams(**DEFAULT_PARAMS)
+
+    results = run_roadmap(roadmap, params.compile(), workers=1)
+
+    for scenario, block in results[:3]:
+        np.testing.assert_array_equal(block.values, run_scenario_block(scenario, params).values)